@@ -1,34 +1,51 @@
-from flask import Flask, render_template, request, jsonify, redirect, url_for, session, Response
+from flask import Flask, render_template, request, jsonify, redirect, url_for, session, Response, make_response, g
+from werkzeug.http import is_resource_modified
 import models
+import bulk_import
+import mailer
+import metrics
+import cache
 import re
 import csv
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+import hashlib
+import io
+import json
+import zlib
 import os
-from werkzeug.security import generate_password_hash, check_password_hash
-def verify_password(stored_hash, password):
-    """Verify a password against a stored hash using werkzeug.
-    All passwords are stored using werkzeug's generate_password_hash (scrypt).
-    """
-    if not stored_hash:
-        return False
-    try:
-        return check_password_hash(stored_hash, password)
-    except (ValueError, TypeError):
-        # If werkzeug cannot parse the hash, fail safely
-        return False
+import time
+from werkzeug.security import generate_password_hash
+import hashing
+import events
+import submissions
+from hashing import verify_password
 import datetime
+from config import METRICS_CONFIG, QUERY_CONFIG
 
 app = Flask(__name__)
 app.secret_key = 'change_this_to_a_random_secret_in_prod'
 
-def send_email(to_email, subject, body):
-    """Send an email using SMTP. For demo, prints to console instead."""
-    # In production, use real SMTP settings from environment variables
-    print(f"\nEmail would be sent to: {to_email}")
-    print(f"Subject: {subject}")
-    print(f"Body:\n{body}")
+@app.before_request
+def start_request_metrics():
+    metrics.begin_request(request.url_rule.rule if request.url_rule else None)
+
+@app.after_request
+def finish_request_metrics(response):
+    route = request.url_rule.rule if request.url_rule else '<unmatched>'
+    queries, query_time = metrics.end_request(route, request.method, response.status_code)
+    response.headers['X-DB-Queries'] = str(queries)
+    response.headers['X-DB-Time'] = '%.4f' % query_time
+    return response
+
+@app.before_request
+def bind_db_connection():
+    # one pooled connection per request, handed back in release_db_connection
+    models.bind_request_connection()
+
+@app.teardown_request
+def release_db_connection(exc):
+    models.release_request_connection()
+    # requests that ended in an unhandled error never reach after_request
+    metrics.end_request(request.url_rule.rule if request.url_rule else '<unmatched>', request.method, 500)
 
 def login_required(fn):
     def wrapper(*args, **kwargs):
@@ -58,6 +75,89 @@ def company_required(fn):
     wrapper.__name__ = fn.__name__
     return wrapper
 
+def page_args():
+    """Read keyset pagination args (?limit=&after_id=&fields=a,b) from the query string."""
+    limit = request.args.get('limit', models.PAGE_SIZE_DEFAULT, type=int)
+    after_id = request.args.get('after_id', type=int)
+    fields = [f.strip() for f in (request.args.get('fields') or '').split(',') if f.strip()]
+    return limit, after_id, fields or None
+
+def json_rows(rows):
+    """Convert date/datetime values to strings so rows can be passed to jsonify."""
+    safe_rows = []
+    for r in rows:
+        safe = {}
+        for k, v in r.items():
+            if isinstance(v, (datetime.date, datetime.datetime)):
+                safe[k] = str(v)
+            else:
+                safe[k] = v
+        safe_rows.append(safe)
+    return safe_rows
+
+def json_ids():
+    """The "ids" list of the request's JSON object body, or (None, error response)."""
+    data = request.json or {}
+    if not isinstance(data, dict):
+        return None, (jsonify({'status':'error','message':'Expected a JSON object'}), 400)
+    ids = data.get('ids') or []
+    if not isinstance(ids, list):
+        return None, (jsonify({'status':'error','message':'ids must be a list'}), 400)
+    if not ids:
+        return None, (jsonify({'status':'error','message':'No ids provided'}), 400)
+    return ids, None
+
+def page_response(fetch_page):
+    """Run a models.get_*_page function with the request's pagination args and
+    jsonify it. ?q= narrows the page to rows starting with it (typeahead)."""
+    limit, after_id, fields = page_args()
+    try:
+        page = fetch_page(limit, after_id, fields, q=request.args.get('q'))
+    except ValueError as ve:
+        return jsonify({'status':'error','message': str(ve)}), 400
+    return jsonify({'status':'ok', 'rows': json_rows(page['rows']),
+                    'next_after_id': page['next_after_id'], 'has_more': page['has_more']})
+
+def conditional(validator):
+    """Answer conditional GETs (If-None-Match / If-Modified-Since) with a 304
+    before the view runs any query or renders anything.
+
+    `validator` is called with the view's kwargs and returns (etag, unix
+    timestamp or None) from models, or None when no cheap validator exists.
+    The ETag also covers the query string and the session user, because list
+    pages render per-user navigation and per-page rows.
+    """
+    def decorator(fn):
+        def wrapper(*args, **kwargs):
+            if request.method != 'GET':
+                return fn(*args, **kwargs)
+            try:
+                found = validator(**kwargs)
+            except Exception:
+                # no validator (e.g. DB unavailable): let the view handle it
+                found = None
+            if not found:
+                return fn(*args, **kwargs)
+            version, modified = found
+            scope = f"{version}|{request.full_path}|{session.get('user')}|{session.get('role')}"
+            etag = hashlib.sha1(scope.encode('utf-8')).hexdigest()
+            last_modified = datetime.datetime.fromtimestamp(modified, datetime.timezone.utc) if modified else None
+            if not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+                resp = Response(status=304)
+            else:
+                resp = make_response(fn(*args, **kwargs))
+                if resp.status_code != 200:
+                    return resp
+            resp.set_etag(etag)
+            if last_modified:
+                resp.last_modified = last_modified
+            # revalidate on every use, but let the browser keep the body
+            resp.headers['Cache-Control'] = 'private, no-cache'
+            return resp
+        wrapper.__name__ = fn.__name__
+        return wrapper
+    return decorator
+
 def ensure_admin():
     # create a default admin user if none exists, or update password if admin exists but can't login
     try:
@@ -84,42 +184,78 @@ def ensure_admin():
         print(f'[WARNING] Could not ensure admin user exists: {e}')
         pass
 
-@app.route('/')
-@login_required
-def index():
+def remember_identity(username):
+    """Resolve and cache the user's ids in the session; returns the identity dict."""
+    identity = models.resolve_identity(username) or {}
+    identity.update({'user': username, 'resolved_at': int(time.time())})
+    session['identity'] = identity
+    g.identity = identity
+    return identity
+
+def current_identity():
+    """users.id, role and student/company id of the logged-in user.
+
+    Cached in the session at login and re-resolved only when this user's own
+    student/company link no longer holds (see models.identity_is_current),
+    checked once per request.
+    """
+    identity = g.get('identity')
+    if identity is not None:
+        return identity
+    identity = session.get('identity')
+    if (not identity or identity.get('user') != session.get('user')
+            or not models.identity_is_current(identity)):
+        return remember_identity(session.get('user'))
+    g.identity = identity
+    return identity
+
+def current_dashboard_summary():
+    """Return (role, summary) for the logged-in user's dashboard."""
     role = session.get('role', 'student')
-    username = session.get('user')
-    
+    # Counts, status breakdown and recent applications come from aggregate
+    # queries (cached briefly); full lists live on their own paginated pages.
     if role == 'admin':
-        students = models.get_students()
-        companies = models.get_companies()
-        internships = models.get_internships()
-        applications = models.get_applications()
+        summary = models.get_dashboard_summary('admin')
     elif role == 'company':
-        students = []
-        companies = [models.get_company_by_username(username)] if username else []
-        internships = models.get_company_internships(companies[0]['id'] if companies else None)
-        applications = models.get_company_applications(companies[0]['id'] if companies else None)
+        summary = models.get_dashboard_summary('company', company_id=current_identity().get('company_id'))
     else:  # student
-        student = models.get_student_by_username(username)
-        students = [student] if student else []
-        companies = models.get_companies()
-        internships = models.get_internships()
-        applications = models.get_student_applications(student['id'] if student else None)
-    
-    return render_template('index.html', 
-                         students=students, 
-                         companies=companies, 
-                         internships=internships, 
-                         applications=applications,
-                         role=role)
+        summary = models.get_dashboard_summary('student', student_id=current_identity().get('student_id'))
+    return role, summary
+
+@app.route('/')
+@login_required
+def index():
+    role, summary = current_dashboard_summary()
+    return render_template('index.html', summary=summary, role=role)
+
+@app.route('/api/dashboard')
+@login_required
+def api_dashboard():
+    """The same summary the dashboard renders, as JSON."""
+    role, summary = current_dashboard_summary()
+    return jsonify({'status':'ok', 'counts': summary['counts'], 'status_counts': summary['status_counts'],
+                    'recent_applications': json_rows(summary['recent_applications'])})
+
+@app.route('/api/dashboard/company_totals')
+@admin_required
+def api_dashboard_company_totals():
+    """Per-company totals for the admin dashboard; loaded lazily by the page."""
+    limit = max(1, min(request.args.get('limit', 10, type=int), 100))
+    return jsonify({'status':'ok','companies': models.get_company_totals(limit)})
 
 ### Students endpoints
 @app.route('/students')
 @admin_required
+@conditional(lambda: models.resource_validator('students'))
 def students_page():
-    students = models.get_students()
-    return render_template('students.html', students=students, role='admin')
+    limit, after_id, _ = page_args()
+    page = models.get_students_page(limit, after_id)
+    return render_template('students.html', students=page['rows'], page=page, role='admin')
+
+@app.route('/api/students', methods=['GET'])
+@admin_required
+def api_list_students():
+    return page_response(models.get_students_page)
 
 @app.route('/api/students', methods=['POST'])
 @admin_required
@@ -127,13 +263,11 @@ def api_add_student():
     if not session.get('user'):
         return jsonify({'status':'error','message':'Authentication required'}), 401
     data = request.json or {}
-    name = (data.get('name') or '').strip()
-    email = (data.get('email') or '').strip()
-    if not name:
-        return jsonify({'status':'error','message':'Name is required'}), 400
-    if email and not re.match(r"^[^@\s]+@[^@\s]+\.[^@\s]+$", email):
-        return jsonify({'status':'error','message':'Invalid email'}), 400
-    sid = models.add_student(name, email or None, data.get('phone'), data.get('branch'))
+    try:
+        fields = models.validate_student(data)
+    except ValueError as ve:
+        return jsonify({'status':'error','message': str(ve)}), 400
+    sid = models.add_student(*fields)
     return jsonify({'status':'ok','id': sid})
 
 @app.route('/api/students/<int:sid>', methods=['PUT','DELETE'])
@@ -142,13 +276,11 @@ def api_student_modify(sid):
         return jsonify({'status':'error','message':'Authentication required'}), 401
     if request.method == 'PUT':
         data = request.json or {}
-        name = (data.get('name') or '').strip()
-        email = (data.get('email') or '').strip()
-        if not name:
-            return jsonify({'status':'error','message':'Name is required'}), 400
-        if email and not re.match(r"^[^@\s]+@[^@\s]+\.[^@\s]+$", email):
-            return jsonify({'status':'error','message':'Invalid email'}), 400
-        models.update_student(sid, name, email or None, data.get('phone'), data.get('branch'))
+        try:
+            fields = models.validate_student(data)
+        except ValueError as ve:
+            return jsonify({'status':'error','message': str(ve)}), 400
+        models.update_student(sid, *fields)
         return jsonify({'status':'ok'})
     else:
         models.delete_student(sid)
@@ -156,19 +288,28 @@ def api_student_modify(sid):
 
 ### Companies endpoints
 @app.route('/companies')
+@conditional(lambda: models.resource_validator('companies'))
 def companies_page():
-    companies = models.get_companies()
-    return render_template('companies.html', companies=companies)
+    limit, after_id, _ = page_args()
+    page = models.get_companies_page(limit, after_id)
+    return render_template('companies.html', companies=page['rows'], page=page)
+
+@app.route('/api/companies', methods=['GET'])
+def api_list_companies():
+    if not session.get('user'):
+        return jsonify({'status':'error','message':'Authentication required'}), 401
+    return page_response(models.get_companies_page)
 
 @app.route('/api/companies', methods=['POST'])
 def api_add_company():
     if not session.get('user'):
         return jsonify({'status':'error','message':'Authentication required'}), 401
     data = request.json or {}
-    name = (data.get('name') or '').strip()
-    if not name:
-        return jsonify({'status':'error','message':'Name is required'}), 400
-    cid = models.add_company(name, data.get('contact_person'), data.get('email'), data.get('phone'))
+    try:
+        fields = models.validate_company(data)
+    except ValueError as ve:
+        return jsonify({'status':'error','message': str(ve)}), 400
+    cid = models.add_company(*fields)
     return jsonify({'status':'ok','id': cid})
 
 @app.route('/api/companies/<int:cid>', methods=['PUT','DELETE'])
@@ -177,10 +318,11 @@ def api_company_modify(cid):
         return jsonify({'status':'error','message':'Authentication required'}), 401
     if request.method == 'PUT':
         data = request.json or {}
-        name = (data.get('name') or '').strip()
-        if not name:
-            return jsonify({'status':'error','message':'Name is required'}), 400
-        models.update_company(cid, name, data.get('contact_person'), data.get('email'), data.get('phone'))
+        try:
+            fields = models.validate_company(data)
+        except ValueError as ve:
+            return jsonify({'status':'error','message': str(ve)}), 400
+        models.update_company(cid, *fields)
         return jsonify({'status':'ok'})
     else:
         models.delete_company(cid)
@@ -188,20 +330,61 @@ def api_company_modify(cid):
 
 ### Internships endpoints
 @app.route('/internships')
+@conditional(lambda: models.resource_validator('internships', 'companies', 'applications'))
 def internships_page():
-    internships = models.get_internships()
-    companies = models.get_companies()
-    return render_template('internships.html', internships=internships, companies=companies)
+    limit, after_id, _ = page_args()
+    # the company pickers search /api/companies as the user types
+    page = models.get_internships_page(limit, after_id)
+    stats = models.get_internship_stats([r['id'] for r in page['rows']])
+    return render_template('internships.html', internships=page['rows'], page=page, stats=stats)
+
+@app.route('/api/internships', methods=['GET'])
+def api_list_internships():
+    if not session.get('user'):
+        return jsonify({'status':'error','message':'Authentication required'}), 401
+    return page_response(models.get_internships_page)
+
+@app.route('/api/internships/search')
+def api_search_internships():
+    """Ranked internship search.
+
+    Query args: q (matches title, description and company name), start_from,
+    start_to (YYYY-MM-DD), min_stipend, min_seats, company_id, limit and offset.
+    """
+    if not session.get('user'):
+        return jsonify({'status':'error','message':'Authentication required'}), 401
+    args = request.args
+    try:
+        page = models.search_internships(
+            args.get('q'), args.get('start_from'), args.get('start_to'), args.get('min_stipend'),
+            args.get('min_seats'), args.get('company_id'), args.get('limit', type=int), args.get('offset', 0, type=int))
+    except ValueError as ve:
+        return jsonify({'status':'error','message': str(ve)}), 400
+    return jsonify({'status':'ok','rows': json_rows(page['rows']), 'next_offset': page['next_offset'],
+                    'has_more': page['has_more']})
+
+@app.route('/api/internships/stats')
+def api_internship_stats():
+    """Application counters and seats remaining for ?ids=1,2,3 (from internship_stats)."""
+    if not session.get('user'):
+        return jsonify({'status':'error','message':'Authentication required'}), 401
+    try:
+        ids = [i for i in (request.args.get('ids') or '').split(',') if i.strip()]
+        stats = models.get_internship_stats(ids[:500])
+    except ValueError as ve:
+        return jsonify({'status':'error','message': str(ve)}), 400
+    return jsonify({'status':'ok','stats': {str(k): v for k, v in stats.items()}})
 
 @app.route('/api/internships', methods=['POST'])
 def api_add_internship():
     if not session.get('user'):
         return jsonify({'status':'error','message':'Authentication required'}), 401
     data = request.json or {}
-    title = (data.get('title') or '').strip()
-    if not title:
-        return jsonify({'status':'error','message':'Title is required'}), 400
-    iid = models.add_internship(title, data.get('company_id'), data.get('start_date'), data.get('end_date'), data.get('stipend'), data.get('seats'), data.get('description'))
+    try:
+        fields = models.validate_internship(data)
+    except ValueError as ve:
+        return jsonify({'status':'error','message': str(ve)}), 400
+    iid = models.add_internship(*fields)
     return jsonify({'status':'ok','id': iid})
 
 @app.route('/api/internships/<int:iid>', methods=['PUT','DELETE'])
@@ -210,22 +393,150 @@ def api_internship_modify(iid):
         return jsonify({'status':'error','message':'Authentication required'}), 401
     if request.method == 'PUT':
         data = request.json or {}
-        title = (data.get('title') or '').strip()
-        if not title:
-            return jsonify({'status':'error','message':'Title is required'}), 400
-        models.update_internship(iid, title, data.get('company_id'), data.get('start_date'), data.get('end_date'), data.get('stipend'), data.get('seats'), data.get('description'))
+        try:
+            fields = models.validate_internship(data)
+        except ValueError as ve:
+            return jsonify({'status':'error','message': str(ve)}), 400
+        models.update_internship(iid, *fields)
         return jsonify({'status':'ok'})
     else:
         models.delete_internship(iid)
         return jsonify({'status':'ok'})
 
+### Bulk import
+@app.route('/api/import/<entity>', methods=['POST'])
+@admin_required
+def api_bulk_import(entity):
+    """Bulk-load students, companies or internships.
+
+    Accepts a JSON array (or {"rows": [...]}), a text/csv body, or a multipart
+    upload in the `file` field (.csv or .json). Rows are validated with the same
+    rules as the single-row endpoints; invalid rows are reported, not fatal.
+    """
+    if entity not in models.IMPORT_TARGETS:
+        return jsonify({'status':'error','message':'Unknown import target'}), 404
+    batch_size = request.args.get('batch_size', bulk_import.DEFAULT_BATCH_SIZE, type=int)
+    try:
+        upload = request.files.get('file')
+        if upload:
+            fmt = 'json' if upload.filename.lower().endswith('.json') else 'csv'
+            rows = bulk_import.parse_rows(upload.read().decode('utf-8-sig'), fmt)
+        elif request.mimetype == 'text/csv':
+            rows = bulk_import.parse_rows(request.get_data(as_text=True), 'csv')
+        else:
+            rows = bulk_import.parse_rows(request.get_data(as_text=True), 'json')
+    except ValueError as ve:
+        return jsonify({'status':'error','message': str(ve)}), 400
+    result = models.bulk_insert(entity, rows, batch_size=batch_size)
+    return jsonify(dict(result, status='ok'))
+
 ### Applications
+APPLICATION_FILTERS = ('status', 'internship_id', 'company_id', 'student_id', 'applied_from', 'applied_to', 'q')
+
+def _int_or_none(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+def application_filters():
+    """Filters for models.query_applications from the query string, scoped so
+    companies and students only see their own applications."""
+    filters = {k: request.args.get(k) or None for k in APPLICATION_FILTERS}
+    filters['sort'] = request.args.get('sort') or 'applied_at'
+    filters['order'] = request.args.get('order') or 'desc'
+    role = session.get('role')
+    if role == 'company':
+        filters['company_id'] = current_identity().get('company_id') or 0
+    elif role == 'student':
+        filters['student_id'] = current_identity().get('student_id') or 0
+    return filters
+
 @app.route('/applications')
+@conditional(lambda: models.resource_validator('applications', 'students', 'internships', 'companies'))
 def applications_page():
-    applications = models.get_applications()
-    students = models.get_students()
-    internships = models.get_internships()
-    return render_template('applications.html', applications=applications, students=students, internships=internships)
+    filters = application_filters()
+    limit, cursor = request.args.get('limit', type=int), request.args.get('cursor')
+    query = lambda: models.query_applications(limit=limit, cursor=cursor, **filters)
+    # the pickers search /api/internships, /api/companies and /api/students as
+    # the user types; only the names of the currently selected filters are loaded
+    try:
+        page, internship_labels, company_labels, changes_cursor = models.gather(
+            query, (models.get_list_labels, 'internships', [filters['internship_id']]),
+            (models.get_list_labels, 'companies', [filters['company_id']]),
+            (models.changes_cursor, 'applications'))
+    except ValueError as ve:
+        return render_template('error.html', error=str(ve))
+    labels = {'internship': internship_labels.get(_int_or_none(filters['internship_id'])),
+              'company': company_labels.get(_int_or_none(filters['company_id']))}
+    return render_template('applications.html', applications=page['rows'], labels=labels, page=page,
+                           filters=filters, role=session.get('role'), changes_cursor=changes_cursor,
+                           student_id=current_identity().get('student_id') if session.get('role') == 'student' else None)
+
+@app.route('/api/applications', methods=['GET'])
+def api_list_applications():
+    if not session.get('user'):
+        return jsonify({'status':'error','message':'Authentication required'}), 401
+    # students and companies only see their own, as on /applications
+    role = session.get('role')
+    if role == 'admin':
+        scope = {}
+    elif role == 'company':
+        scope = {'company_id': current_identity().get('company_id') or 0}
+    else:
+        scope = {'student_id': current_identity().get('student_id') or 0}
+    return page_response(lambda *args, **kwargs: models.get_applications_page(*args, **dict(kwargs, **scope)))
+
+@app.route('/api/applications/query')
+def api_query_applications():
+    """Filtered, sorted applications.
+
+    Query args: status, internship_id, company_id, student_id, applied_from,
+    applied_to (YYYY-MM-DD), q, sort=applied_at|updated_at|status|id,
+    order=asc|desc, limit and cursor (next_cursor from the previous page).
+    """
+    if not session.get('user'):
+        return jsonify({'status':'error','message':'Authentication required'}), 401
+    try:
+        page = models.query_applications(limit=request.args.get('limit', type=int), cursor=request.args.get('cursor'),
+                                         **application_filters())
+    except ValueError as ve:
+        return jsonify({'status':'error','message': str(ve)}), 400
+    return jsonify({'status':'ok','rows': json_rows(page['rows']), 'next_cursor': page['next_cursor'],
+                    'has_more': page['has_more']})
+
+@app.route('/api/changes/<entity>')
+def api_changes(entity):
+    """Rows of students, companies, internships or applications changed since
+    ?cursor=, and the ids deleted since then (see models.get_changes).
+
+    Without a cursor the whole table comes back page by page; ?since=now only
+    returns a cursor to start from. Also takes limit and fields. Answers 410
+    when the cursor is too old to catch up: reload the full list instead.
+    """
+    if not session.get('user'):
+        return jsonify({'status':'error','message':'Authentication required'}), 401
+    role = session.get('role')
+    if entity == 'students' and role != 'admin':
+        return jsonify({'status':'error','message':'Admin access required'}), 403
+    # students and companies only see their own applications, as on the applications page
+    where, params = [], []
+    if entity == 'applications' and role == 'student':
+        where, params = ['a.student_id = %s'], [current_identity().get('student_id') or 0]
+    elif entity == 'applications' and role == 'company':
+        where, params = ['i.company_id = %s'], [current_identity().get('company_id') or 0]
+    limit, _, fields = page_args()
+    try:
+        if request.args.get('since') == 'now':
+            return jsonify({'status':'ok','rows': [], 'deleted': [], 'next_cursor': models.changes_cursor(entity),
+                            'has_more': False})
+        page = models.get_changes(entity, request.args.get('cursor'), limit, fields, where, params)
+    except models.CursorExpired as e:
+        return jsonify({'status':'error','message': str(e)}), 410
+    except ValueError as ve:
+        return jsonify({'status':'error','message': str(ve)}), 400
+    return jsonify({'status':'ok','rows': json_rows(page['rows']), 'deleted': page['deleted'],
+                    'next_cursor': page['next_cursor'], 'has_more': page['has_more']})
 
 
 @app.route('/labs')
@@ -237,7 +548,8 @@ def labs_page():
         'dml_update': "UPDATE students SET branch='IT' WHERE id=1;",
         'dcl_grant': "GRANT SELECT ON internship_db.* TO 'someuser'@'localhost';",
         'advanced_join': 'SELECT s.name AS student, i.title AS internship FROM applications a JOIN students s ON a.student_id=s.id JOIN internships i ON a.internship_id=i.id;',
-        'aggregate': 'SELECT i.title, COUNT(a.id) AS applications FROM internships i LEFT JOIN applications a ON a.internship_id=i.id GROUP BY i.id;'
+        'aggregate': 'SELECT i.title, COUNT(a.id) AS applications FROM internships i LEFT JOIN applications a ON a.internship_id=i.id GROUP BY i.id;',
+        'summary_table': 'SELECT i.title, st.total AS applications, st.selected, st.seats_remaining FROM internships i LEFT JOIN internship_stats st ON st.internship_id=i.id ORDER BY st.total DESC;'
     }
     return render_template('labs.html', examples=examples)
 
@@ -248,42 +560,108 @@ def db_view():
     if not session.get('user'):
         return redirect(url_for('login'))
     tables = models.get_tables()
-    table_data = []
-    for t in tables:
-        name = t.get('table')
-        try:
-            cols = models.get_table_columns(name)
-            sample = models.get_table_sample(name, limit=5)
-            # stringify datetimes for safe rendering
-            for r in sample:
-                for k, v in list(r.items()):
-                    if isinstance(v, (datetime.date, datetime.datetime)):
-                        r[k] = str(v)
-        except Exception as e:
-            cols = []
-            sample = []
-        table_data.append({'table': name, 'rows': t.get('rows', 0), 'columns': cols, 'sample': sample})
+    # each table's columns and sample rows are independent, so load them together
+    previews = models.gather(*[(table_preview, t.get('table')) for t in tables])
+    table_data = [{'table': t.get('table'), 'rows': t.get('rows', 0), 'columns': cols, 'sample': sample}
+                  for t, (cols, sample) in zip(tables, previews)]
     return render_template('db_view.html', tables=table_data)
 
+def table_preview(name):
+    """(columns, sample rows) for the database browser; empty if the table cannot be read."""
+    try:
+        cols = models.get_table_columns(name)
+        sample = models.get_table_sample(name, limit=5)
+        # stringify datetimes for safe rendering
+        for r in sample:
+            for k, v in list(r.items()):
+                if isinstance(v, (datetime.date, datetime.datetime)):
+                    r[k] = str(v)
+    except Exception as e:
+        cols = []
+        sample = []
+    return cols, sample
+
+
+query_cache = cache.LRUCache(QUERY_CONFIG['cache_entries'])
+_QUOTED = re.compile(r"""('(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*"|`[^`]*`)""")
+
+def query_cache_key(query):
+    """Query text with whitespace outside quotes collapsed and any trailing ';' dropped."""
+    parts = _QUOTED.split(query.strip().rstrip(';').strip())
+    return ''.join(p if i % 2 else ' '.join(p.split()) for i, p in enumerate(parts))
+
+def stream_query_result(key, rows):
+    """Encode rows as {"status":"ok","rows":[...],...} incrementally, stopping at
+    QUERY_CONFIG's row and byte limits. Complete bodies are cached under `key`."""
+    max_rows, max_bytes = QUERY_CONFIG['max_rows'], QUERY_CONFIG['max_bytes']
+    body = []
+    pending = ['{"status":"ok","rows":[']
+    size = len(pending[0])
+    count = 0
+    truncated = None
+    error = None
+    try:
+        for row in rows:
+            if count >= max_rows:
+                truncated = 'max_rows'
+                break
+            chunk = (',' if count else '') + json.dumps(row, default=str)
+            if size + len(chunk) > max_bytes:
+                truncated = 'max_bytes'
+                break
+            pending.append(chunk)
+            size += len(chunk)
+            count += 1
+            if len(pending) >= 100:
+                body.append(''.join(pending))
+                pending = []
+                yield body[-1]
+    except Exception as e:
+        # e.g. the server-side execution limit fired while rows were being read
+        truncated, error = 'error', 'Query failed: ' + str(e)
+    finally:
+        rows.close()
+    pending.append('],"row_count":%d,"truncated":%s,"truncated_reason":%s,"message":%s}' % (
+        count, json.dumps(truncated is not None), json.dumps(truncated), json.dumps(error)))
+    body.append(''.join(pending))
+    if error is None:
+        query_cache.set(key, ''.join(body), QUERY_CONFIG['cache_ttl'])
+    yield body[-1]
 
 @app.route('/api/query', methods=['POST'])
 def api_run_query():
     """Run a read-only SQL query (SELECT/SHOW/EXPLAIN) and return results.
     This endpoint intentionally rejects non-read queries to avoid destructive changes via UI.
+
+    Rows are streamed and capped by QUERY_CONFIG (run time, row count, response
+    size); the response carries row_count and a truncated flag.
     """
     data = request.json or {}
     query = data.get('query','').strip()
     if not query:
         return jsonify({'status':'error','message':'No query provided'}), 400
+    key = query_cache_key(query)
+    cached = query_cache.get(key)
+    if cached is not cache.MISSING:
+        return Response(cached, mimetype='application/json', headers={'X-Query-Cache': 'hit'})
     try:
-        rows = models.run_select(query)
-        return jsonify({'status':'ok','rows': rows})
+        rows = models.open_select(query, QUERY_CONFIG['max_execution_ms'])
     except ValueError as ve:
         return jsonify({'status':'error','message': str(ve)}), 400
     except Exception as e:
         return jsonify({'status':'error','message': 'Query failed: '+str(e)}), 500
+    resp = Response(stream_query_result(key, rows), mimetype='application/json', headers={'X-Query-Cache': 'miss'})
+    # releases the connection even if the client disconnects before the body starts
+    resp.call_on_close(rows.close)
+    return resp
 
 
+def busy_response(template):
+    """Fast 503 for when the password hashing pool is saturated."""
+    resp = make_response(render_template(template, error='The server is busy right now. Please try again in a few seconds.'), 503)
+    resp.headers['Retry-After'] = '5'
+    return resp
+
 @app.route('/register', methods=['GET', 'POST'])
 def register():
     if request.method == 'GET':
@@ -316,43 +694,50 @@ def register():
     if models.get_user_by_email(email):
         return render_template('register.html', error='Email already registered')
     
+    try:
+        pw_hash = hashing.hash_password(password)
+    except hashing.HashingBusy:
+        return busy_response('register.html')
+
     # Create user
     try:
-        pw_hash = generate_password_hash(password)
-        # Create user account
-        models.add_user(username, pw_hash, email, role=account_type)
-
-        # Create corresponding student or company record
-        if account_type == 'student':
-            student_name = data.get('student_name') or username
-            student_phone = data.get('student_phone')
-            student_branch = data.get('student_branch')
-            try:
-                models.add_student(student_name, email, student_phone, student_branch)
-            except Exception as e:
-                # If student creation fails, continue anyway (user can update profile later)
-                print(f"Warning: Could not create student record: {e}")
-        
-        elif account_type == 'company':
-            company_name = data.get('company_name') or username
-            contact_person = data.get('contact_person')
-            company_phone = data.get('company_phone')
-            try:
-                models.add_company(company_name, contact_person, email, company_phone)
-            except Exception as e:
-                # If company creation fails, continue anyway (user can update profile later)
-                print(f"Warning: Could not create company record: {e}")
+        # The account, its profile row and the queued welcome email commit together
+        with models.transaction():
+            # Create user account
+            user_id = models.add_user(username, pw_hash, email, role=account_type)
+
+            # Create corresponding student or company record
+            if account_type == 'student':
+                student_name = data.get('student_name') or username
+                student_phone = data.get('student_phone')
+                student_branch = data.get('student_branch')
+                try:
+                    models.add_student(student_name, email, student_phone, student_branch, user_id=user_id)
+                except Exception as e:
+                    # If student creation fails, continue anyway (user can update profile later)
+                    print(f"Warning: Could not create student record: {e}")
+
+            elif account_type == 'company':
+                company_name = data.get('company_name') or username
+                contact_person = data.get('contact_person')
+                company_phone = data.get('company_phone')
+                try:
+                    models.add_company(company_name, contact_person, email, company_phone, user_id=user_id)
+                except Exception as e:
+                    # If company creation fails, continue anyway (user can update profile later)
+                    print(f"Warning: Could not create company record: {e}")
+
+            # Queue welcome email (delivered in the background by mailer)
+            mailer.send_email(
+                email,
+                "Welcome to Internship Management System",
+                f"Hi {username},\n\nWelcome to the Internship Management System. Your {account_type} account has been created successfully."
+            )
 
         # Log them in
         session['user'] = username
         session['role'] = account_type
-
-        # Send welcome email
-        send_email(
-            email,
-            "Welcome to Internship Management System",
-            f"Hi {username},\n\nWelcome to the Internship Management System. Your {account_type} account has been created successfully."
-        )
+        remember_identity(username)
 
         return redirect(url_for('index'))
     except Exception as e:
@@ -373,7 +758,7 @@ def forgot_password():
     
     # For demo, just print reset instructions
     # In production, generate a secure token and send a real email
-    send_email(
+    mailer.send_email(
         email,
         "Password Reset Instructions",
         "A password reset was requested. If this wasn't you, please ignore this email."
@@ -391,16 +776,28 @@ def login():
     password = data.get('password') or ''
     if not username or not password:
         return render_template('login.html', error='username and password required')
+    if not hashing.login_throttle.allow(request.remote_addr, username):
+        resp = make_response(render_template('login.html', error='Too many login attempts. Please wait a minute and try again.'), 429)
+        resp.headers['Retry-After'] = str(int(hashing.login_throttle.window))
+        return resp
     user = models.get_user_by_username(username)
     if not user:
+        hashing.login_throttle.record_failure(username)
         return render_template('login.html', error='invalid credentials')
     # Support multiple hash formats (werkzeug pbkdf2 or bcrypt hashes stored by
     # other utilities). verify_password will return False on mismatch or
     # unsupported formats.
-    if not verify_password(user['password_hash'], password):
+    try:
+        ok = hashing.check_password(user['password_hash'], password)
+    except hashing.HashingBusy:
+        return busy_response('login.html')
+    if not ok:
+        hashing.login_throttle.record_failure(username)
         return render_template('login.html', error='invalid credentials')
+    hashing.login_throttle.reset(username)
     session['user'] = user['username']
     session['role'] = user.get('role', 'user')  # Store role in session
+    remember_identity(user['username'])
     return redirect(url_for('index'))
 
 
@@ -408,10 +805,9 @@ def login():
 @login_required
 def profile():
     role = session.get('role', 'student')
-    username = session.get('user')
     
     if role == 'student':
-        profile_data = models.get_student_by_username(username)
+        profile_data = models.get_student_by_id(current_identity().get('student_id'))
         if not profile_data:
             return render_template('error.html', error='Student profile not found')
             
@@ -426,7 +822,7 @@ def profile():
             return redirect(url_for('profile'))
             
     elif role == 'company':
-        profile_data = models.get_company_by_username(username)
+        profile_data = models.get_company_by_id(current_identity().get('company_id'))
         if not profile_data:
             return render_template('error.html', error='Company profile not found')
             
@@ -448,39 +844,70 @@ def profile():
 def logout():
     session.pop('user', None)
     session.pop('role', None)
+    session.pop('identity', None)
     return redirect(url_for('login'))
 
 
 @app.route('/api/table_export/<table_name>')
 def api_table_export(table_name):
+    """Stream a full table as CSV (default) or JSONL.
+
+    Query args: format=csv|jsonl, gzip=1, columns=a,b,c and after_id=N to resume
+    an interrupted export from the last id received.
+    """
     # Require login to export
     if not session.get('user'):
         return jsonify({'status':'error','message':'Authentication required'}), 401
+    fmt = (request.args.get('format') or 'csv').lower()
+    if fmt not in ('csv', 'jsonl'):
+        return jsonify({'status':'error','message':'format must be csv or jsonl'}), 400
+    use_gzip = request.args.get('gzip') in ('1', 'true', 'yes')
+    columns = [c.strip() for c in (request.args.get('columns') or '').split(',') if c.strip()]
+    after_id = request.args.get('after_id', type=int)
     try:
-        rows = models.get_table_sample(table_name, limit=10000)
-        if not rows:
-            return jsonify({'status':'error','message':'No rows to export'}), 400
-        # build CSV
-        def generate():
-            header = list(rows[0].keys())
-            out = csv.StringIO()
+        header, chunks = models.iter_table_chunks(table_name, columns or None, after_id)
+    except ValueError as ve:
+        return jsonify({'status':'error','message': str(ve)}), 400
+    except Exception as e:
+        return jsonify({'status':'error','message': str(e)}), 500
+
+    def encode():
+        # one output write per fetched chunk rather than per row
+        if fmt == 'csv':
+            out = io.StringIO()
             writer = csv.writer(out)
             writer.writerow(header)
             yield out.getvalue()
-            out.seek(0); out.truncate(0)
-            for r in rows:
-                writer.writerow([r.get(c) for c in header])
-                yield out.getvalue()
+            for rows in chunks:
                 out.seek(0); out.truncate(0)
-        disp = f'attachment; filename="{table_name}.csv"'
-        return Response(generate(), mimetype='text/csv', headers={'Content-Disposition': disp})
-    except Exception as e:
-        return jsonify({'status':'error','message': str(e)}), 500
+                writer.writerows(rows)
+                yield out.getvalue()
+        else:
+            for rows in chunks:
+                yield ''.join(json.dumps(dict(zip(header, r)), default=str) + '\n' for r in rows)
+
+    def generate():
+        if not use_gzip:
+            for text in encode():
+                yield text.encode('utf-8')
+            return
+        gz = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 -> gzip container
+        for text in encode():
+            data = gz.compress(text.encode('utf-8'))
+            if data:
+                yield data
+        yield gz.flush()
+
+    filename = f"{table_name}.{fmt}" + ('.gz' if use_gzip else '')
+    mimetype = 'application/gzip' if use_gzip else ('text/csv' if fmt == 'csv' else 'application/x-ndjson')
+    disp = f'attachment; filename="{filename}"'
+    return Response(generate(), mimetype=mimetype, headers={'Content-Disposition': disp})
 
 
 @app.route('/api/db_overview')
+@conditional(lambda: models.schema_validator())
 def api_db_overview():
-    """Return tables and their columns for the configured database."""
+    """Return tables and their columns for the configured database (served from the schema cache)."""
     try:
         tables = models.get_tables()
         result = []
@@ -492,28 +919,168 @@ def api_db_overview():
         return jsonify({'status':'error','message': str(e)}), 500
 
 
+@app.route('/api/schema/invalidate', methods=['POST'])
+@admin_required
+def api_schema_invalidate():
+    """Drop the cached table/column metadata, e.g. after running DDL outside the app."""
+    models.invalidate_schema_cache()
+    return jsonify({'status':'ok'})
+
+
 @app.route('/api/table_sample/<table_name>')
+@conditional(lambda table_name: models.table_validator(table_name))
 def api_table_sample(table_name):
     limit = request.args.get('limit', 10, type=int)
     try:
         rows = models.get_table_sample(table_name, limit=limit)
         # convert non-JSON types to strings where necessary
-        import datetime
-        safe_rows = []
-        for r in rows:
-            safe = {}
-            for k, v in r.items():
-                if isinstance(v, (datetime.date, datetime.datetime)):
-                    safe[k] = str(v)
-                else:
-                    safe[k] = v
-            safe_rows.append(safe)
-        return jsonify({'status':'ok','rows': safe_rows})
+        return jsonify({'status':'ok','rows': json_rows(rows)})
     except ValueError as ve:
         return jsonify({'status':'error','message': str(ve)}), 400
     except Exception as e:
         return jsonify({'status':'error','message': str(e)}), 500
 
+@app.route('/api/pool_stats')
+@admin_required
+def api_pool_stats():
+    """Connection pool counters: in-use/idle connections, waits and total wait time."""
+    return jsonify({'status':'ok','pool': models.pool_stats()})
+
+@app.route('/api/mail_stats')
+@admin_required
+def api_mail_stats():
+    """Email dispatcher delivery counters and outbox queue depth."""
+    return jsonify({'status':'ok','mail': mailer.get_dispatcher().stats()})
+
+@app.route('/api/auth_stats')
+@admin_required
+def api_auth_stats():
+    """Password hashing pool latency/queue depth and login throttle counters."""
+    return jsonify({'status':'ok','auth': hashing.stats()})
+
+@app.route('/api/events', methods=['GET', 'HEAD'])
+def api_events():
+    """Server-Sent Events stream of application status changes.
+
+    Students get their own applications, companies the applications to their
+    internships and admins all of them. Resumes after the Last-Event-ID header
+    (or ?last_event_id=); 503 when this worker has no stream to spare.
+    """
+    if request.method == 'HEAD':
+        # a stream nobody reads would hold one of the worker's slots
+        resp = Response(status=405)
+        resp.headers['Allow'] = 'GET'
+        return resp
+    if not session.get('user'):
+        return jsonify({'status':'error','message':'Authentication required'}), 401
+    role = session.get('role')
+    if role == 'student':
+        scope = {'student_id': current_identity().get('student_id') or 0}
+    elif role == 'company':
+        scope = {'company_id': current_identity().get('company_id') or 0}
+    elif role == 'admin':
+        scope = None
+    else:
+        return jsonify({'status':'error','message':'Access denied'}), 403
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    try:
+        sub, body = events.open_stream(scope, last_event_id)
+    except events.TooManyStreams as e:
+        resp = jsonify({'status':'error','message': str(e)})
+        resp.status_code = 503
+        resp.headers['Retry-After'] = '30'
+        return resp
+    # a stream stays open for minutes; it must not keep the request's pooled connection
+    models.release_request_connection()
+    resp = Response(body, mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    # the slot is freed when the response is closed, even if the body never ran
+    resp.call_on_close(sub.close)
+    return resp
+
+@app.route('/api/events_stats')
+@admin_required
+def api_events_stats():
+    """Open event streams, published/delivered counters and the event log size."""
+    return jsonify({'status':'ok','events': events.stats()})
+
+@app.route('/api/submit_stats')
+@admin_required
+def api_submit_stats():
+    """Application group-commit batch sizes, flush latency and outcomes."""
+    return jsonify({'status':'ok','submissions': submissions.stats()})
+
+@app.route('/api/slow_queries')
+@admin_required
+def api_slow_queries():
+    """The most recent statements slower than METRICS_CONFIG['slow_query_ms']."""
+    return jsonify({'status':'ok','slow_queries': list(reversed(metrics.slow_queries))})
+
+def metrics_allowed():
+    if session.get('role') == 'admin':
+        return True
+    token = METRICS_CONFIG['token']
+    if token:
+        return request.headers.get('Authorization') == 'Bearer ' + token
+    return request.remote_addr in ('127.0.0.1', '::1')
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Prometheus text exposition of request, query, pool, cache, mail, auth, submission and event metrics."""
+    if not metrics_allowed():
+        return Response('forbidden\n', status=403, mimetype='text/plain')
+    extra = []
+    pool = models.pool_stats()
+    for key in ('size', 'in_use', 'idle'):
+        extra += metrics.gauge_lines(f'db_pool_{key}', f'Connection pool {key}.', pool[key])
+    for key in ('checkouts', 'created', 'discarded', 'waits', 'timeouts'):
+        extra += metrics.gauge_lines(f'db_pool_{key}_total', f'Connection pool {key}.', pool[key], 'counter')
+    extra += metrics.gauge_lines('db_pool_wait_seconds_total', 'Time spent waiting for a pooled connection.',
+                                 pool['wait_time'], 'counter')
+    catalog = models.catalog_cache_stats()
+    extra += metrics.gauge_lines('catalog_cache_entries', 'Catalog cache entries.', catalog['entries'])
+    for key in ('hits', 'misses', 'evictions'):
+        extra += metrics.gauge_lines(f'catalog_cache_{key}_total', f'Catalog cache {key}.', catalog[key], 'counter')
+    mail = mailer.get_dispatcher().stats()
+    for key in ('sent', 'retried', 'failed', 'batches', 'smtp_connections'):
+        extra += metrics.gauge_lines(f'mail_{key}_total', f'Mail dispatcher {key}.', mail[key], 'counter')
+    if mail.get('queue') is not None:
+        extra += metrics.gauge_lines('mail_outbox_pending', 'Emails waiting in the outbox.', mail['queue'].get('pending', 0))
+    auth = hashing.stats()
+    extra += metrics.histogram_lines('auth_hash_duration_seconds', 'Password hash latency, including queueing.',
+                                     [((), hashing.pool.latency.snapshot())])
+    extra += metrics.gauge_lines('auth_hash_in_flight', 'Password hashes running or queued.', auth['in_flight'])
+    extra += metrics.gauge_lines('auth_hash_queue_depth', 'Password hashes waiting for a worker.', auth['queue_depth'])
+    extra += metrics.gauge_lines('auth_hash_rejected_total', 'Hash requests turned away (pool saturated).',
+                                 auth['rejected'], 'counter')
+    extra += metrics.gauge_lines('auth_login_throttled_total', 'Login attempts refused by throttling.',
+                                 auth['throttled'], 'counter')
+    committer = submissions.committer
+    extra += metrics.histogram_lines('submit_batch_size', 'Applications written per group commit.',
+                                     [((), committer.batch_sizes.snapshot())])
+    extra += metrics.histogram_lines('submit_flush_duration_seconds', 'Time to write and commit one batch.',
+                                     [((), committer.flush_latency.snapshot())])
+    extra += metrics.histogram_lines('submit_wait_seconds', 'Time a submission waited for its batch, including the write.',
+                                     [((), committer.wait_latency.snapshot())])
+    submit = submissions.stats()
+    extra += metrics.gauge_lines('submit_queued', 'Submissions waiting for the next flush.', submit['queued'])
+    for key in ('failed_flushes', 'timeouts'):
+        extra += metrics.gauge_lines(f'submit_{key}_total', f'Application submission {key}.', submit[key], 'counter')
+    extra += ['# HELP submit_outcomes_total Submissions by outcome.', '# TYPE submit_outcomes_total counter']
+    extra += [f'submit_outcomes_total{{outcome="{k}"}} {v}' for k, v in sorted(submit['outcomes'].items())]
+    stream_stats = events.stats()
+    extra += metrics.gauge_lines('events_open_streams', 'Server-Sent Events streams open in this worker.',
+                                 stream_stats['streams'])
+    for key in ('published', 'delivered', 'rejected'):
+        extra += metrics.gauge_lines(f'events_{key}_total', f'Application status events {key}.', stream_stats[key], 'counter')
+    return Response(metrics.render(extra), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/cache_stats')
+@admin_required
+def api_cache_stats():
+    """Catalog cache hit/miss/eviction counters and current namespace versions."""
+    return jsonify({'status':'ok','catalog': models.catalog_cache_stats()})
+
 @app.route('/api/applications', methods=['POST'])
 def api_add_application():
     if not session.get('user'):
@@ -523,7 +1090,16 @@ def api_add_application():
     iid = data.get('internship_id')
     if not sid or not iid:
         return jsonify({'status':'error','message':'student_id and internship_id are required'}), 400
-    aid = models.add_application(sid, iid)
+    try:
+        outcome, aid = submissions.submit_application(sid, iid)
+    except ValueError as ve:
+        return jsonify({'status':'error','message': str(ve)}), 400
+    except submissions.SubmitTimeout as e:
+        return jsonify({'status':'error','message': str(e)}), 503
+    if outcome == 'duplicate':
+        return jsonify({'status':'error','message':'Already applied to this internship','id':aid}), 409
+    if outcome == 'invalid':
+        return jsonify({'status':'error','message':'Student or internship not found'}), 404
     return jsonify({'status':'ok','id':aid})
 
 @app.route('/api/applications/<int:aid>', methods=['PUT','DELETE'])
@@ -533,12 +1109,83 @@ def api_application_modify(aid):
     if request.method == 'PUT':
         data = request.json or {}
         status = data.get('status') or 'Applied'
-        models.update_application(aid, status)
+        try:
+            models.update_application(aid, status)
+        except models.SeatsFull as e:
+            return jsonify({'status':'error','message': str(e)}), 409
         return jsonify({'status':'ok'})
     else:
         models.delete_application(aid)
         return jsonify({'status':'ok'})
 
+@app.route('/api/applications/<int:aid>/select', methods=['POST'])
+def api_select_application(aid):
+    """Select an applicant if the internship still has a free seat (409 when it is full)."""
+    if not session.get('user'):
+        return jsonify({'status':'error','message':'Authentication required'}), 401
+    outcome = models.select_application(aid)
+    if outcome == 'not_found':
+        return jsonify({'status':'error','message':'Application not found'}), 404
+    if outcome == 'full':
+        return jsonify({'status':'error','message':'No seats left for this internship'}), 409
+    return jsonify({'status':'ok','outcome': outcome})
+
+@app.route('/api/internships/<int:iid>/fill_seats', methods=['POST'])
+def api_fill_seats(iid):
+    """Fill the internship's remaining seats from a ranked list. Body: {"ids": [application ids, best first]}"""
+    if not session.get('user'):
+        return jsonify({'status':'error','message':'Authentication required'}), 401
+    ids, error = json_ids()
+    if error:
+        return error
+    try:
+        result = models.fill_seats(iid, ids)
+    except ValueError as ve:
+        return jsonify({'status':'error','message': str(ve)}), 400
+    return jsonify({'status':'ok','selected': result['selected'], 'seats_remaining': result['seats_remaining'],
+                    'results': [{'id': i, 'outcome': o} for i, o in result['results'].items()]})
+
+@app.route('/api/applications/batch_status', methods=['POST'])
+def api_applications_batch_status():
+    """Change the status of many applications at once.
+
+    Body: {"changes": [{"id": 1, "status": "Selected"}, ...]}
+       or {"ids": [1, 2, 3], "status": "Rejected"}
+    """
+    if not session.get('user'):
+        return jsonify({'status':'error','message':'Authentication required'}), 401
+    data = request.json or {}
+    if not isinstance(data, dict):
+        return jsonify({'status':'error','message':'Expected a JSON object'}), 400
+    items = data.get('changes') if 'changes' in data else data.get('ids')
+    if items is not None and not isinstance(items, list):
+        return jsonify({'status':'error','message':'changes and ids must be lists'}), 400
+    if 'changes' in data:
+        changes = [(c.get('id'), c.get('status')) for c in items or [] if isinstance(c, dict)]
+    else:
+        changes = [(i, data.get('status')) for i in items or []]
+    if not changes:
+        return jsonify({'status':'error','message':'No changes provided'}), 400
+    try:
+        outcomes = models.batch_update_application_status(changes)
+    except ValueError as ve:
+        return jsonify({'status':'error','message': str(ve)}), 400
+    return jsonify({'status':'ok','results': [{'id': i, 'outcome': o} for i, o in outcomes.items()]})
+
+@app.route('/api/<any(applications, students, internships):table>/batch_delete', methods=['POST'])
+def api_batch_delete(table):
+    """Delete many rows at once. Body: {"ids": [1, 2, 3]}"""
+    if not session.get('user'):
+        return jsonify({'status':'error','message':'Authentication required'}), 401
+    ids, error = json_ids()
+    if error:
+        return error
+    try:
+        outcomes = models.batch_delete(table, ids)
+    except ValueError as ve:
+        return jsonify({'status':'error','message': str(ve)}), 400
+    return jsonify({'status':'ok','results': [{'id': i, 'outcome': o} for i, o in outcomes.items()]})
+
 if __name__ == '__main__':
     # ensure default admin exists before handling requests (some Flask builds may not have
     # the before_first_request decorator available). This call is safe because the function
@@ -547,4 +1194,6 @@ if __name__ == '__main__':
         ensure_admin()
     except Exception:
         pass
+    # deliver anything left in the email outbox from a previous run
+    mailer.get_dispatcher().start()
     app.run(debug=True)
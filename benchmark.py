@@ -0,0 +1,268 @@
+"""
+Endpoint benchmarks against a seeded local database.
+
+Usage:
+    python benchmark.py seed --scale 0.01 --reset   # 100 companies, 2k students, 500 internships, 20k applications
+    python benchmark.py run --concurrency 8 --requests 200 --out bench.json
+    python benchmark.py compare before.json after.json
+
+`seed` fills the configured database (config.DB_CONFIG) with a reproducible
+dataset: scale 1.0 is 10k companies, 200k students, 50k internships and 2M
+applications, generated by datagen.py (skewed popularity, realistic statuses),
+and the same --seed always produces the same rows. It refuses to
+touch a database that already has data unless --reset is given, which empties
+the tables first. It also creates the bench_admin, bench_company and
+bench_student logins used by `run`.
+
+`run` drives the real Flask routes in-process (app.test_client(), one
+logged-in client per worker thread) at a fixed concurrency and reports
+p50/p95/p99 latency, throughput and database queries per request (from the
+X-DB-Queries header) for each scenario, then saves everything as JSON.
+Caches stay on, as in production; the first requests of a scenario warm them.
+"""
+import argparse
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+FULL_SCALE = {'companies': 10000, 'students': 200000, 'internships': 50000, 'applications': 2000000}
+BENCH_PASSWORD = 'bench-password'
+BENCH_USERS = (('bench_admin', 'admin'), ('bench_company', 'company'), ('bench_student', 'student'))
+STATUSES = ('Applied', 'Under Review', 'Interview Scheduled', 'Selected', 'Rejected')
+
+
+def seed(scale=0.01, seed_value=42, reset=False, mode='insert'):
+    import datagen
+    import models
+    from werkzeug.security import generate_password_hash
+
+    counts = {k: max(1, int(v * scale)) for k, v in FULL_SCALE.items()}
+    conn = models.get_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT (SELECT COUNT(*) FROM students) + (SELECT COUNT(*) FROM companies) + "
+                    "(SELECT COUNT(*) FROM internships) + (SELECT COUNT(*) FROM applications)")
+        existing = cur.fetchone()[0]
+        if existing and not reset:
+            raise SystemExit('Database already has data; pass --reset to empty it first')
+        if reset:
+            cur.execute('SET FOREIGN_KEY_CHECKS = 0')
+            for table in ('internship_stats', 'applications', 'internships', 'students', 'companies'):
+                cur.execute(f'TRUNCATE TABLE {table}')
+            cur.execute("DELETE FROM users WHERE username LIKE 'bench\\_%' OR email LIKE '%@college.example' "
+                        "OR email LIKE 'hr%@company%.example'")
+            cur.execute('SET FOREIGN_KEY_CHECKS = 1')
+            conn.commit()
+        cur.close()
+    finally:
+        conn.close()
+
+    start = time.time()
+    datagen.generate(counts, seed_value, mode, verbose=False)
+    # bench logins for company 1 and student 1
+    pw = generate_password_hash(BENCH_PASSWORD)
+    emails = {'admin': 'bench_admin@internship.example', 'company': 'hr1@company1.example',
+              'student': 'student1@college.example'}
+    conn = models.get_connection()
+    try:
+        cur = conn.cursor()
+        cur.executemany("INSERT INTO users (username, password_hash, email, role) VALUES (%s,%s,%s,%s)",
+                        [(name, pw, emails[role], role) for name, role in BENCH_USERS])
+        # hand company 1 and student 1 over to the bench logins
+        for table, username in (('companies', 'bench_company'), ('students', 'bench_student')):
+            cur.execute(f"UPDATE {table} SET user_id = (SELECT id FROM users WHERE username = %s) WHERE id = 1",
+                        (username,))
+        conn.commit()
+        cur.close()
+    finally:
+        conn.close()
+    models.invalidate_schema_cache()
+    models.bump_catalog_version(*models.VERSIONED_TABLES)
+    print(f"[SUCCESS] Seeded {counts} in {time.time() - start:.1f}s")
+    return counts
+
+
+def _scenarios(state):
+    """(name, role, method, path-or-callable, json-body-callable) for each benchmarked request."""
+    rng = state['rng']
+    max_student, max_internship, max_application = state['max_ids']
+    return [
+        ('dashboard', 'student', 'GET', '/', None),
+        ('dashboard', 'company', 'GET', '/', None),
+        ('dashboard', 'admin', 'GET', '/', None),
+        ('internships', 'student', 'GET', '/internships', None),
+        ('internships_search', 'student', 'GET', lambda: '/api/internships/search?q=' + rng.choice(['data', 'cloud', 'intern']), None),
+        ('applications', 'admin', 'GET', '/applications', None),
+        ('applications', 'company', 'GET', '/applications', None),
+        ('applications_query', 'admin', 'GET', lambda: '/api/applications/query?status=' + rng.choice(STATUSES), None),
+        ('db_view', 'admin', 'GET', '/db', None),
+        ('table_export', 'admin', 'GET', '/api/table_export/internships', None),
+        ('add_application', 'student', 'POST', '/api/applications',
+         lambda: {'student_id': rng.randint(1, max_student), 'internship_id': rng.randint(1, max_internship)}),
+        ('update_application', 'admin', 'PUT', lambda: f'/api/applications/{rng.randint(1, max_application)}',
+         lambda: {'status': rng.choice(STATUSES)}),
+        ('batch_status', 'admin', 'POST', '/api/applications/batch_status',
+         lambda: {'ids': [rng.randint(1, max_application) for _ in range(20)], 'status': rng.choice(STATUSES)}),
+    ]
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    # nearest-rank percentile
+    rank = math.ceil(pct / 100.0 * len(sorted_values))
+    return sorted_values[max(0, min(len(sorted_values), rank) - 1)]
+
+
+def _summarize(samples, elapsed):
+    latencies = sorted(s[0] for s in samples)
+    queries = [s[2] for s in samples if s[2] is not None]
+    statuses = {}
+    for s in samples:
+        statuses[str(s[1])] = statuses.get(str(s[1]), 0) + 1
+    return {
+        'requests': len(samples),
+        'errors': sum(1 for s in samples if s[1] >= 500),
+        'status_codes': statuses,
+        'throughput_rps': round(len(samples) / elapsed, 2) if elapsed > 0 else None,
+        'latency_ms': {
+            'mean': round(sum(latencies) / len(latencies) * 1000, 3) if latencies else None,
+            'p50': round(_percentile(latencies, 50) * 1000, 3) if latencies else None,
+            'p95': round(_percentile(latencies, 95) * 1000, 3) if latencies else None,
+            'p99': round(_percentile(latencies, 99) * 1000, 3) if latencies else None,
+            'max': round(latencies[-1] * 1000, 3) if latencies else None,
+        },
+        'queries_per_request': round(sum(queries) / len(queries), 2) if queries else None,
+    }
+
+
+def run(concurrency=8, requests_per_scenario=200, only=None, seed_value=42):
+    import app as webapp
+    import models
+
+    webapp.app.config['TESTING'] = True
+    # every bench client logs in from 127.0.0.1
+    webapp.hashing.login_throttle.ip_limit = 10 ** 9
+    max_ids = []
+    for table in ('students', 'internships', 'applications'):
+        rows = models.fetchall(f'SELECT COALESCE(MAX(id), 1) AS m FROM {table}')
+        max_ids.append(rows[0]['m'])
+    state = {'rng': random.Random(seed_value), 'max_ids': max_ids}
+    lock = threading.Lock()
+    local = threading.local()
+
+    def client_for(role):
+        clients = getattr(local, 'clients', None)
+        if clients is None:
+            clients = local.clients = {}
+        if role not in clients:
+            client = webapp.app.test_client()
+            username = dict((r, n) for n, r in BENCH_USERS)[role]
+            resp = client.post('/login', data={'username': username, 'password': BENCH_PASSWORD})
+            if resp.status_code != 302:
+                raise RuntimeError(f'Could not log in as {username} (HTTP {resp.status_code}); run `benchmark.py seed` first')
+            clients[role] = client
+        return clients[role]
+
+    def one(scenario):
+        name, role, method, path, body = scenario
+        with lock:  # the shared rng is not thread-safe
+            url = path() if callable(path) else path
+            payload = body() if body else None
+        client = client_for(role)
+        start = time.perf_counter()
+        resp = client.open(url, method=method, json=payload)
+        resp.get_data()  # drain streamed bodies so their cost is counted
+        elapsed = time.perf_counter() - start
+        queries = resp.headers.get('X-DB-Queries')
+        resp.close()
+        return elapsed, resp.status_code, int(queries) if queries is not None else None
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for scenario in _scenarios(state):
+            name, role = scenario[0], scenario[1]
+            if only and name not in only:
+                continue
+            key = f'{name}[{role}]'
+            # log every worker thread in before timing starts
+            barrier = threading.Barrier(concurrency)
+            list(pool.map(lambda _: (client_for(role), barrier.wait()), range(concurrency)))
+            start = time.perf_counter()
+            samples = list(pool.map(lambda _: one(scenario), range(requests_per_scenario)))
+            results[key] = _summarize(samples, time.perf_counter() - start)
+            r = results[key]
+            print(f"{key:32s} {r['throughput_rps'] or 0:9.1f} req/s  p50 {r['latency_ms']['p50']:8.2f} ms  "
+                  f"p95 {r['latency_ms']['p95']:8.2f} ms  p99 {r['latency_ms']['p99']:8.2f} ms  "
+                  f"q/req {r['queries_per_request']}  errors {r['errors']}")
+    return results
+
+
+def _git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL,
+                                       cwd=os.path.dirname(os.path.abspath(__file__))).decode().strip()
+    except Exception:
+        return None
+
+
+def compare(before_path, after_path):
+    with open(before_path) as f:
+        before = json.load(f)['results']
+    with open(after_path) as f:
+        after = json.load(f)['results']
+    print(f"{'scenario':32s} {'p95 before':>11s} {'p95 after':>11s} {'change':>8s} {'rps before':>11s} {'rps after':>11s}")
+    for key in sorted(set(before) & set(after)):
+        b, a = before[key], after[key]
+        p95b, p95a = b['latency_ms']['p95'], a['latency_ms']['p95']
+        change = f"{(p95a - p95b) / p95b * 100:+.0f}%" if p95b else '-'
+        print(f"{key:32s} {p95b:11.2f} {p95a:11.2f} {change:>8s} {b['throughput_rps']:11.1f} {a['throughput_rps']:11.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Seed a benchmark dataset and benchmark the app routes')
+    sub = parser.add_subparsers(dest='command', required=True)
+    s = sub.add_parser('seed', help='load a reproducible dataset into the configured database')
+    s.add_argument('--scale', type=float, default=0.01, help='fraction of the full-size dataset (default %(default)s)')
+    s.add_argument('--seed', type=int, default=42)
+    s.add_argument('--reset', action='store_true', help='empty the tables first')
+    s.add_argument('--mode', choices=['insert', 'infile'], default='insert', help='datagen.py load method')
+    r = sub.add_parser('run', help='benchmark the routes')
+    r.add_argument('--concurrency', type=int, default=8)
+    r.add_argument('--requests', type=int, default=200, help='requests per scenario (default %(default)s)')
+    r.add_argument('--only', nargs='*', help='scenario names to run (default: all)')
+    r.add_argument('--seed', type=int, default=42)
+    r.add_argument('--out', default='bench_results.json')
+    c = sub.add_parser('compare', help='compare two result files')
+    c.add_argument('before')
+    c.add_argument('after')
+    args = parser.parse_args()
+
+    if args.command == 'seed':
+        seed(args.scale, args.seed, args.reset, args.mode)
+    elif args.command == 'compare':
+        compare(args.before, args.after)
+    else:
+        results = run(args.concurrency, args.requests, args.only, args.seed)
+        report = {
+            'started_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'git_revision': _git_revision(),
+            'python': sys.version.split()[0],
+            'concurrency': args.concurrency,
+            'requests_per_scenario': args.requests,
+            'seed': args.seed,
+            'results': results,
+        }
+        with open(args.out, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"[SUCCESS] Results written to {args.out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""
+Bulk-load students, companies or internships from a CSV or JSON file.
+
+Usage:
+    python bulk_import.py students students.csv
+    python bulk_import.py internships postings.json --batch-size 2000
+
+Rows are validated with the same rules as the /api/students, /api/companies
+and /api/internships endpoints and inserted in batched transactions by
+models.bulk_insert. Invalid rows are reported and skipped.
+"""
+import argparse
+import csv
+import io
+import json
+import sys
+import time
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+def parse_rows(text, fmt):
+    """Parse `text` as 'csv' (header row required) or 'json' (array of objects)."""
+    if fmt == 'csv':
+        return [dict(r) for r in csv.DictReader(io.StringIO(text))]
+    try:
+        data = json.loads(text or '[]')
+    except ValueError:
+        raise ValueError('Invalid JSON')
+    if isinstance(data, dict):
+        data = data.get('rows')
+    if not isinstance(data, list):
+        raise ValueError('Expected a JSON array of rows')
+    return data
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Bulk import rows into the internship database')
+    parser.add_argument('entity', choices=['students', 'companies', 'internships'])
+    parser.add_argument('path', help='.csv or .json file')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help='rows per transaction (default %(default)s)')
+    args = parser.parse_args()
+
+    import models
+
+    fmt = 'json' if args.path.lower().endswith('.json') else 'csv'
+    with open(args.path, encoding='utf-8-sig', newline='') as f:
+        rows = parse_rows(f.read(), fmt)
+
+    start = time.time()
+    result = models.bulk_insert(args.entity, rows, batch_size=args.batch_size)
+    elapsed = time.time() - start
+
+    for err in result['errors']:
+        print(f"[ERROR] row {err['row']}: {err['error']}")
+    rate = result['inserted'] / elapsed if elapsed > 0 else 0
+    print(f"[SUCCESS] Inserted {result['inserted']} of {result['total']} {args.entity} "
+          f"in {elapsed:.2f}s ({rate:.0f} rows/s), {len(result['errors'])} error(s)")
+    if result['errors']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
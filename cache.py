@@ -0,0 +1,191 @@
+"""Cache backends used by models for read-through caching.
+
+Two interchangeable backends share the same small interface
+(get / set / delete / clear / get_counter / incr / set_counter / epoch / stats):
+
+- LRUCache: in-process and very fast, but every worker process has its own
+  copy, so a write in one worker is only seen by the others once their
+  entries expire.
+- SQLiteCache: a SQLite file shared by every worker process on the host.
+  Version counters live there too, so a write in any worker is seen by all
+  workers on their next read.
+
+Counters (used for versioned keys) are stored apart from cached entries and
+are never evicted. epoch() identifies the counter store itself, so a counter
+value can't be mistaken for one from an earlier store (e.g. after a restart).
+"""
+import os
+import pickle
+import random
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+MISSING = object()
+
+
+class LRUCache(object):
+    shared = False
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max(1, int(max_entries))
+        self._entries = OrderedDict()
+        self._counters = {}
+        self._epoch = random.getrandbits(48)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=MISSING):
+        now = time.time()
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None or (item[0] is not None and item[0] <= now):
+                if item is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def set(self, key, value, ttl=None):
+        expires = time.time() + ttl if ttl else None
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_counter(self, key):
+        with self._lock:
+            return self._counters.get(key, 0)
+
+    def incr(self, key):
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    def set_counter(self, key, value):
+        with self._lock:
+            self._counters[key] = int(value)
+
+    def epoch(self):
+        return self._epoch
+
+    def stats(self):
+        with self._lock:
+            return {'backend': 'memory', 'entries': len(self._entries), 'max_entries': self.max_entries,
+                    'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions}
+
+
+class SQLiteCache(object):
+    shared = True
+
+    def __init__(self, path, max_entries=256):
+        self.path = path
+        self.max_entries = max(1, int(max_entries))
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._conn().executescript("""
+            CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, value BLOB, expires REAL, stored REAL);
+            CREATE INDEX IF NOT EXISTS idx_entries_stored ON entries (stored);
+            CREATE TABLE IF NOT EXISTS counters (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+        """)
+        self._conn().execute("INSERT OR IGNORE INTO counters (key, value) VALUES ('__epoch__', ?)",
+                             (random.getrandbits(48),))
+        self._epoch = self.get_counter('__epoch__')
+
+    def _conn(self):
+        # sqlite connections are per thread, and must not survive a fork
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _count(self, attr):
+        with self._lock:
+            setattr(self, attr, getattr(self, attr) + 1)
+
+    def get(self, key, default=MISSING):
+        row = self._conn().execute('SELECT value, expires FROM entries WHERE key = ?', (key,)).fetchone()
+        if row is None or (row[1] is not None and row[1] <= time.time()):
+            self._count('misses')
+            return default
+        self._count('hits')
+        return pickle.loads(row[0])
+
+    def set(self, key, value, ttl=None):
+        now = time.time()
+        conn = self._conn()
+        conn.execute('INSERT OR REPLACE INTO entries (key, value, expires, stored) VALUES (?, ?, ?, ?)',
+                     (key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), now + ttl if ttl else None, now))
+        over = conn.execute('SELECT COUNT(*) FROM entries').fetchone()[0] - self.max_entries
+        if over > 0:
+            # oldest-stored first; expired entries naturally age out this way
+            conn.execute('DELETE FROM entries WHERE key IN (SELECT key FROM entries ORDER BY stored LIMIT ?)', (over,))
+            with self._lock:
+                self.evictions += over
+
+    def delete(self, key):
+        self._conn().execute('DELETE FROM entries WHERE key = ?', (key,))
+
+    def clear(self):
+        self._conn().execute('DELETE FROM entries')
+
+    def get_counter(self, key):
+        row = self._conn().execute('SELECT value FROM counters WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else 0
+
+    def incr(self, key):
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute('INSERT OR IGNORE INTO counters (key, value) VALUES (?, 0)', (key,))
+            conn.execute('UPDATE counters SET value = value + 1 WHERE key = ?', (key,))
+            value = conn.execute('SELECT value FROM counters WHERE key = ?', (key,)).fetchone()[0]
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return value
+
+    def set_counter(self, key, value):
+        self._conn().execute('INSERT OR REPLACE INTO counters (key, value) VALUES (?, ?)', (key, int(value)))
+
+    def epoch(self):
+        return self._epoch
+
+    def stats(self):
+        entries = self._conn().execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+        with self._lock:
+            return {'backend': 'sqlite', 'entries': entries, 'max_entries': self.max_entries,
+                    'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions}
+
+
+def make_cache(config):
+    """Build a backend from a config dict: {'backend': 'memory'|'sqlite', 'max_entries', 'path'}."""
+    backend = config.get('backend', 'memory')
+    if backend == 'memory':
+        return LRUCache(config.get('max_entries', 256))
+    if backend == 'sqlite':
+        return SQLiteCache(config['path'], config.get('max_entries', 256))
+    raise ValueError(f'Unknown cache backend: {backend}')
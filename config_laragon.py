@@ -3,6 +3,7 @@ Laragon MySQL typically uses empty password by default.
 Copy this to config.py if you're using Laragon, or update config.py with your Laragon MySQL password.
 """
 import os
+import tempfile
 
 DB_CONFIG = {
     "host": os.environ.get('DB_HOST', 'localhost'),
@@ -14,3 +15,136 @@ DB_CONFIG = {
     "collation": 'utf8mb4_unicode_ci'
 }
 
+
+# Connection pool used by models.get_connection(). Each Flask request borrows
+# one connection for its whole lifetime and returns it on teardown.
+POOL_CONFIG = {
+    "size": int(os.environ.get('DB_POOL_SIZE', 10)),
+    "timeout": float(os.environ.get('DB_POOL_TIMEOUT', 10)),  # seconds to wait for a free connection
+    "ping_interval": float(os.environ.get('DB_POOL_PING_INTERVAL', 30)),  # ping connections idle longer than this
+    "max_lifetime": float(os.environ.get('DB_POOL_MAX_LIFETIME', 1800)),  # recycle connections older than this
+}
+
+# Seconds to keep information_schema table/column metadata cached in models.
+SCHEMA_CACHE_TTL = int(os.environ.get('SCHEMA_CACHE_TTL', 300))
+
+# Seconds the dashboard summary (counts, status breakdown, recent items) is cached.
+DASHBOARD_CACHE_TTL = int(os.environ.get('DASHBOARD_CACHE_TTL', 15))
+
+# Read-through cache for the internship/company catalog (models.get_internships,
+# get_companies and their paginated variants). 'memory' keeps a per-process LRU;
+# 'sqlite' keeps one cache file shared by every worker process on the host, so
+# use it when running several workers. Its version counters also validate
+# conditional GETs (ETag / Last-Modified) without a query; with 'memory' the
+# validators come from each table's COUNT(*) and MAX(updated_at) instead.
+CATALOG_CACHE = {
+    "backend": os.environ.get('CATALOG_CACHE_BACKEND', 'memory'),
+    "max_entries": int(os.environ.get('CATALOG_CACHE_MAX_ENTRIES', 256)),
+    "ttl": int(os.environ.get('CATALOG_CACHE_TTL', 300)),  # safety net for writes made outside the app
+    "path": os.environ.get('CATALOG_CACHE_PATH', os.path.join(tempfile.gettempdir(), 'internship_catalog_cache.sqlite3')),
+}
+
+# Outgoing email. Mails are queued in the email_outbox table and delivered by
+# the background dispatcher in mailer.py. 'console' prints them (demo mode);
+# 'smtp' delivers through the server below.
+MAIL_CONFIG = {
+    "backend": os.environ.get('MAIL_BACKEND', 'console'),
+    "host": os.environ.get('SMTP_HOST', 'localhost'),
+    "port": int(os.environ.get('SMTP_PORT', 25)),
+    "username": os.environ.get('SMTP_USER', ''),
+    "password": os.environ.get('SMTP_PASSWORD', ''),
+    "use_tls": os.environ.get('SMTP_TLS', '') in ('1', 'true', 'yes'),
+    "sender": os.environ.get('MAIL_SENDER', 'no-reply@internship.com'),
+    "workers": int(os.environ.get('MAIL_WORKERS', 2)),  # parallel SMTP connections
+    "batch_size": int(os.environ.get('MAIL_BATCH_SIZE', 50)),  # mails sent per SMTP connection
+    "poll_interval": float(os.environ.get('MAIL_POLL_INTERVAL', 5)),
+    "max_attempts": int(os.environ.get('MAIL_MAX_ATTEMPTS', 5)),
+    "backoff": float(os.environ.get('MAIL_BACKOFF', 30)),  # seconds before the first retry, doubled each time
+}
+
+# Password hashing (hashing.py). scrypt runs in a process pool of hash_workers
+# processes (0 = inline on the request thread); at most max_pending hashes may
+# be running or queued, and a request waits queue_timeout seconds for a slot
+# before getting a "try again" response. Logins are limited to ip_limit
+# attempts per IP and user_limit failures per username within window seconds.
+# A session whose student/company profile was not found at login looks for it
+# again at most every identity_retry seconds.
+AUTH_CONFIG = {
+    "hash_workers": int(os.environ.get('AUTH_HASH_WORKERS', 2)),
+    "max_pending": int(os.environ.get('AUTH_HASH_MAX_PENDING', 16)),
+    "queue_timeout": float(os.environ.get('AUTH_HASH_QUEUE_TIMEOUT', 2)),
+    "hash_timeout": float(os.environ.get('AUTH_HASH_TIMEOUT', 10)),
+    "ip_limit": int(os.environ.get('LOGIN_IP_LIMIT', 30)),
+    "user_limit": int(os.environ.get('LOGIN_USER_LIMIT', 10)),
+    "window": float(os.environ.get('LOGIN_WINDOW', 60)),
+    "identity_retry": int(os.environ.get('IDENTITY_RETRY', 60)),
+}
+
+# Query and request instrumentation (metrics.py, served at /metrics).
+# Statements slower than slow_query_ms are logged; a request that runs one
+# statement shape n_plus_one_threshold times or more is flagged as N+1.
+# /metrics is open to admins, to requests bearing "Authorization: Bearer
+# <token>" when a token is set, and otherwise only to localhost.
+METRICS_CONFIG = {
+    "slow_query_ms": float(os.environ.get('SLOW_QUERY_MS', 200)),
+    "n_plus_one_threshold": int(os.environ.get('N_PLUS_ONE_THRESHOLD', 5)),
+    "max_statements": int(os.environ.get('METRICS_MAX_STATEMENTS', 500)),  # distinct SQL shapes tracked
+    "token": os.environ.get('METRICS_TOKEN', ''),
+}
+
+# Limits for the /api/query SQL runner on the Labs page. Results are streamed
+# and cut off at max_rows rows or max_bytes of JSON (the response then says
+# truncated); identical queries are answered from a small LRU cache for
+# cache_ttl seconds.
+QUERY_CONFIG = {
+    "max_execution_ms": int(os.environ.get('QUERY_MAX_EXECUTION_MS', 5000)),
+    "max_rows": int(os.environ.get('QUERY_MAX_ROWS', 1000)),
+    "max_bytes": int(os.environ.get('QUERY_MAX_BYTES', 2 * 1024 * 1024)),
+    "cache_entries": int(os.environ.get('QUERY_CACHE_ENTRIES', 64)),
+    "cache_ttl": int(os.environ.get('QUERY_CACHE_TTL', 30)),
+}
+
+# Concurrent reads (models.gather): how many helper threads may run a page's
+# independent queries in parallel, shared by the whole process. 0 runs them
+# one after another on the request thread.
+FANOUT_CONFIG = {
+    "workers": int(os.environ.get('DB_FANOUT_WORKERS', 4)),
+}
+
+# Application submissions (submissions.py). POST /api/applications queues the
+# application and a background flusher writes everything queued in one
+# multi-row INSERT and one commit, once max_batch rows are waiting or
+# max_wait_ms after the oldest arrived. A caller gives up after timeout
+# seconds. max_wait_ms = 0 writes each submission on its own request thread.
+SUBMIT_CONFIG = {
+    "max_batch": int(os.environ.get('SUBMIT_MAX_BATCH', 200)),
+    "max_wait_ms": float(os.environ.get('SUBMIT_MAX_WAIT_MS', 5)),
+    "timeout": float(os.environ.get('SUBMIT_TIMEOUT', 10)),
+}
+
+# Changes feed (/api/changes/<entity>): rows modified since a cursor, plus
+# tombstones for deleted rows. Rows updated in the last settle_seconds are
+# held back until writes still in flight have committed; tombstones are kept
+# tombstone_days, after which an older cursor must resync from scratch.
+CHANGES_CONFIG = {
+    "settle_seconds": int(os.environ.get('CHANGES_SETTLE_SECONDS', 2)),
+    "tombstone_days": int(os.environ.get('CHANGES_TOMBSTONE_DAYS', 30)),
+}
+
+# Application status events streamed to browsers (events.py, /api/events).
+# 'memory' keeps the recent events per process, so only streams served by the
+# worker that made a change see it; 'sqlite' shares them through one file on
+# the host, for running several workers. Each worker serves at most
+# max_streams streams; each sends a heartbeat comment every heartbeat seconds
+# and is closed after max_stream_seconds (browsers reconnect and resume).
+EVENTS_CONFIG = {
+    "backend": os.environ.get('EVENTS_BACKEND', 'memory'),
+    "path": os.environ.get('EVENTS_PATH', os.path.join(tempfile.gettempdir(), 'internship_events.sqlite3')),
+    "retention": int(os.environ.get('EVENTS_RETENTION', 10000)),  # events kept for Last-Event-ID resumes
+    "max_streams": int(os.environ.get('EVENTS_MAX_STREAMS', 100)),
+    "queue_size": int(os.environ.get('EVENTS_QUEUE_SIZE', 500)),  # undelivered events before a stream is dropped
+    "heartbeat": float(os.environ.get('EVENTS_HEARTBEAT', 15)),
+    "poll_interval": float(os.environ.get('EVENTS_POLL_INTERVAL', 0.5)),  # sqlite backend
+    "max_stream_seconds": float(os.environ.get('EVENTS_MAX_STREAM_SECONDS', 600)),
+    "retry_ms": int(os.environ.get('EVENTS_RETRY_MS', 3000)),  # browser reconnect delay
+}
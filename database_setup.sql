@@ -15,6 +15,24 @@ COLLATE utf8mb4_unicode_ci;
 
 USE internship_db;
 
+-- ============================================
+-- Users Table (Authentication)
+-- ============================================
+CREATE TABLE IF NOT EXISTS users (
+  id INT AUTO_INCREMENT PRIMARY KEY,
+  username VARCHAR(150) UNIQUE NOT NULL,
+  password_hash VARCHAR(255) NOT NULL,
+  email VARCHAR(255) NOT NULL,
+  role VARCHAR(50) DEFAULT 'student',
+  reset_token VARCHAR(255),
+  reset_token_expires TIMESTAMP NULL,
+  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  INDEX idx_username (username),
+  INDEX idx_email (email),
+  INDEX idx_role (role)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
 -- ============================================
 -- Students Table
 -- ============================================
@@ -24,9 +42,13 @@ CREATE TABLE IF NOT EXISTS students (
   email VARCHAR(255) UNIQUE,
   phone VARCHAR(50),
   branch VARCHAR(120),
+  user_id INT NULL,
   created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
   updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-  INDEX idx_email (email)
+  INDEX idx_email (email),
+  INDEX idx_updated_at (updated_at),
+  UNIQUE KEY uq_user (user_id),
+  CONSTRAINT fk_students_user FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE SET NULL
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- ============================================
@@ -38,9 +60,14 @@ CREATE TABLE IF NOT EXISTS companies (
   contact_person VARCHAR(255),
   email VARCHAR(255) UNIQUE,
   phone VARCHAR(50),
+  user_id INT NULL,
   created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
   updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-  INDEX idx_email (email)
+  INDEX idx_email (email),
+  INDEX idx_updated_at (updated_at),
+  UNIQUE KEY uq_user (user_id),
+  FULLTEXT INDEX ft_name (name),
+  CONSTRAINT fk_companies_user FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE SET NULL
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- ============================================
@@ -59,7 +86,10 @@ CREATE TABLE IF NOT EXISTS internships (
   updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
   FOREIGN KEY (company_id) REFERENCES companies(id) ON DELETE SET NULL ON UPDATE CASCADE,
   INDEX idx_company_id (company_id),
-  INDEX idx_start_date (start_date)
+  INDEX idx_start_date (start_date),
+  INDEX idx_updated_at (updated_at),
+  FULLTEXT INDEX ft_title (title),
+  FULLTEXT INDEX ft_title_description (title, description)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- ============================================
@@ -77,27 +107,93 @@ CREATE TABLE IF NOT EXISTS applications (
   INDEX idx_student_id (student_id),
   INDEX idx_internship_id (internship_id),
   INDEX idx_status (status),
+  INDEX idx_updated_at (updated_at),
+  INDEX idx_applied_at (applied_at),
+  INDEX idx_status_applied (status, applied_at),
+  INDEX idx_internship_applied (internship_id, applied_at),
+  INDEX idx_student_applied (student_id, applied_at),
   UNIQUE KEY unique_application (student_id, internship_id)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- ============================================
--- Users Table (Authentication)
+-- Internship Stats (per-internship application counters)
+-- ============================================
+-- Kept up to date by models.py in the same transaction as every application
+-- insert, status change and delete; rebuild with: python reconcile_stats.py
+CREATE TABLE IF NOT EXISTS internship_stats (
+  internship_id INT PRIMARY KEY,
+  total INT NOT NULL DEFAULT 0,
+  applied INT NOT NULL DEFAULT 0,
+  shortlisted INT NOT NULL DEFAULT 0,
+  selected INT NOT NULL DEFAULT 0,
+  rejected INT NOT NULL DEFAULT 0,
+  seats_remaining INT NOT NULL DEFAULT 0,
+  updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  CONSTRAINT fk_internship_stats_internship FOREIGN KEY (internship_id) REFERENCES internships(id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
 -- ============================================
-CREATE TABLE IF NOT EXISTS users (
-  id INT AUTO_INCREMENT PRIMARY KEY,
-  username VARCHAR(150) UNIQUE NOT NULL,
-  password_hash VARCHAR(255) NOT NULL,
-  email VARCHAR(255) NOT NULL,
-  role VARCHAR(50) DEFAULT 'student',
-  reset_token VARCHAR(255),
-  reset_token_expires TIMESTAMP NULL,
+-- Tombstones (deleted rows, for the changes feed)
+-- ============================================
+-- models.py records one row per deleted student, company, internship and
+-- application (including applications removed by a cascade) so clients
+-- syncing through /api/changes/<entity> can drop them. Rows older than
+-- CHANGES_CONFIG['tombstone_days'] are purged.
+CREATE TABLE IF NOT EXISTS tombstones (
+  id BIGINT AUTO_INCREMENT PRIMARY KEY,
+  entity VARCHAR(32) NOT NULL,
+  row_id INT NOT NULL,
+  deleted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  INDEX idx_entity_id (entity, id),
+  INDEX idx_deleted_at (deleted_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- ============================================
+-- Email Outbox (delivered by mailer.py's background dispatcher)
+-- ============================================
+CREATE TABLE IF NOT EXISTS email_outbox (
+  id BIGINT AUTO_INCREMENT PRIMARY KEY,
+  to_email VARCHAR(255) NOT NULL,
+  subject VARCHAR(255) NOT NULL,
+  body TEXT,
+  status VARCHAR(20) NOT NULL DEFAULT 'pending',
+  attempts INT NOT NULL DEFAULT 0,
+  next_attempt_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  claimed_by VARCHAR(64),
+  claimed_at TIMESTAMP NULL,
+  last_error VARCHAR(500),
   created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-  updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-  INDEX idx_username (username),
-  INDEX idx_email (email),
-  INDEX idx_role (role)
+  sent_at TIMESTAMP NULL,
+  INDEX idx_status_next (status, next_attempt_at),
+  INDEX idx_claimed_by (claimed_by)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
+-- ============================================
+-- Upgrading an existing database
+-- ============================================
+-- The CREATE TABLE statements above do not change tables that already exist.
+-- Run these once on a database created before internship search and the
+-- application filters were added:
+-- ALTER TABLE internships ADD FULLTEXT INDEX ft_title (title), ADD FULLTEXT INDEX ft_title_description (title, description);
+-- ALTER TABLE companies ADD FULLTEXT INDEX ft_name (name);
+-- ALTER TABLE applications ADD INDEX idx_applied_at (applied_at), ADD INDEX idx_status_applied (status, applied_at),
+--   ADD INDEX idx_internship_applied (internship_id, applied_at), ADD INDEX idx_student_applied (student_id, applied_at);
+-- Student and company accounts are linked to their login by users.id; add the
+-- columns, then backfill them in small batches with: python migrate_user_ids.py
+-- (or let it add the columns too: python migrate_user_ids.py --add-columns)
+-- ALTER TABLE students ADD COLUMN user_id INT NULL, ADD UNIQUE KEY uq_user (user_id),
+--   ADD CONSTRAINT fk_students_user FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE SET NULL;
+-- ALTER TABLE companies ADD COLUMN user_id INT NULL, ADD UNIQUE KEY uq_user (user_id),
+--   ADD CONSTRAINT fk_companies_user FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE SET NULL;
+-- The internship_stats table is created by the CREATE TABLE above; fill it from
+-- the existing applications once with: python reconcile_stats.py
+-- The changes feed reads rows by updated_at; the tombstones table is created
+-- by the CREATE TABLE above:
+-- ALTER TABLE students ADD INDEX idx_updated_at (updated_at);
+-- ALTER TABLE companies ADD INDEX idx_updated_at (updated_at);
+-- ALTER TABLE internships ADD INDEX idx_updated_at (updated_at);
+-- ALTER TABLE applications ADD INDEX idx_updated_at (updated_at);
+
 -- ============================================
 -- Sample Data (Optional - for testing)
 -- ============================================
@@ -0,0 +1,338 @@
+"""
+Synthetic data generator and bulk loader.
+
+Usage:
+    python datagen.py --scale 0.1                       # multi-row INSERTs into the configured database
+    python datagen.py --students 500000 --applications 5000000 --mode infile
+    python datagen.py --scale 1 --mode files --out-dir /tmp/internship-data
+
+Generates users (one login per student and company, linked through
+students.user_id / companies.user_id the way register() links them),
+companies, students, internships and applications.
+The data is referentially consistent and reproducible for a given --seed:
+- company size and internship popularity follow a Zipf distribution, so a few
+  postings get most applications;
+- applications per student are skewed (most apply a few times, some a lot),
+  and each (student, internship) pair occurs at most once (unique_application);
+- statuses and branches follow fixed weights.
+
+Rows are generated lazily and streamed into MySQL:
+- insert: batched multi-row INSERTs (default);
+- infile: writes TSV files to --out-dir and loads each with LOAD DATA LOCAL
+  INFILE (needs local_infile=ON on the server), the fastest option;
+- files: only writes the TSV files.
+
+New ids continue after the current maximum id of each table, so the tool can
+also top up a database that already has data; internship_stats is recounted
+after loading. Every generated login uses the same password (--password),
+because hashing one scrypt password per user would make loading millions of
+users take hours.
+"""
+import argparse
+import bisect
+import datetime
+import itertools
+import os
+import random
+import tempfile
+import time
+
+FULL_SCALE = {'companies': 10000, 'students': 200000, 'internships': 50000, 'applications': 2000000}
+DEFAULT_BATCH_SIZE = 5000
+DEFAULT_PASSWORD = 'password123'
+
+FIRST_NAMES = ('Aarav', 'Aditi', 'Aman', 'Ananya', 'Arjun', 'Diya', 'Ishaan', 'Kavya', 'Krishna', 'Meera',
+               'Neha', 'Nikhil', 'Pooja', 'Priya', 'Rahul', 'Raj', 'Riya', 'Rohan', 'Sana', 'Sneha',
+               'Tanvi', 'Varun', 'Vihaan', 'Yash', 'Zara')
+LAST_NAMES = ('Agarwal', 'Bose', 'Chopra', 'Das', 'Gupta', 'Iyer', 'Jain', 'Kapoor', 'Khan', 'Kumar',
+              'Mehta', 'Menon', 'Nair', 'Patel', 'Rao', 'Reddy', 'Shah', 'Sharma', 'Singh', 'Verma')
+COMPANY_PREFIXES = ('Acme', 'Apex', 'Blue', 'Bright', 'Cloud', 'Core', 'Delta', 'Green', 'Hyper', 'Infini',
+                    'Nova', 'Orbit', 'Prime', 'Quantum', 'Sigma', 'Swift', 'Terra', 'Vertex', 'Zen', 'Zeta')
+COMPANY_SUFFIXES = ('Labs', 'Systems', 'Solutions', 'Technologies', 'Analytics', 'Networks', 'Software',
+                    'Dynamics', 'Works', 'Innovations')
+ROLES = (('Backend Development', 'Build REST APIs and services with Python, Flask and MySQL.'),
+         ('Frontend Development', 'Create responsive user interfaces with JavaScript and React.'),
+         ('Data Science', 'Analyze datasets and build machine learning models with Pandas and scikit-learn.'),
+         ('Cloud Engineering', 'Automate infrastructure and deployments on AWS and Kubernetes.'),
+         ('Mobile App Development', 'Ship Android and iOS features using React Native.'),
+         ('Cyber Security', 'Assess applications for vulnerabilities and harden systems.'),
+         ('Embedded Systems', 'Program microcontrollers and test firmware in C.'),
+         ('UI/UX Design', 'Design wireframes, prototypes and usability studies.'),
+         ('Quality Assurance', 'Write automated test suites and track down regressions.'),
+         ('Digital Marketing', 'Plan campaigns and measure engagement across channels.'))
+BRANCHES = (('CSE', 40), ('IT', 25), ('ECE', 15), ('EEE', 8), ('MECH', 7), ('CIVIL', 5))
+STATUSES = (('Applied', 45), ('Under Review', 22), ('Interview Scheduled', 12), ('Rejected', 16), ('Selected', 5))
+CITIES = ('Bengaluru', 'Pune', 'Hyderabad', 'Chennai', 'Mumbai', 'Delhi', 'Noida', 'Gurugram', 'Kolkata', 'Remote')
+
+TABLES = (
+    ('users', ('id', 'username', 'password_hash', 'email', 'role')),
+    ('companies', ('id', 'name', 'contact_person', 'email', 'phone', 'user_id')),
+    ('students', ('id', 'name', 'email', 'phone', 'branch', 'user_id')),
+    ('internships', ('id', 'title', 'company_id', 'start_date', 'end_date', 'stipend', 'seats', 'description')),
+    ('applications', ('student_id', 'internship_id', 'status', 'applied_at')),
+)
+
+
+def _cumulative(weights):
+    total, out = 0, []
+    for w in weights:
+        total += w
+        out.append(total)
+    return out
+
+
+def _zipf_cumulative(n, exponent=1.1):
+    return _cumulative(1.0 / (rank ** exponent) for rank in range(1, n + 1))
+
+
+def _pick(rng, cumulative):
+    return bisect.bisect_left(cumulative, rng.random() * cumulative[-1])
+
+
+def _weighted(rng, choices, cumulative):
+    return choices[_pick(rng, cumulative)][0]
+
+
+class DataGenerator(object):
+    """Yields rows for each table; ids start after `offsets[table]`."""
+
+    def __init__(self, counts, seed=42, offsets=None, password_hash='', until=datetime.date(2025, 6, 30)):
+        self.counts = counts
+        self.seed = seed
+        self.offsets = offsets or {}
+        self.password_hash = password_hash
+        self.until = until
+        self.generated = {}
+
+    def _rng(self, table):
+        # one independent stream per table keeps each table reproducible on its own
+        return random.Random(f'{self.seed}:{table}')
+
+    def _ids(self, table):
+        start = self.offsets.get(table, 0) + 1
+        return range(start, start + self.counts[table])
+
+    def _user_id(self, table, i):
+        # student logins come first, then company logins
+        base = self.offsets.get('users', 0) + i - self.offsets.get(table, 0)
+        return base if table == 'students' else base + self.counts['students']
+
+    def _email(self, table, i):
+        return f'student{i}@college.example' if table == 'students' else f'hr{i}@company{i}.example'
+
+    def companies(self):
+        rng = self._rng('companies')
+        for i in self._ids('companies'):
+            name = f'{rng.choice(COMPANY_PREFIXES)} {rng.choice(COMPANY_SUFFIXES)} {i}'
+            contact = f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}'
+            yield (i, name, contact, self._email('companies', i), f'+91-9{rng.randrange(10 ** 9):09d}',
+                   self._user_id('companies', i))
+
+    def students(self):
+        rng = self._rng('students')
+        branch_cdf = _cumulative(w for _, w in BRANCHES)
+        for i in self._ids('students'):
+            name = f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}'
+            yield (i, name, self._email('students', i), f'+91-8{rng.randrange(10 ** 9):09d}',
+                   _weighted(rng, BRANCHES, branch_cdf), self._user_id('students', i))
+
+    def internships(self):
+        rng = self._rng('internships')
+        companies = list(self._ids('companies'))
+        rng.shuffle(companies)  # which companies are the big ones is random
+        company_cdf = _zipf_cumulative(len(companies))
+        for i in self._ids('internships'):
+            role, summary = rng.choice(ROLES)
+            start = self.until + datetime.timedelta(days=rng.randrange(0, 180))
+            end = start + datetime.timedelta(weeks=rng.choice((8, 12, 16, 24)))
+            stipend = f'{rng.randrange(5, 51) * 1000} INR/month' if rng.random() < 0.85 else 'Unpaid'
+            seats = min(50, 1 + int(rng.expovariate(1 / 4.0)))
+            description = f'{summary} Location: {rng.choice(CITIES)}. Duration: {(end - start).days // 7} weeks.'
+            yield (i, f'{role} Intern', companies[_pick(rng, company_cdf)], start, end, stipend, seats, description)
+
+    def users(self):
+        for table, role in (('students', 'student'), ('companies', 'company')):
+            for i in self._ids(table):
+                yield (self._user_id(table, i), f'{role}{i}', self.password_hash, self._email(table, i), role)
+
+    def applications(self):
+        """Skewed applications, at most one per (student, internship), about counts['applications'] in total."""
+        rng = self._rng('applications')
+        internships = list(self._ids('internships'))
+        if not internships or not self.counts['students']:
+            return
+        rng.shuffle(internships)  # which postings are popular is random
+        popularity = _zipf_cumulative(len(internships), 0.9)
+        status_cdf = _cumulative(w for _, w in STATUSES)
+        mean = max(1.0, self.counts['applications'] / float(self.counts['students']))
+        cap = min(len(internships), int(mean * 10) + 1)
+        window = 365 * 86400
+        until = datetime.datetime.combine(self.until, datetime.time())
+        remaining = self.counts['applications']
+        for sid in self._ids('students'):
+            if remaining <= 0:
+                break
+            # exponential around the mean: most students apply a few times, a few apply a lot
+            k = min(cap, remaining, max(1, int(round(rng.expovariate(1.0 / mean)))))
+            chosen = set()
+            tries = 0
+            while len(chosen) < k and tries < k * 20:
+                chosen.add(internships[_pick(rng, popularity)])
+                tries += 1
+            for iid in chosen:
+                applied_at = until - datetime.timedelta(seconds=rng.randrange(window))
+                yield (sid, iid, _weighted(rng, STATUSES, status_cdf), applied_at)
+            remaining -= len(chosen)
+
+    def rows(self, table):
+        return getattr(self, table)()
+
+
+class InsertSink(object):
+    """Streams rows with batched multi-row INSERTs, one commit per batch."""
+
+    def __init__(self, conn, batch_size=DEFAULT_BATCH_SIZE):
+        self.conn = conn
+        self.batch_size = batch_size
+
+    def load(self, table, columns, rows):
+        cur = self.conn.cursor()
+        sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})"
+        total = 0
+        while True:
+            batch = list(itertools.islice(rows, self.batch_size))
+            if not batch:
+                break
+            # executemany() rewrites a plain INSERT ... VALUES into one multi-row statement
+            cur.executemany(sql, batch)
+            self.conn.commit()
+            total += len(batch)
+        cur.close()
+        return total
+
+
+def _tsv_field(value):
+    if value is None:
+        return '\\N'
+    return str(value).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n')
+
+
+class InfileSink(object):
+    """Writes each table to a TSV file and (optionally) LOAD DATA LOCAL INFILEs it."""
+
+    def __init__(self, conn, out_dir, load=True):
+        self.conn = conn
+        self.out_dir = out_dir
+        self.load_files = load
+        os.makedirs(out_dir, exist_ok=True)
+
+    def load(self, table, columns, rows):
+        path = os.path.join(self.out_dir, f'{table}.tsv')
+        total = 0
+        with open(path, 'w', encoding='utf-8', newline='\n') as f:
+            for row in rows:
+                f.write('\t'.join(_tsv_field(v) for v in row) + '\n')
+                total += 1
+        if self.load_files:
+            cur = self.conn.cursor()
+            cur.execute(f"LOAD DATA LOCAL INFILE %s INTO TABLE {table} CHARACTER SET utf8mb4 "
+                        f"FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' LINES TERMINATED BY '\\n' "
+                        f"({', '.join(columns)})", (os.path.abspath(path),))
+            self.conn.commit()
+            cur.close()
+        return total
+
+
+def _connect(mode):
+    import mysql.connector
+    from config import DB_CONFIG
+    options = dict(DB_CONFIG)
+    if mode == 'infile':
+        options['allow_local_infile'] = True
+    conn = mysql.connector.connect(**options)
+    cur = conn.cursor()
+    cur.execute("SET NAMES 'utf8mb4' COLLATE 'utf8mb4_unicode_ci'")
+    cur.close()
+    return conn
+
+
+def current_offsets(conn):
+    cur = conn.cursor()
+    offsets = {}
+    for table in ('users', 'companies', 'students', 'internships'):
+        cur.execute(f'SELECT COALESCE(MAX(id), 0) FROM {table}')
+        offsets[table] = int(cur.fetchone()[0])
+    cur.close()
+    return offsets
+
+
+def generate(counts, seed=42, mode='insert', out_dir=None, password=DEFAULT_PASSWORD,
+             batch_size=DEFAULT_BATCH_SIZE, conn=None, verbose=True):
+    """Generate and load `counts` rows per table; returns {table: rows written}."""
+    from werkzeug.security import generate_password_hash
+
+    own_conn = conn is None and mode != 'files'
+    if own_conn:
+        conn = _connect(mode)
+    offsets = current_offsets(conn) if conn is not None else {}
+    counts = dict(counts)
+    gen = DataGenerator(counts, seed, offsets, generate_password_hash(password))
+    if mode == 'insert':
+        sink = InsertSink(conn, batch_size)
+    else:
+        sink = InfileSink(conn, out_dir or os.path.join(tempfile.gettempdir(), 'internship_datagen'),
+                          load=(mode == 'infile'))
+    written = {}
+    try:
+        if conn is not None:
+            cur = conn.cursor()
+            # ids are generated consistent with each other, so skip the per-row FK lookups
+            cur.execute('SET SESSION foreign_key_checks = 0')
+            cur.close()
+        for table, columns in TABLES:
+            start = time.time()
+            written[table] = sink.load(table, columns, gen.rows(table))
+            elapsed = time.time() - start
+            if verbose:
+                rate = written[table] / elapsed if elapsed > 0 else 0
+                print(f"{table:14s} {written[table]:>10d} rows in {elapsed:7.1f}s ({rate:,.0f} rows/s)")
+    finally:
+        if conn is not None:
+            cur = conn.cursor()
+            cur.execute('SET SESSION foreign_key_checks = 1')
+            cur.close()
+        if own_conn:
+            conn.close()
+    if mode != 'files':
+        import models
+        # applications were loaded behind the counters' back
+        start = time.time()
+        models.reconcile_internship_stats(fix=True)
+        if verbose:
+            print(f"internship_stats rebuilt in {time.time() - start:.1f}s")
+        models.bump_catalog_version(*models.VERSIONED_TABLES)
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate and bulk-load synthetic internship data')
+    parser.add_argument('--scale', type=float, default=0.01,
+                        help='fraction of 10k companies / 200k students / 50k internships / 2M applications')
+    for table in FULL_SCALE:
+        parser.add_argument(f'--{table}', type=int, help=f'number of {table} (overrides --scale)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--mode', choices=['insert', 'infile', 'files'], default='insert')
+    parser.add_argument('--out-dir', help='where infile/files mode writes its TSV files')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='rows per INSERT (default %(default)s)')
+    parser.add_argument('--password', default=DEFAULT_PASSWORD, help='password for every generated login')
+    args = parser.parse_args()
+
+    counts = {t: getattr(args, t) if getattr(args, t) is not None else max(1, int(n * args.scale))
+              for t, n in FULL_SCALE.items()}
+    start = time.time()
+    written = generate(counts, args.seed, args.mode, args.out_dir, args.password, args.batch_size)
+    print(f"[SUCCESS] Generated {sum(written.values())} rows in {time.time() - start:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
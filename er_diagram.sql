@@ -10,6 +10,22 @@ CREATE DATABASE IF NOT EXISTS internship_db
 
 USE internship_db;
 
+-- Users (authentication)
+CREATE TABLE IF NOT EXISTS users (
+  id INT AUTO_INCREMENT PRIMARY KEY,
+  username VARCHAR(150) UNIQUE NOT NULL,
+  password_hash VARCHAR(255) NOT NULL,
+  email VARCHAR(255) NOT NULL,
+  role VARCHAR(50) DEFAULT 'student',
+  reset_token VARCHAR(255),
+  reset_token_expires TIMESTAMP NULL,
+  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  INDEX idx_username (username),
+  INDEX idx_email (email),
+  INDEX idx_role (role)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
 -- Students
 CREATE TABLE IF NOT EXISTS students (
   id INT AUTO_INCREMENT PRIMARY KEY,
@@ -17,9 +33,15 @@ CREATE TABLE IF NOT EXISTS students (
   email VARCHAR(255) UNIQUE,
   phone VARCHAR(50),
   branch VARCHAR(120),
+  user_id INT NULL,
   created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
   updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-  INDEX idx_email (email)
+  INDEX idx_email (email),
+  INDEX idx_updated_at (updated_at),
+  UNIQUE KEY uq_user (user_id),
+  CONSTRAINT fk_students_user
+    FOREIGN KEY (user_id) REFERENCES users(id)
+    ON DELETE SET NULL
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- Companies
@@ -29,9 +51,15 @@ CREATE TABLE IF NOT EXISTS companies (
   contact_person VARCHAR(255),
   email VARCHAR(255) UNIQUE,
   phone VARCHAR(50),
+  user_id INT NULL,
   created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
   updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-  INDEX idx_email (email)
+  INDEX idx_email (email),
+  INDEX idx_updated_at (updated_at),
+  UNIQUE KEY uq_user (user_id),
+  CONSTRAINT fk_companies_user
+    FOREIGN KEY (user_id) REFERENCES users(id)
+    ON DELETE SET NULL
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- Internships
@@ -48,6 +76,7 @@ CREATE TABLE IF NOT EXISTS internships (
   updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
   INDEX idx_company_id (company_id),
   INDEX idx_start_date (start_date),
+  INDEX idx_updated_at (updated_at),
   CONSTRAINT fk_internships_company
     FOREIGN KEY (company_id) REFERENCES companies(id)
     ON DELETE SET NULL ON UPDATE CASCADE
@@ -64,6 +93,7 @@ CREATE TABLE IF NOT EXISTS applications (
   INDEX idx_student_id (student_id),
   INDEX idx_internship_id (internship_id),
   INDEX idx_status (status),
+  INDEX idx_updated_at (updated_at),
   CONSTRAINT uq_application UNIQUE (student_id, internship_id),
   CONSTRAINT fk_applications_student
     FOREIGN KEY (student_id) REFERENCES students(id)
@@ -73,18 +103,45 @@ CREATE TABLE IF NOT EXISTS applications (
     ON DELETE CASCADE ON UPDATE CASCADE
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
--- Users (authentication)
-CREATE TABLE IF NOT EXISTS users (
-  id INT AUTO_INCREMENT PRIMARY KEY,
-  username VARCHAR(150) UNIQUE NOT NULL,
-  password_hash VARCHAR(255) NOT NULL,
-  email VARCHAR(255) NOT NULL,
-  role VARCHAR(50) DEFAULT 'student',
-  reset_token VARCHAR(255),
-  reset_token_expires TIMESTAMP NULL,
-  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+-- Internship stats (application counters per internship)
+CREATE TABLE IF NOT EXISTS internship_stats (
+  internship_id INT PRIMARY KEY,
+  total INT NOT NULL DEFAULT 0,
+  applied INT NOT NULL DEFAULT 0,
+  shortlisted INT NOT NULL DEFAULT 0,
+  selected INT NOT NULL DEFAULT 0,
+  rejected INT NOT NULL DEFAULT 0,
+  seats_remaining INT NOT NULL DEFAULT 0,
   updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-  INDEX idx_username (username),
-  INDEX idx_email (email),
-  INDEX idx_role (role)
+  CONSTRAINT fk_internship_stats_internship
+    FOREIGN KEY (internship_id) REFERENCES internships(id)
+    ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Tombstones (deleted rows, read by the changes feed)
+CREATE TABLE IF NOT EXISTS tombstones (
+  id BIGINT AUTO_INCREMENT PRIMARY KEY,
+  entity VARCHAR(32) NOT NULL,
+  row_id INT NOT NULL,
+  deleted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  INDEX idx_entity_id (entity, id),
+  INDEX idx_deleted_at (deleted_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Email outbox (queued notifications, drained by the mailer)
+CREATE TABLE IF NOT EXISTS email_outbox (
+  id BIGINT AUTO_INCREMENT PRIMARY KEY,
+  to_email VARCHAR(255) NOT NULL,
+  subject VARCHAR(255) NOT NULL,
+  body TEXT,
+  status VARCHAR(20) NOT NULL DEFAULT 'pending',
+  attempts INT NOT NULL DEFAULT 0,
+  next_attempt_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  claimed_by VARCHAR(64),
+  claimed_at TIMESTAMP NULL,
+  last_error VARCHAR(500),
+  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  sent_at TIMESTAMP NULL,
+  INDEX idx_status_next (status, next_attempt_at),
+  INDEX idx_claimed_by (claimed_by)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
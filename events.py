@@ -0,0 +1,366 @@
+"""
+Application status events, pushed to browsers over Server-Sent Events.
+
+models publishes an event after every committed write that creates an
+application or changes its status, and /api/events streams the ones the
+logged-in student or company may see, so dashboards no longer poll.
+Events are kept in a short log so a reconnecting client can resume from its
+Last-Event-ID. Two interchangeable logs share the same small interface
+(append / after / oldest / epoch / stats):
+
+- MemoryLog: an in-process ring buffer. Only streams served by the worker
+  process that made the change see an event.
+- SQLiteLog: a SQLite file shared by every worker process on the host. Each
+  worker's poller thread reads new events from it and fans them out to its
+  own streams, so a change made in any worker reaches every stream, and
+  event ids mean the same thing in every worker.
+
+epoch() identifies the log itself: an event id from another log (e.g. before
+a restart of the memory log) can't be resumed from and gets a 'reset' event,
+telling the client to reload instead.
+"""
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from collections import deque
+
+from config import EVENTS_CONFIG
+
+
+class TooManyStreams(Exception):
+    """Raised when this worker already serves its maximum number of event streams."""
+    pass
+
+
+class MemoryLog(object):
+    shared = False
+
+    def __init__(self, retention=10000):
+        self.retention = max(1, int(retention))
+        self._events = deque(maxlen=self.retention)
+        self._next_id = 1
+        self._epoch = random.getrandbits(48)
+        self._lock = threading.Lock()
+
+    def append(self, event):
+        with self._lock:
+            event_id = self._next_id
+            self._next_id += 1
+            self._events.append((event_id, event))
+            return event_id
+
+    def after(self, last_id, limit=500):
+        with self._lock:
+            return [e for e in self._events if e[0] > last_id][:limit]
+
+    def last_id(self):
+        with self._lock:
+            return self._next_id - 1
+
+    def oldest(self):
+        with self._lock:
+            return self._events[0][0] if self._events else self._next_id
+
+    def epoch(self):
+        return self._epoch
+
+    def stats(self):
+        with self._lock:
+            return {'backend': 'memory', 'events': len(self._events), 'last_id': self._next_id - 1}
+
+
+class SQLiteLog(object):
+    shared = True
+
+    def __init__(self, path, retention=10000):
+        self.path = path
+        self.retention = max(1, int(retention))
+        self._local = threading.local()
+        self._appends = 0
+        self._lock = threading.Lock()
+        self._conn().executescript("""
+            CREATE TABLE IF NOT EXISTS events (id INTEGER PRIMARY KEY AUTOINCREMENT, data TEXT NOT NULL, at REAL);
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+        """)
+        self._conn().execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('epoch', ?)", (random.getrandbits(48),))
+        self._epoch = self._conn().execute("SELECT value FROM meta WHERE key = 'epoch'").fetchone()[0]
+
+    def _conn(self):
+        # sqlite connections are per thread, and must not survive a fork
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def append(self, event):
+        conn = self._conn()
+        event_id = conn.execute('INSERT INTO events (data, at) VALUES (?, ?)',
+                                (json.dumps(event), time.time())).lastrowid
+        with self._lock:
+            self._appends += 1
+            prune = self._appends % 100 == 0
+        if prune:
+            conn.execute('DELETE FROM events WHERE id <= ?', (event_id - self.retention,))
+        return event_id
+
+    def after(self, last_id, limit=500):
+        rows = self._conn().execute('SELECT id, data FROM events WHERE id > ? ORDER BY id LIMIT ?',
+                                    (last_id, limit)).fetchall()
+        return [(r[0], json.loads(r[1])) for r in rows]
+
+    def last_id(self):
+        return self._conn().execute('SELECT COALESCE(MAX(id), 0) FROM events').fetchone()[0]
+
+    def oldest(self):
+        row = self._conn().execute('SELECT MIN(id) FROM events').fetchone()
+        return row[0] if row[0] is not None else self.last_id() + 1
+
+    def epoch(self):
+        return self._epoch
+
+    def stats(self):
+        count, last = self._conn().execute('SELECT COUNT(*), COALESCE(MAX(id), 0) FROM events').fetchone()
+        return {'backend': 'sqlite', 'events': count, 'last_id': last}
+
+
+def make_log(config):
+    """Build an event log from a config dict: {'backend': 'memory'|'sqlite', 'retention', 'path'}."""
+    backend = config.get('backend', 'memory')
+    if backend == 'memory':
+        return MemoryLog(config.get('retention', 10000))
+    if backend == 'sqlite':
+        return SQLiteLog(config['path'], config.get('retention', 10000))
+    raise ValueError(f'Unknown events backend: {backend}')
+
+
+class Subscription(object):
+    """One open stream: the events matching `scope`, in id order."""
+
+    def __init__(self, broker, scope, queue_size):
+        self.broker = broker
+        self.scope = scope
+        self.queue_size = queue_size
+        self.overflowed = False
+        self.closed = False
+        self.last_id = 0
+        self._events = deque()
+        self._cond = threading.Condition()
+
+    def matches(self, event):
+        return all(event.get(k) == v for k, v in (self.scope or {}).items())
+
+    def put(self, event_id, event):
+        with self._cond:
+            if len(self._events) >= self.queue_size:
+                # a stalled client; close the stream and let it resume from its Last-Event-ID
+                self.overflowed = True
+            else:
+                self._events.append((event_id, event))
+            self._cond.notify()
+
+    def get(self, timeout):
+        """The next (id, event), or None after `timeout` seconds without one."""
+        with self._cond:
+            while True:
+                while self._events:
+                    event_id, event = self._events.popleft()
+                    # replayed and live delivery may overlap; ids only go up
+                    if event_id > self.last_id:
+                        self.last_id = event_id
+                        return event_id, event
+                if self.overflowed or not self._cond.wait(timeout):
+                    return None
+
+    def close(self):
+        """Free the stream's slot; safe to call more than once."""
+        with self._cond:
+            if self.closed:
+                return
+            self.closed = True
+        self.broker._unsubscribe(self)
+
+
+class Broker(object):
+    def __init__(self, log, max_streams=100, queue_size=500, poll_interval=0.5):
+        self.log = log
+        self.max_streams = int(max_streams)
+        self.queue_size = max(1, int(queue_size))
+        self.poll_interval = float(poll_interval)
+        self._subs = set()
+        self._lock = threading.Lock()
+        self._publish_lock = threading.Lock()
+        self._poller = None
+        self._poller_pid = None
+        self._cursor = 0
+        self.published = 0
+        self.delivered = 0
+        self.rejected = 0
+
+    def event_id(self, n):
+        return f'{self.log.epoch()}-{n}'
+
+    def parse_id(self, value):
+        """The numeric part of a Last-Event-ID from this log, else None."""
+        try:
+            epoch, n = (value or '').rsplit('-', 1)
+            return int(n) if int(epoch) == self.log.epoch() else None
+        except ValueError:
+            return None
+
+    def publish(self, event):
+        if self.log.shared:
+            # the poller fans it out, in every worker including this one
+            self.log.append(event)
+        else:
+            # one publisher at a time, so streams receive events in id order
+            with self._publish_lock:
+                self._dispatch([(self.log.append(event), event)])
+        with self._lock:
+            self.published += 1
+
+    def _dispatch(self, entries):
+        with self._lock:
+            subs = list(self._subs)
+        delivered = 0
+        for event_id, event in entries:
+            for sub in subs:
+                if sub.matches(event):
+                    sub.put(event_id, event)
+                    delivered += 1
+        with self._lock:
+            self.delivered += delivered
+
+    def _start_poller(self):
+        if self._poller_pid != os.getpid():
+            with self._lock:
+                if self._poller_pid != os.getpid():
+                    self._cursor = self.log.last_id()
+                    self._poller = threading.Thread(target=self._poll, name='events-poller', daemon=True)
+                    self._poller_pid = os.getpid()
+                    self._poller.start()
+
+    def _poll(self):
+        while True:
+            try:
+                entries = self.log.after(self._cursor)
+                if entries:
+                    self._cursor = entries[-1][0]
+                    self._dispatch(entries)
+                    continue
+            except Exception as e:
+                print(f"[WARNING] Event poller error: {e}")
+            time.sleep(self.poll_interval)
+
+    def subscribe(self, scope=None, last_event_id=None):
+        """Open a stream of events matching `scope` ({'student_id': 5}, or None for all).
+
+        With a Last-Event-ID the events after it are replayed first. Returns
+        (subscription, reset): reset is True when those events are no longer
+        available, so the client should reload rather than resume.
+        """
+        if self.log.shared:
+            self._start_poller()
+        sub = Subscription(self, scope, self.queue_size)
+        reset = False
+        # live events for this stream wait on sub's lock until the replay is queued
+        with sub._cond:
+            with self._lock:
+                if len(self._subs) >= self.max_streams:
+                    self.rejected += 1
+                    raise TooManyStreams('Too many open event streams')
+                self._subs.add(sub)
+            if last_event_id:
+                last = self.parse_id(last_event_id)
+                if last is None or last + 1 < self.log.oldest():
+                    reset = True
+                else:
+                    # registered first, so nothing published meanwhile is missed
+                    sub.last_id = last
+                    while True:
+                        entries = self.log.after(last)
+                        if not entries:
+                            break
+                        sub._events.extend(e for e in entries if sub.matches(e[1]))
+                        last = entries[-1][0]
+        return sub, reset
+
+    def _unsubscribe(self, sub):
+        with self._lock:
+            self._subs.discard(sub)
+
+    def stats(self):
+        out = self.log.stats()
+        with self._lock:
+            out.update({'streams': len(self._subs), 'max_streams': self.max_streams, 'published': self.published,
+                        'delivered': self.delivered, 'rejected': self.rejected})
+        return out
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            _broker = Broker(make_log(EVENTS_CONFIG), EVENTS_CONFIG['max_streams'], EVENTS_CONFIG['queue_size'],
+                             EVENTS_CONFIG['poll_interval'])
+        return _broker
+
+
+def publish(event):
+    """Send `event` (a JSON-able dict with a 'type') to every matching stream."""
+    get_broker().publish(event)
+
+
+def _format(event_id, name, data):
+    head = f'id: {event_id}\n' if event_id else ''
+    return f'{head}event: {name}\ndata: {json.dumps(data)}\n\n'
+
+
+def open_stream(scope=None, last_event_id=None):
+    """Subscribe and return (subscription, iterator of Server-Sent Events text).
+
+    Subscribes right away, so TooManyStreams is raised here rather than once
+    the response has started. The caller must also close the subscription
+    when the response is closed: a body that is never iterated (HEAD, a
+    client gone before the first byte) never reaches the iterator's cleanup. The iterator sends a comment every
+    `heartbeat` seconds (keeping proxies from timing out idle streams and
+    noticing clients that went away) and ends after max_stream_seconds or
+    when the client falls too far behind; browsers then reconnect with
+    Last-Event-ID.
+    """
+    broker = get_broker()
+    sub, reset = broker.subscribe(scope, last_event_id)
+    return sub, _stream(broker, sub, reset)
+
+
+def _stream(broker, sub, reset):
+    deadline = time.time() + EVENTS_CONFIG['max_stream_seconds']
+    try:
+        yield f"retry: {EVENTS_CONFIG['retry_ms']}\n\n"
+        if reset:
+            yield _format(broker.event_id(broker.log.last_id()), 'reset', {'type': 'reset'})
+        while time.time() < deadline:
+            item = sub.get(EVENTS_CONFIG['heartbeat'])
+            if item is None:
+                if sub.overflowed:
+                    break
+                yield ': heartbeat\n\n'
+                continue
+            event_id, event = item
+            yield _format(broker.event_id(event_id), event.get('type', 'message'), event)
+    finally:
+        sub.close()
+
+
+def stats():
+    return get_broker().stats()
@@ -0,0 +1,217 @@
+"""
+Password hashing off the request threads.
+
+werkzeug's scrypt hashes are deliberately expensive, so login and
+registration hand them to a small process pool instead of running them on
+the web worker. An admission limit bounds how much hashing can be queued:
+when it is full, callers wait at most `queue_timeout` seconds and then get
+HashingBusy, so the view can answer "try again" right away instead of tying
+up a worker. A hash that takes longer than `hash_timeout`, or a pool whose
+worker process died, also gives HashingBusy. LoginThrottle limits attempts per client IP and failed
+attempts per username so a brute-force flood cannot use up the hashing budget.
+"""
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+from werkzeug.security import generate_password_hash, check_password_hash
+
+import metrics
+from config import AUTH_CONFIG
+
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class HashingBusy(Exception):
+    """Raised when the hashing pool is saturated, too slow or being restarted."""
+    pass
+
+
+def verify_password(stored_hash, password):
+    """Verify a password against a stored hash using werkzeug.
+    All passwords are stored using werkzeug's generate_password_hash (scrypt).
+    """
+    if not stored_hash:
+        return False
+    try:
+        return check_password_hash(stored_hash, password)
+    except (ValueError, TypeError):
+        # If werkzeug cannot parse the hash, fail safely
+        return False
+
+
+class HashingPool(object):
+    def __init__(self, workers=2, max_pending=16, queue_timeout=2.0, hash_timeout=10.0):
+        self.workers = int(workers)
+        self.queue_timeout = float(queue_timeout)
+        self.hash_timeout = float(hash_timeout)
+        self.max_pending = max(1, int(max_pending))
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.restarts = 0
+        self.latency = metrics.Histogram(LATENCY_BUCKETS)
+
+    def _get_executor(self):
+        # created lazily, and again in a forked worker process
+        if self._executor is None or self._pid != os.getpid():
+            with self._lock:
+                if self._executor is None or self._pid != os.getpid():
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                    self._pid = os.getpid()
+        return self._executor
+
+    def _restart(self, executor):
+        # a worker process died (e.g. OOM killer): the executor is unusable from
+        # now on, so drop it and let the next call start a fresh one
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+                self.restarts += 1
+        executor.shutdown(wait=False)
+
+    def _finish(self, start):
+        self.latency.observe(time.time() - start)
+        with self._lock:
+            self.in_flight -= 1
+            self.completed += 1
+        self._slots.release()
+
+    def run(self, fn, *args):
+        """Run fn(*args) in the pool (inline when workers == 0) and return its result."""
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            with self._lock:
+                self.rejected += 1
+            raise HashingBusy('Password hashing is saturated')
+        start = time.time()
+        with self._lock:
+            self.in_flight += 1
+        if self.workers <= 0:
+            try:
+                return fn(*args)
+            finally:
+                self._finish(start)
+        executor = self._get_executor()
+        try:
+            future = executor.submit(fn, *args)
+        except BrokenProcessPool:
+            self._finish(start)
+            self._restart(executor)
+            raise HashingBusy('Password hashing is restarting')
+        except Exception:
+            self._finish(start)
+            raise
+        # the slot is held until the worker process is really done, even when
+        # this caller gives up waiting, so max_pending bounds the actual work
+        future.add_done_callback(lambda f: self._finish(start))
+        try:
+            return future.result(timeout=self.hash_timeout)
+        except FutureTimeout:
+            with self._lock:
+                self.timeouts += 1
+            raise HashingBusy('Password hashing is too slow right now')
+        except BrokenProcessPool:
+            self._restart(executor)
+            raise HashingBusy('Password hashing is restarting')
+
+    def stats(self):
+        latency = self.latency.snapshot()
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'max_pending': self.max_pending,
+                'in_flight': self.in_flight,
+                # tasks admitted but waiting for a free worker process
+                'queue_depth': max(0, self.in_flight - max(self.workers, 1)),
+                'completed': self.completed,
+                'rejected': self.rejected,
+                'timeouts': self.timeouts,
+                'restarts': self.restarts,
+                'latency_sum': round(latency['sum'], 6),
+                'latency_max': round(latency['max'], 6),
+                'latency_buckets': dict(zip([str(b) for b in LATENCY_BUCKETS] + ['+Inf'], latency['counts'])),
+            }
+
+
+class LoginThrottle(object):
+    """Sliding-window limits: all attempts per IP, failed attempts per username."""
+
+    def __init__(self, ip_limit=30, user_limit=10, window=60):
+        self.ip_limit = int(ip_limit)
+        self.user_limit = int(user_limit)
+        self.window = float(window)
+        self._ips = {}
+        self._users = {}
+        self._lock = threading.Lock()
+        self.throttled = 0
+
+    def _recent(self, table, key, now):
+        hits = table.get(key)
+        if hits is None:
+            return 0
+        while hits and hits[0] <= now - self.window:
+            hits.popleft()
+        if not hits:
+            del table[key]
+            return 0
+        return len(hits)
+
+    def _prune(self, now):
+        # keep memory bounded under floods of distinct keys
+        for table in (self._ips, self._users):
+            if len(table) > 10000:
+                for key in list(table):
+                    self._recent(table, key, now)
+
+    def allow(self, ip, username):
+        """Record a login attempt from `ip`; False if the IP or username is over its limit."""
+        now = time.time()
+        with self._lock:
+            self._prune(now)
+            if (self._recent(self._ips, ip, now) >= self.ip_limit
+                    or self._recent(self._users, username, now) >= self.user_limit):
+                self.throttled += 1
+                return False
+            self._ips.setdefault(ip, deque()).append(now)
+            return True
+
+    def record_failure(self, username):
+        with self._lock:
+            self._users.setdefault(username, deque()).append(time.time())
+
+    def reset(self, username):
+        with self._lock:
+            self._users.pop(username, None)
+
+    def stats(self):
+        with self._lock:
+            return {'throttled': self.throttled, 'tracked_ips': len(self._ips), 'tracked_users': len(self._users)}
+
+
+pool = HashingPool(AUTH_CONFIG['hash_workers'], AUTH_CONFIG['max_pending'],
+                   AUTH_CONFIG['queue_timeout'], AUTH_CONFIG['hash_timeout'])
+login_throttle = LoginThrottle(AUTH_CONFIG['ip_limit'], AUTH_CONFIG['user_limit'], AUTH_CONFIG['window'])
+
+
+def check_password(stored_hash, password):
+    """verify_password in the hashing pool; raises HashingBusy when saturated."""
+    return pool.run(verify_password, stored_hash, password)
+
+
+def hash_password(password):
+    """generate_password_hash in the hashing pool; raises HashingBusy when saturated."""
+    return pool.run(generate_password_hash, password)
+
+
+def stats():
+    out = pool.stats()
+    out.update(login_throttle.stats())
+    return out
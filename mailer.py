@@ -0,0 +1,284 @@
+"""
+Asynchronous email delivery.
+
+send_email() only writes a row to the email_outbox table, so a request never
+waits on the mail server. A background Dispatcher claims due rows in batches,
+delivers each batch over a single SMTP connection (several batches in
+parallel), and retries failures with exponential backoff.
+
+Usage:
+    python mailer.py dispatch            # run the dispatcher in the foreground
+    python mailer.py sink --port 8025    # local fake SMTP server for testing
+
+Point the app at the sink with MAIL_BACKEND=smtp SMTP_HOST=127.0.0.1 SMTP_PORT=8025.
+"""
+import argparse
+import smtplib
+import socketserver
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from email.mime.text import MIMEText
+
+import models
+from config import MAIL_CONFIG
+
+
+def send_email(to_email, subject, body):
+    """Queue an email for delivery.
+
+    Joins the caller's models.transaction() when there is one, so the mail is
+    only sent if the surrounding work commits.
+    """
+    models.enqueue_email(to_email, subject, body)
+    models.after_commit(get_dispatcher().wake)
+
+
+class ConsoleConnection(object):
+    """Stands in for an SMTP connection in demo mode: prints each message."""
+
+    def send_message(self, msg):
+        print(f"\nEmail would be sent to: {msg['To']}")
+        print(f"Subject: {msg['Subject']}")
+        print(f"Body:\n{msg.get_payload()}")
+
+    def quit(self):
+        pass
+
+
+def open_connection(config=MAIL_CONFIG):
+    if config['backend'] == 'console':
+        return ConsoleConnection()
+    if config['backend'] != 'smtp':
+        raise ValueError(f"Unknown mail backend: {config['backend']}")
+    conn = smtplib.SMTP(config['host'], config['port'], timeout=30)
+    if config['use_tls']:
+        conn.starttls()
+    if config['username']:
+        conn.login(config['username'], config['password'])
+    return conn
+
+
+def build_message(row, sender):
+    msg = MIMEText(row['body'] or '', 'plain', 'utf-8')
+    msg['From'] = sender
+    msg['To'] = row['to_email']
+    msg['Subject'] = row['subject']
+    return msg
+
+
+class Dispatcher(object):
+    def __init__(self, config=MAIL_CONFIG):
+        self.config = config
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._pool = ThreadPoolExecutor(max_workers=max(1, config['workers']), thread_name_prefix='mailer')
+        self._lock = threading.Lock()
+        self.metrics = {
+            'batches': 0, 'claimed': 0, 'sent': 0, 'retried': 0, 'failed': 0,
+            'smtp_connections': 0, 'send_seconds': 0.0, 'last_batch_seconds': 0.0,
+        }
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name='mail-dispatcher', daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def wake(self):
+        """Deliver now instead of waiting for the next poll."""
+        self.start()
+        self._wake.set()
+
+    def _count(self, **deltas):
+        with self._lock:
+            for k, v in deltas.items():
+                self.metrics[k] += v
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                claimed = self.run_once()
+            except Exception as e:
+                print(f"[WARNING] Mail dispatcher error: {e}")
+                claimed = 0
+            # keep draining while there is a backlog, otherwise sleep until woken
+            if not claimed:
+                self._wake.wait(self.config['poll_interval'])
+                self._wake.clear()
+
+    def run_once(self):
+        """Claim one round of due emails and deliver them; returns how many were claimed."""
+        per_conn = max(1, self.config['batch_size'])
+        rows = models.claim_outbox_batch(uuid.uuid4().hex, per_conn * max(1, self.config['workers']))
+        if not rows:
+            return 0
+        start = time.time()
+        batches = [rows[i:i + per_conn] for i in range(0, len(rows), per_conn)]
+        list(self._pool.map(self._deliver, batches))
+        elapsed = time.time() - start
+        self._count(batches=len(batches), claimed=len(rows), send_seconds=elapsed)
+        with self._lock:
+            self.metrics['last_batch_seconds'] = elapsed
+        return len(rows)
+
+    def _deliver(self, rows):
+        sent = []
+        conn = None
+        try:
+            for i, row in enumerate(rows):
+                if conn is None:
+                    try:
+                        conn = open_connection(self.config)
+                        self._count(smtp_connections=1)
+                    except Exception as e:
+                        # server unreachable: push the rest of the batch back
+                        for pending in rows[i:]:
+                            self._retry(pending, e)
+                        break
+                try:
+                    conn.send_message(build_message(row, self.config['sender']))
+                    sent.append(row['id'])
+                except Exception as e:
+                    # anything else (a row build_message can't encode, say) must still
+                    # count an attempt, or the claim lapses and it loops forever
+                    self._retry(row, e)
+                    if isinstance(e, (smtplib.SMTPServerDisconnected, OSError)):
+                        conn = None  # reconnect for the next message
+        finally:
+            if conn is not None:
+                try:
+                    conn.quit()
+                except Exception:
+                    pass
+            models.mark_emails_sent(sent)
+            self._count(sent=len(sent))
+
+    def _retry(self, row, error):
+        attempts = row['attempts'] + 1
+        if attempts >= self.config['max_attempts']:
+            models.mark_email_failed(row['id'], error)
+            self._count(failed=1)
+        else:
+            models.mark_email_failed(row['id'], error, retry_in=self.config['backoff'] * 2 ** (attempts - 1))
+            self._count(retried=1)
+
+    def stats(self):
+        with self._lock:
+            out = dict(self.metrics)
+        try:
+            out['queue'] = models.outbox_depth()
+        except Exception:
+            out['queue'] = None
+        return out
+
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_dispatcher():
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = Dispatcher()
+        return _dispatcher
+
+
+class FakeSMTPServer(socketserver.ThreadingTCPServer):
+    """A tiny in-process SMTP sink for tests: accepts every message and keeps
+    it in `messages` as dicts with sender, recipients and data."""
+
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, host='127.0.0.1', port=8025, verbose=False):
+        self.messages = []
+        self.verbose = verbose
+        self._lock = threading.Lock()
+        socketserver.ThreadingTCPServer.__init__(self, (host, port), _FakeSMTPHandler)
+
+    def start(self):
+        """Serve from a background thread; returns self."""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+class _FakeSMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write((line + '\r\n').encode('ascii'))
+
+    def handle(self):
+        self.reply('220 fake-smtp ready')
+        sender, recipients = None, []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            cmd = line.decode('utf-8', 'replace').strip()
+            verb = cmd[:4].upper()
+            if verb in ('HELO', 'EHLO'):
+                self.reply('250 fake-smtp')
+            elif verb == 'MAIL':
+                sender, recipients = cmd.split(':', 1)[1].strip(), []
+                self.reply('250 OK')
+            elif verb == 'RCPT':
+                recipients.append(cmd.split(':', 1)[1].strip())
+                self.reply('250 OK')
+            elif verb == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                data = []
+                while True:
+                    chunk = self.rfile.readline()
+                    if not chunk or chunk in (b'.\r\n', b'.\n'):
+                        break
+                    data.append(chunk[1:] if chunk.startswith(b'..') else chunk)
+                message = {'sender': sender, 'recipients': recipients, 'data': b''.join(data).decode('utf-8', 'replace')}
+                with self.server._lock:
+                    self.server.messages.append(message)
+                if self.server.verbose:
+                    print(f"[sink] {sender} -> {', '.join(recipients)}")
+                self.reply('250 OK: queued')
+            elif verb in ('RSET', 'NOOP'):
+                self.reply('250 OK')
+            elif verb == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('502 Command not implemented')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Email outbox tools')
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('dispatch', help='deliver queued emails until interrupted')
+    sink = sub.add_parser('sink', help='run a local fake SMTP server')
+    sink.add_argument('--host', default='127.0.0.1')
+    sink.add_argument('--port', type=int, default=8025)
+    args = parser.parse_args()
+
+    if args.command == 'sink':
+        server = FakeSMTPServer(args.host, args.port, verbose=True)
+        print(f"Fake SMTP sink listening on {args.host}:{args.port}")
+        server.serve_forever()
+    else:
+        dispatcher = get_dispatcher()
+        dispatcher.start()
+        print('Mail dispatcher running (Ctrl+C to stop)')
+        try:
+            while True:
+                time.sleep(60)
+                print(dispatcher.stats())
+        except KeyboardInterrupt:
+            dispatcher.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,271 @@
+"""
+In-process metrics: latency histograms and counters, rendered in the
+Prometheus text exposition format by the /metrics endpoint.
+
+models.fetchall/execute report every statement through record_query(), keyed
+by its normalized SQL (literals replaced with ?), and the app wraps each
+request in begin_request()/end_request() so queries can also be counted per
+request. A request that runs the same statement shape many times is reported
+as a likely N+1 pattern. Statements slower than the slow-query threshold are
+printed and kept in a short in-memory log.
+"""
+import bisect
+import re
+import threading
+import time
+from collections import deque
+
+from config import METRICS_CONFIG
+
+QUERY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+OTHER_STATEMENT = '<other>'
+
+
+class Histogram(object):
+    """Fixed-bucket histogram (per-bucket counts, sum and count)."""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+            self.count += 1
+            self.max = max(self.max, value)
+
+    def snapshot(self):
+        with self._lock:
+            return {'buckets': self.buckets, 'counts': list(self.counts), 'sum': self.sum,
+                    'count': self.count, 'max': self.max}
+
+
+class HistogramFamily(object):
+    """Histograms keyed by a label tuple, capped at max_series distinct keys."""
+
+    def __init__(self, buckets, max_series=None, overflow_key=None):
+        self.buckets = buckets
+        self.max_series = max_series
+        self.overflow_key = overflow_key
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        hist = self._series.get(key)
+        if hist is None:
+            with self._lock:
+                hist = self._series.get(key)
+                if hist is None:
+                    if self.max_series and len(self._series) >= self.max_series:
+                        key = self.overflow_key
+                        hist = self._series.get(key)
+                    if hist is None:
+                        hist = self._series[key] = Histogram(self.buckets)
+        return hist
+
+    def observe(self, key, value):
+        self.get(key).observe(value)
+
+    def items(self):
+        with self._lock:
+            return list(self._series.items())
+
+
+_LITERALS = [
+    (re.compile(r"'(?:[^'\\]|\\.|'')*'"), '?'),
+    (re.compile(r'"(?:[^"\\]|\\.)*"'), '?'),
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'%s'), '?'),
+    (re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)'), '(...)'),
+    (re.compile(r'\s+'), ' '),
+]
+_IDENTIFIER = re.compile(r'`[^`]*`')
+_normalized = {}
+
+
+def normalize_sql(query):
+    """Collapse whitespace and replace literals/placeholders with ?, so all
+    executions of one statement share a key."""
+    key = _normalized.get(query)
+    if key is None:
+        key = query
+        for pattern, repl in _LITERALS:
+            key = pattern.sub(repl, key)
+        key = key.strip()[:300]
+        if len(_normalized) < 5000:
+            _normalized[query] = key
+    return key
+
+
+query_latency = HistogramFamily(QUERY_BUCKETS, METRICS_CONFIG['max_statements'], (OTHER_STATEMENT,))
+connect_latency = Histogram(QUERY_BUCKETS)
+request_latency = HistogramFamily(REQUEST_BUCKETS)
+queries_per_request = Histogram(COUNT_BUCKETS)
+slow_queries = deque(maxlen=100)
+counters = {'slow_queries': 0, 'n_plus_one_warnings': 0, 'query_errors': 0}
+request_counts = {}
+_counter_lock = threading.Lock()
+_local = threading.local()
+
+
+def _incr(table, key, amount=1):
+    with _counter_lock:
+        table[key] = table.get(key, 0) + amount
+
+
+def record_query(query, elapsed, failed=False):
+    statement = normalize_sql(query)
+    query_latency.observe((statement,), elapsed)
+    if failed:
+        _incr(counters, 'query_errors')
+    if elapsed * 1000 >= METRICS_CONFIG['slow_query_ms']:
+        _incr(counters, 'slow_queries')
+        slow_queries.append({'statement': statement, 'seconds': round(elapsed, 6), 'at': time.time(),
+                             'route': getattr(_local, 'route', None)})
+        print(f"[SLOW QUERY] {elapsed * 1000:.1f} ms: {statement}")
+    shapes = getattr(_local, 'shapes', None)
+    if shapes is not None:
+        _local.queries += 1
+        _local.query_time += elapsed
+        # table names are ignored here so a loop over tables counts as one shape
+        shape = _IDENTIFIER.sub('`?`', statement)
+        shapes[shape] = shapes.get(shape, 0) + 1
+
+
+def record_connect(elapsed):
+    connect_latency.observe(elapsed)
+
+
+def begin_request(route=None):
+    _local.shapes = {}
+    _local.queries = 0
+    _local.query_time = 0.0
+    _local.route = route
+    _local.start = time.time()
+
+
+def end_request(route, method, status):
+    """Close the request scope started by begin_request; returns (queries, query_seconds)."""
+    shapes = getattr(_local, 'shapes', None)
+    if shapes is None:
+        return 0, 0.0
+    elapsed = time.time() - _local.start
+    queries, query_time = _local.queries, _local.query_time
+    _local.shapes = None
+    request_latency.observe((route, method), elapsed)
+    _incr(request_counts, (route, method, str(status)))
+    queries_per_request.observe(queries)
+    threshold = METRICS_CONFIG['n_plus_one_threshold']
+    repeated = [(n, s) for s, n in shapes.items() if n >= threshold]
+    if repeated:
+        _incr(counters, 'n_plus_one_warnings')
+        n, shape = max(repeated)
+        print(f"[N+1] {method} {route} ran {n} queries shaped like: {shape}")
+    return queries, query_time
+
+
+def fork_scope():
+    """Handle to the calling thread's request scope for a helper thread, or None outside a request."""
+    if getattr(_local, 'shapes', None) is None:
+        return None
+    return {'route': _local.route}
+
+
+def begin_part(scope):
+    """Count queries run on a helper thread on behalf of the request `scope`."""
+    _local.shapes = {} if scope is not None else None
+    _local.queries = 0
+    _local.query_time = 0.0
+    _local.route = scope['route'] if scope is not None else None
+
+
+def end_part():
+    """Stop counting on the helper thread; returns the tally for merge_part()."""
+    shapes = getattr(_local, 'shapes', None)
+    _local.shapes = None
+    if shapes is None:
+        return None
+    return shapes, _local.queries, _local.query_time
+
+
+def merge_part(part):
+    """Add a helper thread's tally to the calling thread's request scope."""
+    shapes = getattr(_local, 'shapes', None)
+    if part is None or shapes is None:
+        return
+    part_shapes, queries, query_time = part
+    _local.queries += queries
+    _local.query_time += query_time
+    for shape, n in part_shapes.items():
+        shapes[shape] = shapes.get(shape, 0) + n
+
+
+# Prometheus text format
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, extra=None):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _render_histogram(lines, name, label_names, label_values, snap):
+    cumulative = 0
+    for bound, count in zip(list(snap['buckets']) + ['+Inf'], snap['counts']):
+        cumulative += count
+        le = 'le="%s"' % (bound if bound == '+Inf' else repr(float(bound)))
+        lines.append(f"{name}_bucket{_labels(label_names, label_values, le)} {cumulative}")
+    lines.append(f"{name}_sum{_labels(label_names, label_values)} {snap['sum']:.6f}")
+    lines.append(f"{name}_count{_labels(label_names, label_values)} {snap['count']}")
+
+
+def histogram_lines(name, help_text, series, label_names=()):
+    """series: list of (label_values, snapshot)."""
+    lines = [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+    for values, snap in series:
+        _render_histogram(lines, name, label_names, values, snap)
+    return lines
+
+
+def gauge_lines(name, help_text, value, kind='gauge'):
+    if value is None:
+        return []
+    return [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}', f'{name} {value}']
+
+
+def render(extra_lines=()):
+    """The app-level metrics above plus `extra_lines`, as Prometheus text."""
+    lines = []
+    lines += histogram_lines('http_request_duration_seconds', 'Request latency by route.',
+                             [(k, h.snapshot()) for k, h in request_latency.items()], ('route', 'method'))
+    with _counter_lock:
+        totals = sorted(request_counts.items())
+        snapshot = dict(counters)
+    lines += ['# HELP http_requests_total Requests by route and status.', '# TYPE http_requests_total counter']
+    lines += [f"http_requests_total{_labels(('route', 'method', 'status'), k)} {v}" for k, v in totals]
+    lines += histogram_lines('db_query_duration_seconds', 'Statement latency by normalized SQL.',
+                             [(k, h.snapshot()) for k, h in query_latency.items()], ('statement',))
+    lines += histogram_lines('db_queries_per_request', 'Database statements run per request.',
+                             [((), queries_per_request.snapshot())])
+    lines += histogram_lines('db_connect_duration_seconds', 'Time to open a new database connection.',
+                             [((), connect_latency.snapshot())])
+    lines += gauge_lines('db_slow_queries_total', 'Statements slower than the slow-query threshold.',
+                         snapshot['slow_queries'], 'counter')
+    lines += gauge_lines('db_query_errors_total', 'Statements that raised an error.',
+                         snapshot['query_errors'], 'counter')
+    lines += gauge_lines('db_n_plus_one_warnings_total', 'Requests that repeated one statement shape too often.',
+                         snapshot['n_plus_one_warnings'], 'counter')
+    lines += list(extra_lines)
+    return '\n'.join(lines) + '\n'
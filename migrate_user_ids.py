@@ -0,0 +1,170 @@
+"""
+Online backfill of students.user_id and companies.user_id.
+
+Usage:
+    python migrate_user_ids.py --add-columns        # add the columns/keys if missing, then backfill
+    python migrate_user_ids.py --batch-size 500 --pause 0.2
+    python migrate_user_ids.py --dry-run            # only report how many rows would be linked
+
+Student and company rows used to be matched to their login by email. This
+links every row to users.id (the user with the same email and matching role)
+so lookups can use the integer key instead. It is safe to run against a live
+database and to stop and re-run at any time:
+- rows are processed in primary-key ranges, one short transaction per batch,
+  touching only rows whose user_id is still NULL;
+- after each batch it pauses, shrinks the batch when one runs slower than
+  --max-batch-seconds (and grows it back when they are fast), and waits while
+  the server has more than --max-running threads running;
+- a user already linked to another row is skipped, never stolen.
+
+Rows this has not reached yet keep working: models.resolve_identity() links
+them by email the first time their user logs in. Users already logged in
+without a linked profile look it up again within AUTH_CONFIG's
+identity_retry seconds, so the running app needs no signal from this script.
+"""
+import argparse
+import sys
+import time
+
+import models
+
+ROLES = (('students', 'student'), ('companies', 'company'))
+
+
+def column_exists(conn, table, column):
+    cur = conn.cursor()
+    cur.execute("SELECT COUNT(*) FROM information_schema.COLUMNS "
+                "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s", (table, column))
+    found = cur.fetchone()[0] > 0
+    cur.close()
+    return found
+
+
+def add_columns(conn):
+    """Add user_id, its unique key and foreign key without blocking writes (InnoDB online DDL)."""
+    cur = conn.cursor()
+    for table, _ in ROLES:
+        if column_exists(conn, table, 'user_id'):
+            print(f"{table}.user_id already exists")
+            continue
+        print(f"Adding {table}.user_id ...")
+        cur.execute(f"ALTER TABLE {table} ADD COLUMN user_id INT NULL, ALGORITHM=INPLACE, LOCK=NONE")
+        cur.execute(f"ALTER TABLE {table} ADD UNIQUE KEY uq_user (user_id), ALGORITHM=INPLACE, LOCK=NONE")
+        # with foreign_key_checks off the constraint is added in place, without a table copy
+        cur.execute('SET SESSION foreign_key_checks = 0')
+        try:
+            cur.execute(f"ALTER TABLE {table} ADD CONSTRAINT fk_{table}_user FOREIGN KEY (user_id) "
+                        f"REFERENCES users(id) ON DELETE SET NULL, ALGORITHM=INPLACE, LOCK=NONE")
+        finally:
+            cur.execute('SET SESSION foreign_key_checks = 1')
+    cur.close()
+
+
+def threads_running(conn):
+    cur = conn.cursor()
+    cur.execute("SHOW GLOBAL STATUS LIKE 'Threads_running'")
+    row = cur.fetchone()
+    cur.close()
+    return int(row[1]) if row else 0
+
+
+def _candidates(cur, table, role, lo, hi):
+    """(row id, user id) pairs to link in [lo, hi]; the lowest user id wins duplicate emails."""
+    cur.execute(f"""
+        SELECT t.id, MIN(u.id)
+        FROM {table} t
+        JOIN users u ON u.email = t.email AND u.role = %s
+        WHERE t.id BETWEEN %s AND %s AND t.user_id IS NULL
+        GROUP BY t.id
+    """, (role, lo, hi))
+    pairs = cur.fetchall()
+    if not pairs:
+        return []
+    marks = ','.join(['%s'] * len(pairs))
+    cur.execute(f"SELECT user_id FROM {table} WHERE user_id IN ({marks})", [uid for _, uid in pairs])
+    taken = {r[0] for r in cur.fetchall()}
+    return [(rid, uid) for rid, uid in pairs if uid not in taken]
+
+
+def backfill(conn, table, role, batch_size=1000, pause=0.1, max_batch_seconds=0.5, max_running=32,
+             start_id=1, dry_run=False):
+    """Link `table` rows to their users in id-range batches; returns (linked, skipped)."""
+    cur = conn.cursor()
+    cur.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}")
+    max_id = cur.fetchone()[0]
+    conn.commit()
+    size = max_size = max(1, batch_size)
+    lo, linked, skipped = start_id, 0, 0
+    while lo <= max_id:
+        while max_running and threads_running(conn) > max_running:
+            time.sleep(1)
+        hi = lo + size - 1
+        start = time.time()
+        pairs = _candidates(cur, table, role, lo, hi)
+        if pairs and not dry_run:
+            # IGNORE: a user linked by the app meanwhile is skipped instead of failing the batch
+            cur.executemany(f"UPDATE IGNORE {table} SET user_id = %s WHERE id = %s AND user_id IS NULL",
+                            [(uid, rid) for rid, uid in pairs])
+            done = max(cur.rowcount, 0)
+            linked += done
+            skipped += len(pairs) - done
+        elif dry_run:
+            linked += len(pairs)
+        conn.commit()
+        elapsed = time.time() - start
+        print(f"{table}: ids {lo}-{min(hi, max_id)} of {max_id}, {linked} linked ({elapsed * 1000:.0f} ms)")
+        lo = hi + 1
+        if elapsed > max_batch_seconds:
+            size = max(1, size // 2)
+        elif elapsed < max_batch_seconds / 4:
+            size = min(max_size, size * 2)
+        if pause:
+            time.sleep(pause)
+    cur.close()
+    return linked, skipped
+
+
+def unlinked(conn, table, role):
+    """Rows whose email matches an account of the right role but are still not linked."""
+    cur = conn.cursor()
+    cur.execute(f"SELECT COUNT(*) FROM {table} t WHERE t.user_id IS NULL AND EXISTS "
+                f"(SELECT 1 FROM users u WHERE u.email = t.email AND u.role = %s)", (role,))
+    count = cur.fetchone()[0]
+    cur.close()
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Backfill students/companies.user_id in small batches')
+    parser.add_argument('--add-columns', action='store_true', help='add the user_id columns and keys first if missing')
+    parser.add_argument('--batch-size', type=int, default=1000, help='largest id range per batch (default %(default)s)')
+    parser.add_argument('--pause', type=float, default=0.1, help='seconds to sleep between batches (default %(default)s)')
+    parser.add_argument('--max-batch-seconds', type=float, default=0.5,
+                        help='halve the batch when one takes longer than this (default %(default)s)')
+    parser.add_argument('--max-running', type=int, default=32,
+                        help='wait while the server has more running threads than this; 0 disables (default %(default)s)')
+    parser.add_argument('--start-id', type=int, default=1, help='resume from this row id')
+    parser.add_argument('--only', choices=[t for t, _ in ROLES], help='backfill just one table')
+    parser.add_argument('--dry-run', action='store_true', help='report what would be linked without writing')
+    args = parser.parse_args()
+
+    conn = models.get_connection()
+    try:
+        if args.add_columns and not args.dry_run:
+            add_columns(conn)
+        for table, role in ROLES:
+            if args.only and table != args.only:
+                continue
+            if not column_exists(conn, table, 'user_id'):
+                print(f"[ERROR] {table}.user_id does not exist; run with --add-columns")
+                sys.exit(1)
+            linked, skipped = backfill(conn, table, role, args.batch_size, args.pause, args.max_batch_seconds,
+                                       args.max_running, args.start_id, args.dry_run)
+            print(f"[SUCCESS] {table}: {linked} {'would be ' if args.dry_run else ''}linked, "
+                  f"{skipped} skipped, {unlinked(conn, table, role)} still unlinked")
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,173 +1,1476 @@
+import base64
+import contextlib
+import datetime
+import json
+import re
+import threading
+import time
+import os
 import mysql.connector
 from mysql.connector import Error
-from config import DB_CONFIG
+from concurrent.futures import ThreadPoolExecutor
+from config import (DB_CONFIG, POOL_CONFIG, SCHEMA_CACHE_TTL, DASHBOARD_CACHE_TTL, CATALOG_CACHE, FANOUT_CONFIG,
+                    CHANGES_CONFIG, AUTH_CONFIG)
+import cache
+import events
+import metrics
 
-def get_connection():
+
+class PoolTimeout(Exception):
+    """Raised when no pooled connection becomes free within the checkout timeout."""
+    pass
+
+
+def _new_connection():
+    start = time.time()
+    conn = mysql.connector.connect(**DB_CONFIG)
+    metrics.record_connect(time.time() - start)
+    # Ensure the connection uses a consistent charset and collation to avoid
+    # "Illegal mix of collations" errors when the server or some tables use
+    # a different default (e.g. utf8mb4_0900_ai_ci on MySQL 8.0).
+    # We send an explicit SET NAMES with the desired collation as a fallback.
+    # With pooling this runs once per physical connection, not per checkout.
     try:
-        conn = mysql.connector.connect(**DB_CONFIG)
-        # Ensure the connection uses a consistent charset and collation to avoid
-        # "Illegal mix of collations" errors when the server or some tables use
-        # a different default (e.g. utf8mb4_0900_ai_ci on MySQL 8.0).
-        # We send an explicit SET NAMES with the desired collation as a fallback.
+        cur = conn.cursor()
+        cur.execute("SET NAMES 'utf8mb4' COLLATE 'utf8mb4_unicode_ci'")
+        cur.close()
+    except Exception:
+        # Don't fail the whole connection if the server doesn't accept the
+        # statement for some reason; the higher-level code may still work
+        # or the permanent fix is to alter the database/table collations.
+        pass
+    return conn
+
+
+class _PoolEntry(object):
+    __slots__ = ('conn', 'created', 'last_used')
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.created = time.time()
+        self.last_used = self.created
+
+
+class PooledConnection(object):
+    """Thin proxy around a pooled mysql connection.
+
+    Calling close() hands the physical connection back to the pool instead of
+    tearing it down, so existing `conn.close()` call sites keep working. A
+    connection bound to a Flask request ignores close() until the request ends.
+    """
+
+    def __init__(self, pool, entry, bound=False):
+        self._pool = pool
+        self._entry = entry
+        self._bound = bound
+
+    def __getattr__(self, name):
+        entry = self.__dict__.get('_entry')
+        if entry is None:
+            raise Error('Connection has already been returned to the pool')
+        return getattr(entry.conn, name)
+
+    def close(self):
+        if not self._bound:
+            self._release()
+
+    def discard(self):
+        """Close the physical connection instead of returning it, e.g. when a
+        large unbuffered result was abandoned part way through."""
+        entry, self._entry = self._entry, None
+        if entry is not None:
+            self._pool.release(entry, broken=True)
+
+    def _release(self):
+        entry, self._entry = self._entry, None
+        if entry is not None:
+            self._pool.release(entry)
+
+
+class ConnectionPool(object):
+    """A small thread-safe pool of MySQL connections.
+
+    - size: maximum number of physical connections (idle + in use)
+    - timeout: seconds to wait for a free connection before raising PoolTimeout
+    - ping_interval: connections idle longer than this are pinged on checkout
+    - max_lifetime: connections older than this are closed and replaced
+    """
+
+    def __init__(self, size=10, timeout=10, ping_interval=30, max_lifetime=1800):
+        self.size = max(1, int(size))
+        self.timeout = float(timeout)
+        self.ping_interval = float(ping_interval)
+        self.max_lifetime = float(max_lifetime)
+        self._idle = []
+        self._in_use = 0
+        self._cond = threading.Condition()
+        # stats
+        self.checkouts = 0
+        self.created = 0
+        self.discarded = 0
+        self.waits = 0
+        self.wait_time = 0.0
+        self.timeouts = 0
+
+    def acquire(self):
+        start = time.time()
+        waited = False
+        with self._cond:
+            while not self._idle and self._in_use >= self.size:
+                remaining = self.timeout - (time.time() - start)
+                if remaining <= 0:
+                    self.timeouts += 1
+                    raise PoolTimeout('No database connection available after %.1fs' % self.timeout)
+                waited = True
+                self._cond.wait(remaining)
+            if waited:
+                self.waits += 1
+                self.wait_time += time.time() - start
+            self._in_use += 1
+            self.checkouts += 1
+            # LIFO: reuse the most recently returned (warmest) connection
+            entry = self._idle.pop() if self._idle else None
+        try:
+            return self._checkout(entry)
+        except Exception:
+            with self._cond:
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+
+    def try_acquire(self):
+        """acquire() without waiting: a connection entry, or None when every
+        connection is in use."""
+        with self._cond:
+            if not self._idle and self._in_use >= self.size:
+                return None
+            self._in_use += 1
+            self.checkouts += 1
+            entry = self._idle.pop() if self._idle else None
+        try:
+            return self._checkout(entry)
+        except Exception:
+            with self._cond:
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+
+    def _checkout(self, entry):
+        now = time.time()
+        if entry is not None and now - entry.created > self.max_lifetime:
+            self._discard(entry)
+            entry = None
+        if entry is not None and now - entry.last_used > self.ping_interval:
+            try:
+                entry.conn.ping(reconnect=False)
+            except Exception:
+                self._discard(entry)
+                entry = None
+        if entry is None:
+            entry = _PoolEntry(_new_connection())
+            with self._cond:
+                self.created += 1
+        return entry
+
+    def release(self, entry, broken=False):
+        healthy = not broken
+        try:
+            # never hand a half-finished transaction (or a stale read snapshot)
+            # to the next borrower
+            if healthy and entry.conn.in_transaction:
+                entry.conn.rollback()
+        except Exception:
+            healthy = False
+        if not healthy or time.time() - entry.created > self.max_lifetime:
+            self._discard(entry)
+            entry = None
+        with self._cond:
+            self._in_use -= 1
+            if entry is not None:
+                entry.last_used = time.time()
+                self._idle.append(entry)
+            self._cond.notify()
+
+    def _discard(self, entry):
         try:
-            cur = conn.cursor()
-            cur.execute("SET NAMES 'utf8mb4' COLLATE 'utf8mb4_unicode_ci'")
-            cur.close()
+            entry.conn.close()
         except Exception:
-            # Don't fail the whole connection if the server doesn't accept the
-            # statement for some reason; the higher-level code may still work
-            # or the permanent fix is to alter the database/table collations.
             pass
-        return conn
-    except Error as e:
+        with self._cond:
+            self.discarded += 1
+
+    def available(self):
+        """Connections that can be checked out right now without waiting."""
+        with self._cond:
+            return self.size - self._in_use
+
+    def stats(self):
+        with self._cond:
+            return {
+                'size': self.size,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'checkouts': self.checkouts,
+                'created': self.created,
+                'discarded': self.discarded,
+                'waits': self.waits,
+                'wait_time': round(self.wait_time, 6),
+                'timeouts': self.timeouts,
+            }
+
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+_local = threading.local()
+
+
+def get_pool():
+    """Return the process-wide pool, creating it lazily (and again after a fork)."""
+    global _pool, _pool_pid
+    if _pool is None or _pool_pid != os.getpid():
+        with _pool_lock:
+            if _pool is None or _pool_pid != os.getpid():
+                _pool = ConnectionPool(**POOL_CONFIG)
+                _pool_pid = os.getpid()
+    return _pool
+
+
+def pool_stats():
+    return get_pool().stats()
+
+
+def bind_request_connection():
+    """Start a request scope: get_connection() hands out one shared connection
+    until release_request_connection() is called."""
+    _local.bound = True
+    _local.conn = None
+
+
+def release_request_connection():
+    conn = getattr(_local, 'conn', None)
+    _local.bound = False
+    _local.conn = None
+    if conn is not None:
+        conn._release()
+
+
+def get_connection():
+    tx_conn = getattr(_local, 'tx_conn', None)
+    if tx_conn is not None:
+        return tx_conn
+    if getattr(_local, 'bound', False):
+        if _local.conn is None:
+            _local.conn = PooledConnection(get_pool(), get_pool().acquire(), bound=True)
+        return _local.conn
+    return PooledConnection(get_pool(), get_pool().acquire())
+
+@contextlib.contextmanager
+def transaction():
+    """Run several models calls atomically on one connection.
+
+        with models.transaction():
+            models.add_user(...)
+            models.add_student(...)
+
+    Inside the block execute() does not commit; everything commits together
+    when the block exits (or rolls back on an exception). Nested blocks join
+    the outer transaction. Work registered with after_commit() runs only once
+    the data is committed.
+    """
+    if getattr(_local, 'tx_conn', None) is not None:
+        yield _local.tx_conn
+        return
+    if getattr(_local, 'bound', False):
+        conn, owned = get_connection(), False
+    else:
+        conn, owned = PooledConnection(get_pool(), get_pool().acquire(), bound=True), True
+    _local.tx_conn = conn
+    _local.after_commit = []
+    try:
+        yield conn
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        hooks = _local.after_commit
+        _local.tx_conn = None
+        _local.after_commit = []
+        if owned:
+            conn._release()
+    # only reached when the commit succeeded
+    for fn in hooks:
+        fn()
+
+
+def after_commit(fn):
+    """Call fn() after the current transaction commits, or right away outside one."""
+    if getattr(_local, 'tx_conn', None) is None:
+        fn()
+    else:
+        _local.after_commit.append(fn)
+
+
+# Concurrent reads
+# gather() runs a page's independent reads in parallel on a small shared thread
+# pool, so the page waits for the slowest query rather than the sum of all of
+# them. Each helper thread gets one pooled connection reserved for it before
+# it is started, so helpers never wait on the pool while their caller holds
+# its own connection; the caller runs the first call itself on its request
+# connection, plus any call no connection could be reserved for.
+
+_fanout = None
+_fanout_pid = None
+
+
+def _get_fanout():
+    global _fanout, _fanout_pid
+    if _fanout is None or _fanout_pid != os.getpid():
+        with _pool_lock:
+            if _fanout is None or _fanout_pid != os.getpid():
+                _fanout = ThreadPoolExecutor(max_workers=FANOUT_CONFIG['workers'],
+                                             thread_name_prefix='db-fanout')
+                _fanout_pid = os.getpid()
+    return _fanout
+
+
+def _call(task):
+    if callable(task):
+        return task()
+    return task[0](*task[1:])
+
+
+def _run_part(scope, task, entry):
+    _local.in_fanout = True
+    _local.bound = True
+    _local.conn = PooledConnection(get_pool(), entry, bound=True)
+    metrics.begin_part(scope)
+    try:
+        return _call(task), None, metrics.end_part()
+    except Exception as e:
+        return None, e, metrics.end_part()
+    finally:
+        release_request_connection()
+        _local.in_fanout = False
+
+
+def gather(*tasks):
+    """Run independent reads concurrently and return their results in order.
+
+        page, companies = models.gather((get_internships_page, 50, None), get_companies)
+
+    Each task is a callable or a (callable, arg, ...) tuple. Runs everything on
+    the calling thread inside a transaction (helpers would not see its
+    uncommitted rows), inside another gather() or when fan-out is disabled.
+    Otherwise a task goes to a helper only if a pooled connection can be
+    reserved for it without waiting; the rest run on the calling thread. The
+    first exception raised by any task is re-raised once all of them have
+    finished.
+    """
+    if (len(tasks) < 2 or FANOUT_CONFIG['workers'] <= 0 or getattr(_local, 'tx_conn', None) is not None
+            or getattr(_local, 'in_fanout', False)):
+        return [_call(t) for t in tasks]
+    if getattr(_local, 'bound', False):
+        # take the caller's own connection first, while holding nothing else
+        get_connection()
+    pool = get_pool()
+    entries = []
+    while len(entries) < min(len(tasks) - 1, FANOUT_CONFIG['workers']):
+        entry = pool.try_acquire()
+        if entry is None:
+            break
+        entries.append(entry)
+    if not entries:
+        return [_call(t) for t in tasks]
+    scope = metrics.fork_scope()
+    helped = tasks[len(tasks) - len(entries):]
+    futures = []
+    try:
+        for t, e in zip(helped, entries):
+            futures.append(_get_fanout().submit(_run_part, scope, t, e))
+    except Exception:
+        for e in entries[len(futures):]:
+            pool.release(e)
         raise
+    results, error = [], None
+    for t in tasks[:len(tasks) - len(entries)]:
+        try:
+            results.append(_call(t))
+        except Exception as e:
+            results.append(None)
+            if error is None:
+                error = e
+    for f in futures:
+        value, exc, part = f.result()
+        metrics.merge_part(part)
+        results.append(value)
+        if exc is not None and error is None:
+            error = exc
+    if error is not None:
+        raise error
+    return results
+
 
 def fetchall(query, params=None):
     conn = get_connection()
-    cur = conn.cursor(dictionary=True)
-    cur.execute(query, params or ())
-    rows = cur.fetchall()
-    cur.close()
-    conn.close()
+    start = time.time()
+    failed = True
+    try:
+        cur = conn.cursor(dictionary=True)
+        cur.execute(query, params or ())
+        rows = cur.fetchall()
+        cur.close()
+        failed = False
+    finally:
+        conn.close()
+        metrics.record_query(query, time.time() - start, failed)
     return rows
 
-def run_select(query):
-    """Run a SELECT/SHOW/EXPLAIN style query and return rows.
-    This helper performs a simple safety check to allow only read-only queries.
-    """
+def _check_read_only(query):
     safe = query.strip().lower()
     # very basic safety: only allow read-only statements
     if not (safe.startswith('select') or safe.startswith('show') or safe.startswith('explain')):
         raise ValueError('Only read-only queries (SELECT/SHOW/EXPLAIN) are allowed via this method')
+
+def run_select(query):
+    """Run a SELECT/SHOW/EXPLAIN style query and return rows.
+    This helper performs a simple safety check to allow only read-only queries.
+    """
+    _check_read_only(query)
     return fetchall(query)
 
+def _set_execution_limit(cur, max_execution_ms):
+    """Cap statement run time for this session: MySQL's max_execution_time
+    (milliseconds, SELECT only), or MariaDB's max_statement_time (seconds)."""
+    for stmt, value in (("SET SESSION max_execution_time = %s", int(max_execution_ms)),
+                        ("SET SESSION max_statement_time = %s", max_execution_ms / 1000.0)):
+        try:
+            cur.execute(stmt, (value,))
+            return stmt.replace('%s', 'DEFAULT')
+        except Error:
+            continue
+    return None
+
+def open_select(query, max_execution_ms=None):
+    """Start a read-only query for streaming.
+
+    Runs the statement on its own pooled connection (the caller's response
+    body outlives the request) with a server-side execution limit and returns
+    a stream of row dicts read from an unbuffered cursor. Closing the stream
+    early drops the connection rather than reading out the rest of the result.
+    """
+    _check_read_only(query)
+    conn = PooledConnection(get_pool(), get_pool().acquire())
+    start = time.time()
+    try:
+        cur = conn.cursor()
+        reset = _set_execution_limit(cur, max_execution_ms) if max_execution_ms else None
+        cur.close()
+        cur = conn.cursor(buffered=False)
+        cur.execute(query)
+    except Exception:
+        metrics.record_query(query, time.time() - start, failed=True)
+        conn.discard()
+        raise
+    return _SelectStream(query, conn, cur, reset, start)
+
+
+class _SelectStream(object):
+    """Rows of an open_select() query. Iterating yields dicts; close() (safe to
+    call more than once, and also before iterating) releases the connection."""
+
+    def __init__(self, query, conn, cur, reset, start):
+        self.query = query
+        self.columns = [d[0] for d in cur.description or ()]
+        self._conn = conn
+        self._cur = cur
+        self._reset = reset
+        self._start = start
+        self._finished = False
+
+    def __iter__(self):
+        for row in self._cur:
+            yield dict(zip(self.columns, row))
+        self._finished = True
+        self.close()
+
+    def close(self):
+        conn, self._conn = self._conn, None
+        if conn is None:
+            return
+        metrics.record_query(self.query, time.time() - self._start)
+        if not self._finished:
+            conn.discard()
+            return
+        try:
+            self._cur.close()
+            if self._reset:
+                cur = conn.cursor()
+                cur.execute(self._reset)
+                cur.close()
+            conn.close()
+        except Exception:
+            conn.discard()
+
+
+_schema_cache = {'loaded_at': 0.0, 'schema': None}
+_schema_lock = threading.Lock()
+
+
+def _col(row, name):
+    # information_schema may return uppercase keys; be resilient
+    return row.get(name) or row.get(name.upper()) or row.get(name.capitalize())
+
+
+def _load_schema():
+    """Introspect every table and its columns in a single information_schema query."""
+    q = """
+        SELECT t.table_name AS table_name, t.table_rows AS table_rows,
+               c.column_name AS column_name, c.data_type AS data_type,
+               c.is_nullable AS is_nullable, c.column_key AS column_key
+        FROM information_schema.tables t
+        LEFT JOIN information_schema.columns c
+          ON c.table_schema = t.table_schema AND c.table_name = t.table_name
+        WHERE t.table_schema = %s
+        ORDER BY t.table_name, c.ordinal_position
+    """
+    rows = fetchall(q, (DB_CONFIG['database'],))
+    tables = []
+    columns = {}
+    for r in rows:
+        table = _col(r, 'table_name')
+        if table not in columns:
+            columns[table] = []
+            tables.append({'table': table, 'rows': _col(r, 'table_rows') or 0})
+        if _col(r, 'column_name'):
+            columns[table].append({
+                'column_name': _col(r, 'column_name'),
+                'data_type': _col(r, 'data_type'),
+                'is_nullable': _col(r, 'is_nullable'),
+                'column_key': _col(r, 'column_key'),
+            })
+    return tables, columns
+
+
+def _schema():
+    """Return (tables, columns) from the cache, reloading at most once per SCHEMA_CACHE_TTL."""
+    now = time.time()
+    with _schema_lock:
+        # one read of the (tables, columns) pair, so a concurrent invalidate can't hand back None
+        schema = _schema_cache['schema']
+        if schema is None or now - _schema_cache['loaded_at'] > SCHEMA_CACHE_TTL:
+            schema = _load_schema()
+            _schema_cache['schema'] = schema
+            _schema_cache['loaded_at'] = time.time()
+    return schema
+
+
+def invalidate_schema_cache():
+    """Drop cached table/column metadata; call after DDL (CREATE/ALTER/DROP TABLE)."""
+    with _schema_lock:
+        _schema_cache['schema'] = None
+        _schema_cache['loaded_at'] = 0.0
+
+
+def table_exists(table_name):
+    return table_name in _schema()[1]
+
 
 def get_tables():
     """Return a list of table names and approximate row counts for the configured database."""
-    q = "SELECT table_name, table_rows FROM information_schema.tables WHERE table_schema = %s ORDER BY table_name"
-    conn = get_connection()
-    cur = conn.cursor(dictionary=True)
-    cur.execute(q, (DB_CONFIG['database'],))
-    rows = cur.fetchall()
-    cur.close()
-    conn.close()
-    # Normalize
-    out = []
-    for r in rows:
-        # information_schema may return uppercase keys; be resilient
-        table = r.get('table_name') or r.get('TABLE_NAME') or r.get('Table_name')
-        rows_count = r.get('table_rows') or r.get('TABLE_ROWS') or r.get('Table_rows') or 0
-        out.append({'table': table, 'rows': rows_count})
-    return out
+    return [dict(t) for t in _schema()[0]]
 
 
 def get_table_columns(table_name):
     """Return list of columns (name, type, nullable) for a table in the configured DB."""
-    q = "SELECT column_name, data_type, is_nullable, column_key FROM information_schema.columns WHERE table_schema=%s AND table_name=%s ORDER BY ordinal_position"
-    conn = get_connection()
-    cur = conn.cursor(dictionary=True)
-    cur.execute(q, (DB_CONFIG['database'], table_name))
-    cols = cur.fetchall()
-    cur.close()
-    conn.close()
-    # normalize keys in returned dicts for convenience
-    norm = []
-    for c in cols:
-        norm.append({
-            'column_name': c.get('column_name') or c.get('COLUMN_NAME') or c.get('Column_name'),
-            'data_type': c.get('data_type') or c.get('DATA_TYPE') or c.get('Data_type'),
-            'is_nullable': c.get('is_nullable') or c.get('IS_NULLABLE') or c.get('Is_nullable'),
-            'column_key': c.get('column_key') or c.get('COLUMN_KEY') or c.get('Column_key'),
-        })
-    return norm
+    return [dict(c) for c in _schema()[1].get(table_name, [])]
 
 
 def get_table_sample(table_name, limit=10):
     """Return up to `limit` rows from `table_name`. Validates table exists first."""
-    # Validate table exists
-    tables = [t['table'] for t in get_tables()]
-    if table_name not in tables:
+    # Validate table exists (served from the schema cache)
+    if not table_exists(table_name):
         raise ValueError('Unknown table')
-    # Build and execute safe query
-    conn = get_connection()
-    cur = conn.cursor(dictionary=True)
     # Note: table name cannot be parameterized, so validate above then use backticks
     q = f"SELECT * FROM `{table_name}` LIMIT %s"
-    cur.execute(q, (limit,))
-    rows = cur.fetchall()
-    cur.close()
-    conn.close()
-    return rows
+    return fetchall(q, (limit,))
+
+def iter_table_chunks(table_name, columns=None, after_id=None, chunk_size=2000):
+    """Stream a whole table for export without buffering it in memory.
+
+    Validates the table and requested columns against the schema cache up front
+    (so bad input fails before any bytes are sent) and returns
+    (column_names, chunks) where `chunks` yields lists of row tuples read with
+    fetchmany() from an unbuffered cursor. Rows come out in id order when the
+    table has an `id` column; `after_id` resumes an interrupted export.
+    """
+    if not table_exists(table_name):
+        raise ValueError('Unknown table')
+    known = [c['column_name'] for c in get_table_columns(table_name)]
+    columns = list(columns or known)
+    unknown = [c for c in columns if c not in known]
+    if unknown:
+        raise ValueError('Unknown column(s): ' + ', '.join(unknown))
+    has_id = 'id' in known
+    if after_id is not None and not has_id:
+        raise ValueError('after_id requires a table with an id column')
+    q = "SELECT " + ', '.join(f"`{c}`" for c in columns) + f" FROM `{table_name}`"
+    params = ()
+    if after_id is not None:
+        q += " WHERE id > %s"
+        params = (int(after_id),)
+    if has_id:
+        q += " ORDER BY id"
+
+    def chunks():
+        # The response body is produced after the request has been torn down,
+        # so the export borrows its own connection rather than the request one.
+        conn = PooledConnection(get_pool(), get_pool().acquire())
+        cur = None
+        finished = False
+        try:
+            cur = conn.cursor(buffered=False)
+            cur.execute(q, params)
+            while True:
+                rows = cur.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield rows
+            finished = True
+        finally:
+            if not finished:
+                # abandoned part way (client went away): closing the cursor or
+                # rolling back would first read the rest of the result from
+                # MySQL, so drop the connection instead (as _SelectStream does)
+                conn.discard()
+            else:
+                try:
+                    cur.close()
+                    conn.close()
+                except Exception:
+                    conn.discard()
+
+    return columns, chunks()
+
+
+def _execute(query, params=None, commit=True):
+    conn = get_connection()
+    start = time.time()
+    failed = True
+    try:
+        cur = conn.cursor()
+        cur.execute(query, params or ())
+        # inside models.transaction() the enclosing block commits
+        if commit and getattr(_local, 'tx_conn', None) is None:
+            conn.commit()
+        result = (cur.lastrowid, cur.rowcount)
+        cur.close()
+        failed = False
+    finally:
+        conn.close()
+        metrics.record_query(query, time.time() - start, failed)
+    return result
 
 def execute(query, params=None, commit=True):
+    """Run a write statement; returns the new row's id for INSERTs."""
+    return _execute(query, params, commit)[0]
+
+def execute_rowcount(query, params=None, commit=True):
+    """Run a write statement; returns the number of rows it changed."""
+    return _execute(query, params, commit)[1]
+
+# Keyset pagination
+# Each list source maps the public column names a client may ask for to the
+# SQL expression that produces them. Pages are ordered newest first, so the
+# cursor `after_id` means "rows with a smaller id than this one". `search`
+# lists the columns ?q= matches by prefix (for typeahead pickers) and `label`
+# the column that names a row in them.
+PAGE_SIZE_DEFAULT = 50
+PAGE_SIZE_MAX = 500
+
+_LIST_SOURCES = {
+    'students': {
+        'from': 'students s',
+        'id': 's.id',
+        'columns': {
+            'id': 's.id', 'name': 's.name', 'email': 's.email', 'phone': 's.phone',
+            'branch': 's.branch', 'created_at': 's.created_at', 'updated_at': 's.updated_at',
+        },
+        'search': ('s.name', 's.email'),
+        'label': 's.name',
+    },
+    'companies': {
+        'from': 'companies c',
+        'id': 'c.id',
+        'columns': {
+            'id': 'c.id', 'name': 'c.name', 'contact_person': 'c.contact_person', 'email': 'c.email',
+            'phone': 'c.phone', 'created_at': 'c.created_at', 'updated_at': 'c.updated_at',
+        },
+        'search': ('c.name',),
+        'label': 'c.name',
+    },
+    'internships': {
+        'from': 'internships i LEFT JOIN companies c ON i.company_id = c.id',
+        'id': 'i.id',
+        'columns': {
+            'id': 'i.id', 'title': 'i.title', 'company_id': 'i.company_id', 'start_date': 'i.start_date',
+            'end_date': 'i.end_date', 'stipend': 'i.stipend', 'seats': 'i.seats',
+            'description': 'i.description', 'created_at': 'i.created_at', 'updated_at': 'i.updated_at',
+            'company_name': 'c.name',
+        },
+        'search': ('i.title',),
+        'label': 'i.title',
+    },
+    'applications': {
+        'from': ('applications a LEFT JOIN students s ON a.student_id = s.id '
+                 'LEFT JOIN internships i ON a.internship_id = i.id '
+                 'LEFT JOIN companies c ON i.company_id = c.id'),
+        'id': 'a.id',
+        'columns': {
+            'id': 'a.id', 'student_id': 'a.student_id', 'internship_id': 'a.internship_id',
+            'status': 'a.status', 'applied_at': 'a.applied_at', 'updated_at': 'a.updated_at',
+            'student_name': 's.name', 'student_email': 's.email', 'internship_title': 'i.title',
+            'company_name': 'c.name',
+        },
+    },
+}
+
+
+def _select_list(source, fields):
+    """Build the SELECT list for `fields` (all columns when empty); `id` is always included."""
+    columns = source['columns']
+    fields = list(fields or columns.keys())
+    unknown = [f for f in fields if f not in columns]
+    if unknown:
+        raise ValueError('Unknown column(s): ' + ', '.join(unknown))
+    if 'id' not in fields:
+        fields.insert(0, 'id')
+    return ', '.join(f"{columns[f]} AS `{f}`" for f in fields)
+
+
+def _keyset_page(source, limit=None, after_id=None, fields=None, where=None, params=(), q=None):
+    """Fetch one page of `source` ordered by id DESC, starting below `after_id`.
+
+    Returns {'rows': [...], 'next_after_id': id-or-None, 'has_more': bool}. One
+    extra row is fetched to know whether another page exists, so the cost of a
+    page depends on its size, not on the table size. `q` keeps the rows whose
+    search columns start with it.
+    """
+    limit = max(1, min(int(limit or PAGE_SIZE_DEFAULT), PAGE_SIZE_MAX))
+    conditions = list(where or [])
+    params = list(params)
+    if q and q.strip():
+        if not source.get('search'):
+            raise ValueError('Search is not supported for this list')
+        like = q.strip().replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+        conditions.append('(' + ' OR '.join(f'{c} LIKE %s' for c in source['search']) + ')')
+        params += [like] * len(source['search'])
+    if after_id:
+        conditions.append(f"{source['id']} < %s")
+        params.append(int(after_id))
+    q = f"SELECT {_select_list(source, fields)} FROM {source['from']}"
+    if conditions:
+        q += ' WHERE ' + ' AND '.join(conditions)
+    q += f" ORDER BY {source['id']} DESC LIMIT %s"
+    params.append(limit + 1)
+    rows = fetchall(q, tuple(params))
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return {
+        'rows': rows,
+        'next_after_id': rows[-1]['id'] if has_more else None,
+        'has_more': has_more,
+    }
+
+
+def get_students_page(limit=None, after_id=None, fields=None, q=None):
+    return _keyset_page(_LIST_SOURCES['students'], limit, after_id, fields, q=q)
+
+def get_companies_page(limit=None, after_id=None, fields=None, q=None):
+    key = ('page', limit, after_id, tuple(fields or ()), q)
+    return _catalog_read('companies', key,
+                         lambda: _keyset_page(_LIST_SOURCES['companies'], limit, after_id, fields, q=q))
+
+def get_internships_page(limit=None, after_id=None, fields=None, q=None):
+    key = ('page', limit, after_id, tuple(fields or ()), q)
+    return _catalog_read('internships', key,
+                         lambda: _keyset_page(_LIST_SOURCES['internships'], limit, after_id, fields, q=q))
+
+def get_applications_page(limit=None, after_id=None, fields=None, q=None, student_id=None, company_id=None):
+    """A page of applications, limited to one student's or one company's when given."""
+    where, params = [], []
+    if student_id is not None:
+        where.append('a.student_id = %s')
+        params.append(int(student_id))
+    if company_id is not None:
+        where.append('i.company_id = %s')
+        params.append(int(company_id))
+    return _keyset_page(_LIST_SOURCES['applications'], limit, after_id, fields, where, params, q=q)
+
+def get_list_labels(entity, ids):
+    """{id: label} for the given ids of a list source, e.g. to show the
+    internship a filter is set to without loading every internship."""
+    source = _LIST_SOURCES[entity]
+    ids = [int(i) for i in ids if i not in (None, '')]
+    if not ids:
+        return {}
+    marks = ', '.join(['%s'] * len(ids))
+    rows = fetchall(f"SELECT {source['id']} AS id, {source['label']} AS label FROM {source['from']} "
+                    f"WHERE {source['id']} IN ({marks})", tuple(ids))
+    return {r['id']: r['label'] for r in rows}
+
+# Application queries
+# Filtered, sorted listing for the applications page and API. Pages use a
+# keyset cursor over (sort column, id), which the composite indexes
+# idx_status_applied / idx_internship_applied / idx_student_applied /
+# idx_applied_at serve directly for the common filter + date-sort cases.
+APPLICATION_SORTS = {'applied_at': 'a.applied_at', 'updated_at': 'a.updated_at', 'status': 'a.status', 'id': 'a.id'}
+
+def _encode_cursor(value, row_id):
+    raw = json.dumps([None if value is None else str(value), row_id]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def _decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        value, row_id = json.loads(raw.decode('utf-8'))
+        return value, int(row_id)
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor')
+
+def query_applications(status=None, internship_id=None, company_id=None, student_id=None,
+                       applied_from=None, applied_to=None, q=None, sort='applied_at', order='desc',
+                       limit=None, cursor=None):
+    """Filter, sort and page applications.
+
+    applied_from/applied_to are inclusive dates; q matches student name,
+    internship title or company name (a substring match, applied after the
+    indexed filters). Returns {'rows', 'next_cursor', 'has_more'}; pass
+    next_cursor back as `cursor` with the same filters for the next page.
+    """
+    if sort not in APPLICATION_SORTS:
+        raise ValueError('sort must be one of: ' + ', '.join(APPLICATION_SORTS))
+    order = (order or 'desc').lower()
+    if order not in ('asc', 'desc'):
+        raise ValueError('order must be asc or desc')
+    limit = max(1, min(int(limit or PAGE_SIZE_DEFAULT), PAGE_SIZE_MAX))
+    source = _LIST_SOURCES['applications']
+    conditions, params = [], []
+    if status:
+        conditions.append('a.status = %s')
+        params.append(status)
+    for column, value, name in (('a.internship_id', internship_id, 'internship_id'),
+                                ('i.company_id', company_id, 'company_id'),
+                                ('a.student_id', student_id, 'student_id')):
+        if value not in (None, ''):
+            conditions.append(f'{column} = %s')
+            params.append(_number_arg(value, name, int))
+    if applied_from:
+        conditions.append('a.applied_at >= %s')
+        params.append(_date_arg(applied_from, 'applied_from'))
+    if applied_to:
+        conditions.append('a.applied_at < %s')
+        params.append(_date_arg(applied_to, 'applied_to') + datetime.timedelta(days=1))
+    if q and q.strip():
+        like = '%' + q.strip().replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+        conditions.append('(s.name LIKE %s OR i.title LIKE %s OR c.name LIKE %s)')
+        params += [like, like, like]
+    column = APPLICATION_SORTS[sort]
+    op = '<' if order == 'desc' else '>'
+    if cursor:
+        value, last_id = _decode_cursor(cursor)
+        if sort == 'id':
+            conditions.append(f'a.id {op} %s')
+            params.append(last_id)
+        else:
+            conditions.append(f'({column} {op} %s OR ({column} = %s AND a.id {op} %s))')
+            params += [value, value, last_id]
+    query = f"SELECT {_select_list(source, None)} FROM {source['from']}"
+    if conditions:
+        query += ' WHERE ' + ' AND '.join(conditions)
+    query += f' ORDER BY {column} {order.upper()}'
+    if sort != 'id':
+        query += f', a.id {order.upper()}'
+    query += ' LIMIT %s'
+    rows = fetchall(query, tuple(params + [limit + 1]))
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = None
+    if has_more:
+        last = rows[-1]
+        next_cursor = _encode_cursor(last[sort] if sort != 'id' else None, last['id'])
+    return {'rows': rows, 'next_cursor': next_cursor, 'has_more': has_more}
+
+# Changes feed
+# A client keeps a list in sync by asking for what changed since its cursor:
+# rows in (updated_at, id) order, read through the idx_updated_at indexes,
+# plus the ids of deleted rows from the tombstones table. The delete functions
+# below write tombstones in the same transaction as the delete, including
+# applications removed by a cascade. Rows updated in the last few seconds
+# are held back (settle_seconds) so a write still in flight with an earlier
+# updated_at is not skipped once the cursor has moved past it.
+CHANGE_ENTITIES = ('students', 'companies', 'internships', 'applications')
+TOMBSTONE_PURGE_INTERVAL = 3600
+_last_tombstone_purge = 0.0
+
+
+class CursorExpired(ValueError):
+    """Raised for a changes cursor older than the tombstone retention; reload the full list."""
+    pass
+
+
+def _encode_changes_cursor(updated_at, row_id, tombstone_id):
+    raw = json.dumps([None if updated_at is None else str(updated_at), row_id, tombstone_id,
+                      int(time.time())]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def _decode_changes_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        updated_at, row_id, tombstone_id, issued = json.loads(raw.decode('utf-8'))
+        return updated_at, int(row_id), int(tombstone_id), int(issued)
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor')
+
+def _changes_source(entity):
+    if entity not in CHANGE_ENTITIES:
+        raise ValueError('entity must be one of: ' + ', '.join(CHANGE_ENTITIES))
+    return _LIST_SOURCES[entity]
+
+def _last_tombstone(entity):
+    rows = fetchall("SELECT COALESCE(MAX(id), 0) AS id FROM tombstones "
+                    "WHERE entity = %s AND deleted_at < NOW() - INTERVAL %s SECOND",
+                    (entity, CHANGES_CONFIG['settle_seconds']))
+    return rows[0]['id']
+
+def changes_cursor(entity):
+    """A cursor for get_changes() starting now, for a client that has just loaded the full list."""
+    _changes_source(entity)
+    rows = fetchall("SELECT NOW() - INTERVAL %s SECOND AS since", (CHANGES_CONFIG['settle_seconds'],))
+    return _encode_changes_cursor(rows[0]['since'], 0, _last_tombstone(entity))
+
+def get_changes(entity, cursor=None, limit=None, fields=None, where=None, params=()):
+    """Rows of `entity` changed since `cursor` and the ids of rows deleted since then.
+
+    Returns {'rows', 'deleted', 'next_cursor', 'has_more'}. Without a cursor
+    every row is returned, oldest change first, over as many calls as it
+    takes. Keep calling with next_cursor while has_more is true; apply the
+    rows as upserts and `deleted` as removals. `where`/`params` narrow the
+    rows (not the tombstones) as in _keyset_page. Raises CursorExpired for a
+    cursor issued longer ago than the tombstones are kept.
+    """
+    source = _changes_source(entity)
+    limit = max(1, min(int(limit or PAGE_SIZE_DEFAULT), PAGE_SIZE_MAX))
+    settle = CHANGES_CONFIG['settle_seconds']
+    if cursor:
+        since, last_id, tombstone_id, issued = _decode_changes_cursor(cursor)
+        if issued < time.time() - CHANGES_CONFIG['tombstone_days'] * 86400:
+            raise CursorExpired('Cursor has expired; reload the full list')
+    else:
+        # a first sync has nothing to delete yet
+        since, last_id, tombstone_id = None, 0, _last_tombstone(entity)
+    column, id_column = source['columns']['updated_at'], source['id']
+    conditions = list(where or []) + [f'{column} < NOW() - INTERVAL %s SECOND']
+    params = list(params) + [settle]
+    if since is not None:
+        # the leading >= lets the range scan on idx_updated_at start at the cursor
+        conditions.append(f'{column} >= %s AND ({column} > %s OR {id_column} > %s)')
+        params += [since, since, last_id]
+    fields = list(fields or [])
+    if fields and 'updated_at' not in fields:
+        fields.append('updated_at')
+    query = (f"SELECT {_select_list(source, fields)} FROM {source['from']} WHERE {' AND '.join(conditions)} "
+             f"ORDER BY {column}, {id_column} LIMIT %s")
+    rows = fetchall(query, tuple(params + [limit + 1]))
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if rows:
+        since, last_id = rows[-1]['updated_at'], rows[-1]['id']
+    tombstones = fetchall("SELECT id, row_id FROM tombstones WHERE entity = %s AND id > %s "
+                          "AND deleted_at < NOW() - INTERVAL %s SECOND ORDER BY id LIMIT %s",
+                          (entity, tombstone_id, settle, limit + 1))
+    has_more = has_more or len(tombstones) > limit
+    tombstones = tombstones[:limit]
+    if tombstones:
+        tombstone_id = tombstones[-1]['id']
+    _maybe_purge_tombstones()
+    return {'rows': rows, 'deleted': [t['row_id'] for t in tombstones],
+            'next_cursor': _encode_changes_cursor(since, last_id, tombstone_id), 'has_more': has_more}
+
+def _tombstone(cur, entity, ids):
+    """Record deleted `entity` rows, on `cur` or (when None) through execute."""
+    for chunk in _chunks(list(ids), BATCH_CHUNK_SIZE):
+        marks = ','.join(['(%s,%s)'] * len(chunk))
+        _stats_exec(cur, f"INSERT INTO tombstones (entity, row_id) VALUES {marks}",
+                    tuple(v for i in chunk for v in (entity, i)))
+
+def _tombstone_applications(cur, column, parent_ids):
+    """Tombstones for the applications a student/internship delete cascades to."""
+    ids = []
+    for chunk in _chunks(list(parent_ids), BATCH_CHUNK_SIZE):
+        marks = ','.join(['%s'] * len(chunk))
+        ids += [r[0] for r in _stats_fetch(cur, f"SELECT id FROM applications WHERE {column} IN ({marks}) FOR UPDATE",
+                                           tuple(chunk))]
+    _tombstone(cur, 'applications', ids)
+
+def purge_tombstones(days=None, batch_size=5000):
+    """Delete tombstones older than `days` (default: the configured retention); returns how many."""
+    days = CHANGES_CONFIG['tombstone_days'] if days is None else days
+    total = 0
+    while True:
+        removed = execute_rowcount("DELETE FROM tombstones WHERE deleted_at < NOW() - INTERVAL %s DAY LIMIT %s",
+                                   (days, batch_size))
+        total += removed
+        if removed < batch_size:
+            return total
+
+def _maybe_purge_tombstones():
+    global _last_tombstone_purge
+    now = time.time()
+    if now - _last_tombstone_purge < TOMBSTONE_PURGE_INTERVAL:
+        return
+    _last_tombstone_purge = now
+    try:
+        purge_tombstones()
+    except Error as e:
+        print(f"[WARNING] Could not purge tombstones: {e}")
+
+# Internship search
+# Text matching uses the FULLTEXT indexes from database_setup.sql:
+# ft_title_description on internships(title, description), ft_title on
+# internships(title) (title hits rank double) and ft_name on companies(name).
+# Each word becomes a prefix term, so "dev pyth" finds "Python Developer".
+# Filters narrow the ranked matches; results page by offset since they are
+# ordered by relevance rather than id.
+SEARCH_MIN_TERM = 3  # InnoDB's default innodb_ft_min_token_size
+SEARCH_SNIPPET = 200
+
+def _fulltext_terms(text):
+    """(boolean-mode terms, words too short for the full-text index)."""
+    words = re.findall(r'\w+', text or '', re.UNICODE)
+    return (' '.join(w + '*' for w in words if len(w) >= SEARCH_MIN_TERM),
+            [w for w in words if len(w) < SEARCH_MIN_TERM])
+
+def _date_arg(value, name):
+    try:
+        return datetime.date.fromisoformat(str(value))
+    except ValueError:
+        raise ValueError(f'{name} must be a date (YYYY-MM-DD)')
+
+def _number_arg(value, name, cast=float):
+    try:
+        return cast(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'{name} must be a number')
+
+def search_internships(q=None, start_from=None, start_to=None, min_stipend=None, min_seats=None,
+                       company_id=None, limit=None, offset=0):
+    """Rank internships by `q` (title, description, company name) and filter them.
+
+    min_stipend compares the leading number of the stipend text, e.g. 10000
+    for "10000 INR/month". Rows carry a description_snippet instead of the full
+    description. Returns {'rows', 'next_offset', 'has_more'}.
+    """
+    limit = max(1, min(int(limit or PAGE_SIZE_DEFAULT), PAGE_SIZE_MAX))
+    offset = max(0, int(offset or 0))
+    conditions, params = [], []
+    if start_from:
+        conditions.append('i.start_date >= %s')
+        params.append(_date_arg(start_from, 'start_from'))
+    if start_to:
+        conditions.append('i.start_date <= %s')
+        params.append(_date_arg(start_to, 'start_to'))
+    if min_stipend not in (None, ''):
+        conditions.append('CAST(i.stipend AS DECIMAL(12,2)) >= %s')
+        params.append(_number_arg(min_stipend, 'min_stipend'))
+    if min_seats not in (None, ''):
+        conditions.append('i.seats >= %s')
+        params.append(_number_arg(min_seats, 'min_seats', int))
+    if company_id not in (None, ''):
+        conditions.append('i.company_id = %s')
+        params.append(_number_arg(company_id, 'company_id', int))
+    terms, short = _fulltext_terms(q)
+    for word in short:
+        # "AI", "UX", "QA": too short to be indexed, so match a title word starting with them
+        like = word.replace('_', '\\_')
+        conditions.append('(i.title LIKE %s OR i.title LIKE %s)')
+        params += [like + '%', '% ' + like + '%']
+    key = ('search', terms, tuple(str(p) for p in params), tuple(conditions), limit, offset)
+
+    def load():
+        select = (f"i.id, i.title, i.company_id, c.name AS company_name, i.start_date, i.end_date, "
+                  f"i.stipend, i.seats, LEFT(i.description, {SEARCH_SNIPPET}) AS description_snippet")
+        if terms:
+            hits = """(
+                SELECT id, SUM(score) AS score FROM (
+                    SELECT i.id, MATCH(i.title) AGAINST (%s IN BOOLEAN MODE) * 2
+                               + MATCH(i.title, i.description) AGAINST (%s IN BOOLEAN MODE) AS score
+                    FROM internships i
+                    WHERE MATCH(i.title, i.description) AGAINST (%s IN BOOLEAN MODE)
+                    UNION ALL
+                    SELECT i.id, MATCH(c.name) AGAINST (%s IN BOOLEAN MODE) AS score
+                    FROM companies c JOIN internships i ON i.company_id = c.id
+                    WHERE MATCH(c.name) AGAINST (%s IN BOOLEAN MODE)
+                ) m GROUP BY id
+            ) h"""
+            query = (f"SELECT {select}, h.score FROM {hits} JOIN internships i ON i.id = h.id "
+                     f"LEFT JOIN companies c ON i.company_id = c.id")
+            order = 'h.score DESC, i.id DESC'
+            args = [terms] * 5 + params
+        else:
+            query = f"SELECT {select} FROM internships i LEFT JOIN companies c ON i.company_id = c.id"
+            order = 'i.id DESC'
+            args = list(params)
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        query += f' ORDER BY {order} LIMIT %s OFFSET %s'
+        rows = fetchall(query, tuple(args + [limit + 1, offset]))
+        has_more = len(rows) > limit
+        return {'rows': rows[:limit], 'next_offset': offset + limit if has_more else None, 'has_more': has_more}
+
+    return _catalog_read('internships', key, load)
+
+# Catalog cache
+# Internship and company listings are read far more often than they change.
+# Reads go through the configured cache backend under a versioned key; every
+# write bumps the namespace version after committing, so the next read misses
+# and reloads. Companies are embedded in internship rows (company_name), so
+# company writes bump both namespaces. Cached rows are shared: treat them as
+# read-only.
+_catalog_cache = None
+_catalog_cache_lock = threading.Lock()
+
+
+def catalog_cache():
+    global _catalog_cache
+    if _catalog_cache is None:
+        with _catalog_cache_lock:
+            if _catalog_cache is None:
+                _catalog_cache = cache.make_cache(CATALOG_CACHE)
+    return _catalog_cache
+
+
+def catalog_version(namespace):
+    return catalog_cache().get_counter('version:' + namespace)
+
+
+def _fresh_snapshot():
+    """End the read view the request's connection may hold from an earlier
+    read, so a load cached under the version just read can't return rows
+    older than that version (REPEATABLE READ keeps the first snapshot until
+    the transaction ends). Not inside transaction(): it reads its own writes."""
+    if getattr(_local, 'tx_conn', None) is not None:
+        return
+    conn = getattr(_local, 'conn', None)
+    if conn is not None and conn.in_transaction:
+        conn.rollback()
+
+
+def _catalog_read(namespace, key, loader):
+    backend = catalog_cache()
+    full_key = f"{namespace}:{catalog_version(namespace)}:{key!r}"
+    value = backend.get(full_key)
+    if value is cache.MISSING:
+        _fresh_snapshot()
+        value = loader()
+        backend.set(full_key, value, CATALOG_CACHE.get('ttl'))
+    return value
+
+
+def bump_catalog_version(*namespaces):
+    """Invalidate cached catalog reads once the current write is committed.
+
+    Also drops this worker's dashboard summaries, which count the same
+    tables; other workers' summaries expire after DASHBOARD_CACHE_TTL.
+    """
+    def bump():
+        now = int(time.time())
+        for namespace in namespaces:
+            catalog_cache().incr('version:' + namespace)
+            catalog_cache().set_counter('modified:' + namespace, now)
+        if any(ns in VERSIONED_TABLES for ns in namespaces):
+            invalidate_dashboard_cache()
+    after_commit(bump)
+
+
+# Validators for conditional GETs. Every write to these tables bumps version
+# counters in the catalog cache, but only a shared cache backend (sqlite) sees
+# the bumps of every worker and of the command-line scripts; the memory
+# backend keeps them per process. So the counters answer only when the
+# backend is shared, and otherwise each table's COUNT(*) and MAX(updated_at)
+# are read from MySQL. Writes made with plain SQL are only seen by the latter.
+VERSIONED_TABLES = ('students', 'companies', 'internships', 'applications')
+
+
+def resource_validator(*namespaces):
+    """Return (etag, last_modified) for data derived from `namespaces`, or
+    None when no validator can be trusted yet.
+
+    last_modified is a unix timestamp, left out while its second is still
+    running (If-Modified-Since has whole-second resolution, so a second write
+    in the same second would otherwise be answered with a 304).
+    """
+    backend = catalog_cache()
+    if backend.shared:
+        versions = [f"{ns}.{catalog_version(ns)}" for ns in namespaces]
+        etag = f"{backend.epoch():x}-" + '-'.join(versions)
+        modified = max(backend.get_counter('modified:' + ns) for ns in namespaces) or None
+        return etag, (modified if modified and modified < int(time.time()) else None)
+    q = ' UNION ALL '.join(f"SELECT '{ns}' AS ns, COUNT(*) AS cnt, UNIX_TIMESTAMP(MAX(updated_at)) AS modified, "
+                           f"UNIX_TIMESTAMP() AS now FROM `{ns}`" for ns in namespaces if ns in VERSIONED_TABLES)
+    rows = sorted(fetchall(q), key=lambda r: namespaces.index(r['ns']))
+    stamps = [int(r['modified']) for r in rows if r['modified'] is not None]
+    modified = max(stamps) if stamps else None
+    # updated_at has whole seconds too: until a write's second (plus commit
+    # lag) has passed, a later write could leave the same COUNT and MAX
+    if modified is not None and int(rows[0]['now']) - modified < CHANGES_CONFIG['settle_seconds']:
+        return None
+    etag = 'db-' + '-'.join(f"{r['ns']}.{r['cnt']}.{r['modified']}" for r in rows)
+    return etag, modified
+
+
+def table_validator(table_name):
+    """Validator for an arbitrary table: resource_validator() for the tables
+    the app writes, otherwise MAX(updated_at) plus row count (or None if the
+    table has no updated_at column)."""
+    if table_name in VERSIONED_TABLES:
+        return resource_validator(table_name)
+    if not table_exists(table_name):
+        return None
+    if 'updated_at' not in [c['column_name'] for c in get_table_columns(table_name)]:
+        return None
+    row = fetchall(f"SELECT COUNT(*) AS cnt, UNIX_TIMESTAMP(MAX(updated_at)) AS modified, "
+                   f"UNIX_TIMESTAMP() AS now FROM `{table_name}`")[0]
+    stamp = int(row['modified']) if row['modified'] is not None else None
+    # same guard as resource_validator: a write in the newest second could
+    # still leave COUNT and MAX unchanged
+    if stamp is not None and int(row['now']) - stamp < CHANGES_CONFIG['settle_seconds']:
+        return None
+    return f"{table_name}.{row['cnt']}.{stamp}", stamp
+
+
+def schema_validator():
+    """Validator for data served from the schema cache."""
+    _schema()
+    loaded_at = int(_schema_cache['loaded_at'])
+    return f"schema.{loaded_at}", loaded_at
+
+
+def catalog_cache_stats():
+    stats = catalog_cache().stats()
+    stats['versions'] = {ns: catalog_version(ns) for ns in ('companies', 'internships')}
+    return stats
+
+
+# Validation shared by the single-row APIs and bulk import. Each validator
+# takes a dict of submitted fields and returns the INSERT parameter tuple, or
+# raises ValueError with a message suitable for the client.
+EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+
+def _blank_to_none(value):
+    if isinstance(value, str) and not value.strip():
+        return None
+    return value
+
+def _scalar(data, key):
+    """data[key] if it is a string or a number (or missing); JSON lists and
+    objects are rejected so one bad row can't crash a whole import."""
+    if not isinstance(data, dict):
+        raise ValueError('Expected a JSON object')
+    value = data.get(key)
+    if value is not None and (isinstance(value, bool) or not isinstance(value, (str, int, float))):
+        raise ValueError(f'Invalid {key}')
+    return value
+
+def _text(data, key):
+    value = _scalar(data, key)
+    return str(value).strip() if value is not None else ''
+
+def validate_student(data):
+    name = _text(data, 'name')
+    email = _text(data, 'email')
+    if not name:
+        raise ValueError('Name is required')
+    if email and not EMAIL_RE.match(email):
+        raise ValueError('Invalid email')
+    return (name, email or None, _scalar(data, 'phone'), _scalar(data, 'branch'))
+
+def validate_company(data):
+    name = _text(data, 'name')
+    if not name:
+        raise ValueError('Name is required')
+    return (name, _scalar(data, 'contact_person'), _scalar(data, 'email'), _scalar(data, 'phone'))
+
+def validate_internship(data):
+    title = _text(data, 'title')
+    if not title:
+        raise ValueError('Title is required')
+    return (title, _blank_to_none(_scalar(data, 'company_id')), _blank_to_none(_scalar(data, 'start_date')),
+            _blank_to_none(_scalar(data, 'end_date')), _scalar(data, 'stipend'), _blank_to_none(_scalar(data, 'seats')),
+            _scalar(data, 'description'))
+
+IMPORT_TARGETS = {
+    'students': (validate_student,
+                 "INSERT INTO students (name, email, phone, branch) VALUES (%s,%s,%s,%s)"),
+    'companies': (validate_company,
+                  "INSERT INTO companies (name, contact_person, email, phone) VALUES (%s,%s,%s,%s)"),
+    'internships': (validate_internship,
+                    "INSERT INTO internships (title, company_id, start_date, end_date, stipend, seats, description) VALUES (%s,%s,%s,%s,%s,%s,%s)"),
+}
+
+
+def bulk_insert(entity, rows, batch_size=1000):
+    """Validate and insert many rows of `entity` ('students', 'companies', 'internships').
+
+    Valid rows are written with executemany() (which mysql-connector folds into
+    multi-row INSERTs), one transaction per `batch_size` rows. If a batch is
+    rejected by the database (e.g. a duplicate email) it is rolled back and
+    retried row by row so only the offending rows are reported.
+
+    Returns {'total', 'inserted', 'errors': [{'row': index, 'error': msg}]}.
+    """
+    if entity not in IMPORT_TARGETS:
+        raise ValueError('Unknown import target')
+    validate, insert_sql = IMPORT_TARGETS[entity]
+    batch_size = max(1, int(batch_size))
+    errors = []
+    valid = []
+    for idx, row in enumerate(rows):
+        try:
+            if not isinstance(row, dict):
+                raise ValueError('Row must be an object')
+            valid.append((idx, validate(row)))
+        except ValueError as ve:
+            errors.append({'row': idx, 'error': str(ve)})
+    inserted = 0
     conn = get_connection()
-    cur = conn.cursor()
-    cur.execute(query, params or ())
-    if commit:
-        conn.commit()
-    lastrowid = cur.lastrowid
-    cur.close()
-    conn.close()
-    return lastrowid
+    try:
+        cur = conn.cursor()
+        for start in range(0, len(valid), batch_size):
+            batch = valid[start:start + batch_size]
+            try:
+                cur.executemany(insert_sql, [params for _, params in batch])
+                conn.commit()
+                inserted += len(batch)
+                continue
+            except Error:
+                conn.rollback()
+            # isolate the bad rows
+            for idx, params in batch:
+                try:
+                    cur.execute(insert_sql, params)
+                    inserted += 1
+                except Error as e:
+                    errors.append({'row': idx, 'error': str(e)})
+            conn.commit()
+        cur.close()
+    finally:
+        conn.close()
+    if inserted and entity == 'companies':
+        bump_catalog_version('companies', 'internships')
+    elif inserted and entity == 'students':
+        bump_catalog_version('students')
+    elif inserted:
+        bump_catalog_version(entity)
+    errors.sort(key=lambda e: e['row'])
+    return {'total': len(rows), 'inserted': inserted, 'errors': errors}
 
 # Students
 def get_students():
     return fetchall("SELECT * FROM students ORDER BY id DESC")
 
-def add_student(name, email, phone, branch):
-    return execute(
-        "INSERT INTO students (name, email, phone, branch) VALUES (%s,%s,%s,%s)",
-        (name, email, phone, branch),
+def add_student(name, email, phone, branch, user_id=None):
+    sid = execute(
+        "INSERT INTO students (name, email, phone, branch, user_id) VALUES (%s,%s,%s,%s,%s)",
+        (name, email, phone, branch, user_id),
     )
+    bump_catalog_version('students')
+    return sid
 
 def update_student(student_id, name, email, phone, branch):
-    return execute(
+    result = execute(
         "UPDATE students SET name=%s, email=%s, phone=%s, branch=%s WHERE id=%s",
         (name, email, phone, branch, student_id),
     )
+    bump_catalog_version('students', 'applications')
+    return result
 
 def delete_student(student_id):
-    return execute("DELETE FROM students WHERE id=%s", (student_id,))
+    with transaction():
+        # the cascade removes the student's applications; take them off the counters too
+        _apply_stats(_stats_for_students([student_id]), sign=-1)
+        _tombstone_applications(None, 'student_id', [student_id])
+        result = execute_rowcount("DELETE FROM students WHERE id=%s", (student_id,))
+        if result:
+            _tombstone(None, 'students', [student_id])
+    bump_catalog_version('students', 'applications')
+    return result
 
 # Companies
 def get_companies():
-    return fetchall("SELECT * FROM companies ORDER BY id DESC")
+    return _catalog_read('companies', 'all', lambda: fetchall("SELECT * FROM companies ORDER BY id DESC"))
 
-def add_company(name, contact_person, email, phone):
-    return execute(
-        "INSERT INTO companies (name, contact_person, email, phone) VALUES (%s,%s,%s,%s)",
-        (name, contact_person, email, phone),
+def add_company(name, contact_person, email, phone, user_id=None):
+    cid = execute(
+        "INSERT INTO companies (name, contact_person, email, phone, user_id) VALUES (%s,%s,%s,%s,%s)",
+        (name, contact_person, email, phone, user_id),
     )
+    bump_catalog_version('companies', 'internships')
+    return cid
 
 def update_company(company_id, name, contact_person, email, phone):
-    return execute(
+    result = execute(
         "UPDATE companies SET name=%s, contact_person=%s, email=%s, phone=%s WHERE id=%s",
         (name, contact_person, email, phone, company_id),
     )
+    bump_catalog_version('companies', 'internships')
+    return result
 
 def delete_company(company_id):
-    return execute("DELETE FROM companies WHERE id=%s", (company_id,))
+    with transaction():
+        # detach the internships here rather than through ON DELETE SET NULL,
+        # so their updated_at moves and the changes feed sends them
+        execute("UPDATE internships SET company_id = NULL WHERE company_id = %s", (company_id,))
+        result = execute_rowcount("DELETE FROM companies WHERE id=%s", (company_id,))
+        if result:
+            _tombstone(None, 'companies', [company_id])
+    bump_catalog_version('companies', 'internships')
+    return result
 
 # Internships
 def get_internships():
-    return fetchall(
+    return _catalog_read('internships', 'all', lambda: fetchall(
         "SELECT i.*, c.name AS company_name FROM internships i LEFT JOIN companies c ON i.company_id = c.id ORDER BY i.id DESC"
-    )
+    ))
 
 def add_internship(title, company_id, start_date, end_date, stipend, seats, description):
-    return execute(
+    iid = execute(
         "INSERT INTO internships (title, company_id, start_date, end_date, stipend, seats, description) VALUES (%s,%s,%s,%s,%s,%s,%s)",
         (title, company_id, start_date, end_date, stipend, seats, description),
     )
+    bump_catalog_version('internships')
+    return iid
 
 def update_internship(iid, title, company_id, start_date, end_date, stipend, seats, description):
-    return execute(
-        "UPDATE internships SET title=%s, company_id=%s, start_date=%s, end_date=%s, stipend=%s, seats=%s, description=%s WHERE id=%s",
-        (title, company_id, start_date, end_date, stipend, seats, description, iid),
-    )
+    with transaction():
+        result = execute(
+            "UPDATE internships SET title=%s, company_id=%s, start_date=%s, end_date=%s, stipend=%s, seats=%s, description=%s WHERE id=%s",
+            (title, company_id, start_date, end_date, stipend, seats, description, iid),
+        )
+        execute("UPDATE internship_stats SET seats_remaining = COALESCE(%s, 0) - selected WHERE internship_id = %s",
+                (seats, iid))
+    bump_catalog_version('internships', 'applications')
+    return result
 
 def delete_internship(iid):
-    return execute("DELETE FROM internships WHERE id=%s", (iid,))
+    with transaction():
+        _tombstone_applications(None, 'internship_id', [iid])
+        result = execute_rowcount("DELETE FROM internships WHERE id=%s", (iid,))
+        if result:
+            _tombstone(None, 'internships', [iid])
+    bump_catalog_version('internships', 'applications')
+    return result
 
 # Applications
 def get_applications():
@@ -176,16 +1479,769 @@ def get_applications():
     )
 
 def add_application(student_id, internship_id, status='Applied'):
-    return execute(
-        "INSERT INTO applications (student_id, internship_id, status) VALUES (%s,%s,%s)",
-        (student_id, internship_id, status),
-    )
+    with transaction():
+        # counters first: a recount of a missing stats row must not see this row yet
+        _apply_stats(_stats_delta({}, internship_id, status))
+        aid = execute(
+            "INSERT INTO applications (student_id, internship_id, status) VALUES (%s,%s,%s)",
+            (student_id, internship_id, status),
+        )
+        _publish_status({aid: None})
+    bump_catalog_version('applications')
+    return aid
 
 def update_application(app_id, status):
-    return execute("UPDATE applications SET status=%s WHERE id=%s", (status, app_id))
+    """Change an application's status; raises SeatsFull when selecting it would overbook."""
+    with transaction():
+        rows = fetchall("SELECT internship_id, status FROM applications WHERE id=%s FOR UPDATE", (app_id,))
+        if rows and rows[0]['status'] != status:
+            deltas = _stats_delta({}, rows[0]['internship_id'], rows[0]['status'], -1)
+            _apply_stats(_stats_delta(deltas, rows[0]['internship_id'], status))
+            _publish_status({app_id: rows[0]['status']})
+        result = execute("UPDATE applications SET status=%s WHERE id=%s", (status, app_id))
+    bump_catalog_version('applications')
+    return result
 
 def delete_application(app_id):
-    return execute("DELETE FROM applications WHERE id=%s", (app_id,))
+    with transaction():
+        rows = fetchall("SELECT internship_id, status FROM applications WHERE id=%s FOR UPDATE", (app_id,))
+        if rows:
+            # counters before the delete, like every other write
+            _apply_stats(_stats_delta({}, rows[0]['internship_id'], rows[0]['status'], -1))
+        result = execute("DELETE FROM applications WHERE id=%s", (app_id,))
+        if rows:
+            _tombstone(None, 'applications', [app_id])
+    bump_catalog_version('applications')
+    return result
+
+
+# Application submissions
+# add_applications() is the flush behind submissions.py: every submission
+# queued during a few milliseconds is written by one multi-row INSERT and one
+# commit, instead of one transaction (and one log flush) per request.
+
+DEADLOCK_ERRNOS = (1205, 1213)  # lock wait timeout, deadlock
+SUBMIT_RETRIES = 3
+
+
+def _application_ids(cur, pairs, lock=''):
+    """{(student_id, internship_id): application id} for the pairs that exist."""
+    found = {}
+    for chunk in _chunks(pairs, BATCH_CHUNK_SIZE):
+        marks = ','.join(['(%s,%s)'] * len(chunk))
+        cur.execute(f"SELECT student_id, internship_id, id FROM applications "
+                    f"WHERE (student_id, internship_id) IN ({marks}) {lock}", [v for p in chunk for v in p])
+        found.update(((r[0], r[1]), r[2]) for r in cur.fetchall())
+    return found
+
+
+def _add_applications(pairs):
+    unique = list(dict.fromkeys(pairs))
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        # share-lock the parents so a concurrent delete cannot fail the whole insert
+        students = _existing_ids(cur, 'students', sorted({s for s, _ in unique}), 'LOCK IN SHARE MODE')
+        internships = _existing_ids(cur, 'internships', sorted({i for _, i in unique}), 'LOCK IN SHARE MODE')
+        valid = [p for p in unique if p[0] in students and p[1] in internships]
+        # the locking read also locks the gaps of missing pairs, so nobody else
+        # can insert them before this commits and every new row is counted once
+        existing = _application_ids(cur, valid, 'FOR UPDATE')
+        new = [p for p in valid if p not in existing]
+        deltas = {}
+        for _, internship_id in new:
+            _stats_delta(deltas, internship_id, 'Applied')
+        _apply_stats(deltas, cur)
+        for chunk in _chunks(new, BATCH_CHUNK_SIZE):
+            marks = ','.join(["(%s,%s,'Applied')"] * len(chunk))
+            cur.execute(f"INSERT INTO applications (student_id, internship_id, status) VALUES {marks}",
+                        [v for p in chunk for v in p])
+        created = _application_ids(cur, new)
+        conn.commit()
+        cur.close()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    if new:
+        bump_catalog_version('applications')
+        _publish_status({created[p]: None for p in new})
+    results, seen = [], set()
+    for pair in pairs:
+        if pair in created and pair not in seen:
+            results.append(('created', created[pair]))
+        elif pair in created or pair in existing:
+            results.append(('duplicate', created.get(pair) or existing[pair]))
+        else:
+            results.append(('invalid', None))
+        seen.add(pair)
+    return results
+
+
+def add_applications(pairs):
+    """Insert many (student_id, internship_id) applications in one transaction.
+
+    Returns one (outcome, application id) per pair, in order: 'created',
+    'duplicate' (already applied; the existing id) or 'invalid' (no such
+    student or internship; None). A pair repeated within `pairs` is a
+    duplicate of its first occurrence. Deadlocks retry the whole batch.
+    """
+    pairs = [(int(s), int(i)) for s, i in pairs]
+    if not pairs:
+        return []
+    for attempt in range(SUBMIT_RETRIES):
+        try:
+            return _add_applications(pairs)
+        except Error as e:
+            if e.errno not in DEADLOCK_ERRNOS or attempt == SUBMIT_RETRIES - 1:
+                raise
+            time.sleep(0.01 * (attempt + 1))
+
+
+# Status events
+# Every committed write that creates an application or changes its status is
+# published through events.py, which streams it to the student and the
+# company concerned (/api/events) so their dashboards need not poll.
+
+def _publish_status(previous):
+    """After the current transaction commits, publish an event for each
+    application in {application_id: previous status, or None when new}."""
+    if previous:
+        after_commit(lambda: _send_status_events(previous))
+
+
+def _send_status_events(previous):
+    # one lookup for the whole write; a failure here must not fail the write
+    try:
+        rows = []
+        for chunk in _chunks(sorted(previous), BATCH_CHUNK_SIZE):
+            marks = ','.join(['%s'] * len(chunk))
+            rows += fetchall(f"""
+                SELECT a.id, a.student_id, a.internship_id, a.status, i.company_id, i.title AS internship_title
+                FROM applications a LEFT JOIN internships i ON i.id = a.internship_id
+                WHERE a.id IN ({marks})
+            """, tuple(chunk))
+        for r in rows:
+            events.publish({'type': 'application_status', 'application_id': r['id'], 'student_id': r['student_id'],
+                            'internship_id': r['internship_id'], 'company_id': r['company_id'],
+                            'internship_title': r['internship_title'], 'status': r['status'],
+                            'previous_status': previous[r['id']]})
+    except Exception as e:
+        print(f"[WARNING] Could not publish application events: {e}")
+
+
+# Seat allocation
+# A selection takes one of the internship's seats_remaining in internship_stats
+# with a conditional decrement (see _apply_stats), so two companies users
+# racing for the last seat cannot both win, and selections for different
+# internships only lock their own counter row. Every path that can set
+# 'Selected' goes through it, including update_application and the batch
+# status update.
+
+def select_application(app_id):
+    """Select one applicant if their internship still has a seat.
+
+    Returns 'selected', 'already_selected', 'full' or 'not_found'.
+    """
+    try:
+        with transaction():
+            rows = fetchall("SELECT internship_id, status FROM applications WHERE id=%s FOR UPDATE", (app_id,))
+            if not rows:
+                return 'not_found'
+            if rows[0]['status'] == SELECTED:
+                return 'already_selected'
+            deltas = _stats_delta({}, rows[0]['internship_id'], rows[0]['status'], -1)
+            _apply_stats(_stats_delta(deltas, rows[0]['internship_id'], SELECTED))
+            execute("UPDATE applications SET status=%s WHERE id=%s", (SELECTED, app_id))
+            _publish_status({app_id: rows[0]['status']})
+    except SeatsFull:
+        return 'full'
+    bump_catalog_version('applications')
+    return 'selected'
+
+
+def fill_seats(internship_id, ranked_ids):
+    """Select applicants for `internship_id` in the order of `ranked_ids` until
+    its seats run out, in one short transaction.
+
+    Ids that are not applications to this internship are 'not_found';
+    already selected or rejected applicants are skipped. Returns
+    {'selected': [ids], 'seats_remaining': n, 'results': {id: outcome}} with
+    outcomes 'selected', 'already_selected', 'rejected', 'full' or 'not_found'.
+    """
+    ids = _clean_ids(ranked_ids)
+    internship_id = int(internship_id)
+    results, picked = {}, []
+    with transaction():
+        # application rows first, then the counter row: the order every writer locks them in
+        statuses = {}
+        for chunk in _chunks(sorted(ids), BATCH_CHUNK_SIZE):
+            marks = ','.join(['%s'] * len(chunk))
+            rows = fetchall(f"SELECT id, status FROM applications WHERE internship_id = %s AND id IN ({marks}) FOR UPDATE",
+                            (internship_id,) + tuple(chunk))
+            statuses.update((r['id'], r['status']) for r in rows)
+        remaining = _lock_seats([internship_id]).get(internship_id, 0)
+        for i in ids:
+            status = statuses.get(i)
+            if status is None:
+                results[i] = 'not_found'
+            elif status == SELECTED:
+                results[i] = 'already_selected'
+            elif status == 'Rejected':
+                results[i] = 'rejected'
+            elif len(picked) >= remaining:
+                results[i] = 'full'
+            else:
+                picked.append(i)
+                results[i] = 'selected'
+        deltas = {}
+        for i in picked:
+            _stats_delta(deltas, internship_id, statuses[i], -1)
+            _stats_delta(deltas, internship_id, SELECTED)
+        _apply_stats(deltas)
+        for chunk in _chunks(picked, BATCH_CHUNK_SIZE):
+            marks = ','.join(['%s'] * len(chunk))
+            execute(f"UPDATE applications SET status=%s WHERE id IN ({marks})", (SELECTED,) + tuple(chunk))
+        _publish_status({i: statuses[i] for i in picked})
+    if picked:
+        bump_catalog_version('applications')
+    return {'selected': picked, 'seats_remaining': max(0, remaining - len(picked)), 'results': results}
+
+
+# Internship stats
+# internship_stats holds per-internship application counters, so dashboards and
+# seat displays read one row per internship instead of counting applications.
+# Every function here that inserts, re-statuses or deletes applications
+# adjusts it in the same transaction. A missing row is created from a recount
+# of the internship's applications the first time one of them changes (so
+# reads treat missing rows as zero only until then), and the FK cascade drops
+# it with the internship. reconcile_internship_stats() rebuilds it.
+STATS_COLUMNS = ('total', 'applied', 'shortlisted', 'selected', 'rejected')
+STATUS_BUCKETS = {'Applied': 'applied', 'Under Review': 'shortlisted', 'Interview Scheduled': 'shortlisted',
+                  'Shortlisted': 'shortlisted', 'Selected': 'selected', 'Rejected': 'rejected'}
+
+SELECTED = 'Selected'
+
+
+class SeatsFull(ValueError):
+    """Raised when selecting an applicant for an internship with no seats left."""
+    pass
+
+
+def _bucket_sum(bucket):
+    statuses = ','.join(f"'{status}'" for status, b in STATUS_BUCKETS.items() if b == bucket)
+    return f"COALESCE(SUM(a.status IN ({statuses})), 0)"
+
+# a missing counter row, created from an exact recount of the internship
+_STATS_CREATE = f"""
+    INSERT IGNORE INTO internship_stats (internship_id, total, applied, shortlisted, selected, rejected, seats_remaining)
+    SELECT i.id, COUNT(a.id), {_bucket_sum('applied')}, {_bucket_sum('shortlisted')}, {_bucket_sum('selected')},
+           {_bucket_sum('rejected')}, COALESCE(i.seats, 0) - {_bucket_sum('selected')}
+    FROM internships i LEFT JOIN applications a ON a.internship_id = i.id
+    WHERE i.id = %s GROUP BY i.id, i.seats
+"""
+
+_STATS_TAKE_SEATS = """
+    UPDATE internship_stats SET total = total + %s, applied = applied + %s, shortlisted = shortlisted + %s,
+        selected = selected + %s, rejected = rejected + %s, seats_remaining = seats_remaining - %s
+    WHERE internship_id = %s AND seats_remaining >= %s
+"""
+
+_STATS_ADD = """
+    UPDATE internship_stats SET total = total + %s, applied = applied + %s, shortlisted = shortlisted + %s,
+        selected = selected + %s, rejected = rejected + %s, seats_remaining = seats_remaining - %s
+    WHERE internship_id = %s
+"""
+
+
+def _stats_delta(deltas, internship_id, status, sign=1, count=1):
+    """Add `count` applications of `status` to deltas[internship_id]; returns deltas."""
+    if internship_id:
+        d = deltas.setdefault(int(internship_id), dict.fromkeys(STATS_COLUMNS, 0))
+        d['total'] += sign * count
+        bucket = STATUS_BUCKETS.get(status)
+        if bucket:
+            d[bucket] += sign * count
+    return deltas
+
+
+def _stats_exec(cur, query, params):
+    """Run a statement on `cur` (or execute_rowcount when None); returns the rowcount."""
+    if cur is None:
+        return execute_rowcount(query, params)
+    cur.execute(query, params)
+    return cur.rowcount
+
+
+def _stats_fetch(cur, query, params):
+    """Rows as tuples, from `cur` or (when None) fetchall."""
+    if cur is None:
+        return [tuple(r.values()) for r in fetchall(query, params)]
+    cur.execute(query, params)
+    return cur.fetchall()
+
+
+def _ensure_stats_rows(internship_ids, cur=None):
+    """Create missing counter rows from an exact recount. Only missing ids are
+    recounted: the recount share-locks the internship's applications."""
+    ids = sorted(set(int(i) for i in internship_ids if i))
+    if not ids:
+        return
+    marks = ','.join(['%s'] * len(ids))
+    found = {r[0] for r in _stats_fetch(cur, f"SELECT internship_id FROM internship_stats WHERE internship_id IN ({marks})",
+                                        tuple(ids))}
+    for iid in ids:
+        if iid not in found:
+            _stats_exec(cur, _STATS_CREATE, (iid,))
+
+
+def _apply_stats(deltas, cur=None, sign=1):
+    """Add counter deltas ({internship_id: {column: n}}) to internship_stats,
+    multiplied by `sign`, on `cur` (or through execute_rowcount).
+
+    Deltas that select applicants only apply while the internship has that
+    many seats left (a conditional decrement); otherwise SeatsFull is raised
+    and the caller's transaction rolls back.
+
+    Call it before writing the applications themselves: a missing counter row
+    is first created from a recount (so a database upgraded without running
+    reconcile_stats.py still gets exact counters), and that recount must not
+    see the change yet.
+    """
+    changes = {}
+    for iid in deltas:
+        values = tuple(sign * deltas[iid][c] for c in STATS_COLUMNS)
+        if any(values):
+            changes[iid] = values
+    _ensure_stats_rows(changes, cur)
+    # a fixed order so concurrent writers lock stats rows in the same sequence
+    for iid in sorted(changes):
+        values = changes[iid]
+        taken = values[3]
+        if taken <= 0:
+            _stats_exec(cur, _STATS_ADD, values + (taken, iid))
+        elif not _stats_exec(cur, _STATS_TAKE_SEATS, values + (taken, iid, taken)):
+            raise SeatsFull(f'No seats left for internship {iid}')
+
+
+def _lock_seats(internship_ids, cur=None):
+    """Lock the counter rows of `internship_ids` (creating missing ones) and
+    return {internship_id: seats_remaining}."""
+    ids = sorted(set(int(i) for i in internship_ids if i))
+    if not ids:
+        return {}
+    _ensure_stats_rows(ids, cur)
+    marks = ','.join(['%s'] * len(ids))
+    rows = _stats_fetch(cur, f"SELECT internship_id, seats_remaining FROM internship_stats "
+                             f"WHERE internship_id IN ({marks}) FOR UPDATE", tuple(ids))
+    return {r[0]: r[1] for r in rows}
+
+
+def _stats_for_students(student_ids, cur=None):
+    """Counter totals of the given students' applications (what deleting them removes)."""
+    deltas = {}
+    for chunk in _chunks(student_ids, BATCH_CHUNK_SIZE):
+        marks = ','.join(['%s'] * len(chunk))
+        rows = _stats_fetch(cur, f"SELECT internship_id, status, COUNT(*) FROM applications "
+                                 f"WHERE student_id IN ({marks}) GROUP BY internship_id, status FOR UPDATE", tuple(chunk))
+        for internship_id, status, count in rows:
+            _stats_delta(deltas, internship_id, status, 1, count)
+    return deltas
+
+
+def get_internship_stats(internship_ids):
+    """{internship_id: {'total', 'applied', 'shortlisted', 'selected', 'rejected', 'seats_remaining'}}."""
+    ids = _clean_ids(internship_ids)
+    out = {}
+    for chunk in _chunks(ids, BATCH_CHUNK_SIZE):
+        marks = ','.join(['%s'] * len(chunk))
+        rows = fetchall(f"""
+            SELECT i.id, COALESCE(st.total, 0) AS total, COALESCE(st.applied, 0) AS applied,
+                   COALESCE(st.shortlisted, 0) AS shortlisted, COALESCE(st.selected, 0) AS selected,
+                   COALESCE(st.rejected, 0) AS rejected,
+                   COALESCE(st.seats_remaining, COALESCE(i.seats, 0)) AS seats_remaining
+            FROM internships i LEFT JOIN internship_stats st ON st.internship_id = i.id
+            WHERE i.id IN ({marks})
+        """, tuple(chunk))
+        for r in rows:
+            out[r.pop('id')] = r
+    return out
+
+
+def reconcile_internship_stats(batch_size=500, fix=True, pause=0.0, max_samples=20):
+    """Recount internship_stats from applications, one short transaction per
+    `batch_size` internship ids, and report rows that had drifted.
+
+    The counts are taken with a locking read, so application writes still in
+    flight for a batch's internships finish (and adjust the counters) first.
+    With fix=False nothing is written. Returns {'checked', 'drifted', 'fixed',
+    'samples': [{'internship_id', 'column': [stored, actual], ...}]}.
+    """
+    batch_size = max(1, int(batch_size))
+    report = {'checked': 0, 'drifted': 0, 'fixed': 0, 'samples': []}
+    columns = STATS_COLUMNS + ('seats_remaining',)
+    conn = get_connection()
+    try:
+        cur = conn.cursor(dictionary=True)
+        cur.execute("SELECT COALESCE(MAX(id), 0) AS max_id FROM internships")
+        max_id = cur.fetchone()['max_id']
+        conn.commit()
+        for lo in range(1, max_id + 1, batch_size):
+            hi = lo + batch_size - 1
+            cur.execute("SELECT id, COALESCE(seats, 0) AS seats FROM internships WHERE id BETWEEN %s AND %s", (lo, hi))
+            seats = {r['id']: r['seats'] for r in cur.fetchall()}
+            cur.execute("""
+                SELECT internship_id, status, COUNT(*) AS cnt FROM applications
+                WHERE internship_id BETWEEN %s AND %s GROUP BY internship_id, status LOCK IN SHARE MODE
+            """, (lo, hi))
+            actual = {}
+            for r in cur.fetchall():
+                _stats_delta(actual, r['internship_id'], r['status'], 1, r['cnt'])
+            cur.execute("SELECT * FROM internship_stats WHERE internship_id BETWEEN %s AND %s FOR UPDATE", (lo, hi))
+            stored = {r['internship_id']: r for r in cur.fetchall()}
+            for iid, seat_count in seats.items():
+                report['checked'] += 1
+                want = actual.get(iid, dict.fromkeys(STATS_COLUMNS, 0))
+                want['seats_remaining'] = seat_count - want['selected']
+                have = stored.get(iid)
+                if have is None and not want['total']:
+                    continue  # no applications and no row: nothing to record
+                diff = {c: [have[c] if have else None, want[c]] for c in columns if not have or have[c] != want[c]}
+                if not diff:
+                    continue
+                report['drifted'] += 1
+                if len(report['samples']) < max_samples:
+                    report['samples'].append(dict(diff, internship_id=iid))
+                if fix:
+                    cur.execute("""
+                        INSERT INTO internship_stats (internship_id, total, applied, shortlisted, selected, rejected, seats_remaining)
+                        VALUES (%s,%s,%s,%s,%s,%s,%s)
+                        ON DUPLICATE KEY UPDATE total = VALUES(total), applied = VALUES(applied),
+                            shortlisted = VALUES(shortlisted), selected = VALUES(selected),
+                            rejected = VALUES(rejected), seats_remaining = VALUES(seats_remaining)
+                    """, (iid,) + tuple(want[c] for c in columns))
+                    report['fixed'] += 1
+            conn.commit()
+            if pause:
+                time.sleep(pause)
+        cur.close()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    if report['fixed']:
+        bump_catalog_version('applications')
+    return report
+
+
+# Batch mutations
+# Each batch runs in one transaction and touches the database once per chunk of
+# ids (plus one lookup per chunk to tell missing ids apart), instead of one
+# connection and commit per row.
+BATCH_CHUNK_SIZE = 500
+BATCH_DELETE_TABLES = ('applications', 'students', 'internships')
+CASCADE_COLUMNS = {'students': 'student_id', 'internships': 'internship_id'}  # applications.<column>
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _existing_ids(cur, table, ids, lock='FOR UPDATE'):
+    found = set()
+    for chunk in _chunks(ids, BATCH_CHUNK_SIZE):
+        marks = ','.join(['%s'] * len(chunk))
+        cur.execute(f"SELECT id FROM `{table}` WHERE id IN ({marks}) {lock}", tuple(chunk))
+        found.update(r[0] for r in cur.fetchall())
+    return found
+
+
+def _locked_applications(cur, ids):
+    """{id: (internship_id, status)} for the applications in `ids` that exist, locked for update."""
+    found = {}
+    for chunk in _chunks(ids, BATCH_CHUNK_SIZE):
+        marks = ','.join(['%s'] * len(chunk))
+        cur.execute(f"SELECT id, internship_id, status FROM applications WHERE id IN ({marks}) FOR UPDATE", tuple(chunk))
+        found.update((r[0], (r[1], r[2])) for r in cur.fetchall())
+    return found
+
+
+def _clean_ids(ids):
+    if isinstance(ids, (str, bytes, dict)):
+        # iterating would yield characters or keys, not ids
+        raise ValueError('ids must be a list')
+    out = []
+    for i in ids or []:
+        try:
+            out.append(int(i))
+        except (TypeError, ValueError):
+            raise ValueError(f'Invalid id: {i!r}')
+    # keep first occurrence order, drop duplicates
+    return list(dict.fromkeys(out))
+
+
+def batch_update_application_status(changes):
+    """Apply many application status changes in one transaction.
+
+    `changes` is a list of (app_id, status) pairs, applied in order. Ids are
+    grouped by final status so each chunk becomes a single UPDATE ... WHERE
+    id IN (...). Selections take seats like select_application(); once an
+    internship is full its remaining selections are skipped.
+    Returns {app_id: 'updated' | 'full' | 'not_found'}.
+    """
+    cleaned = []
+    for app_id, status in changes:
+        app_id = _clean_ids([app_id])[0]
+        if not isinstance(status, str) or not status.strip() or len(status.strip()) > 50:
+            raise ValueError(f'Invalid status for application {app_id}')
+        cleaned.append((app_id, status.strip()))
+    all_ids = _clean_ids([app_id for app_id, _ in cleaned])
+    if not all_ids:
+        return {}
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        existing = _locked_applications(cur, all_ids)
+        remaining = _lock_seats([existing[i][0] for i, status in cleaned if status == SELECTED and i in existing], cur)
+        current = {i: status for i, (_, status) in existing.items()}
+        full = set()
+        for i, status in cleaned:
+            if i not in existing:
+                continue
+            internship_id = existing[i][0]
+            if status == SELECTED and current[i] != SELECTED:
+                if remaining.get(internship_id, 0) <= 0:
+                    full.add(i)
+                    continue
+                remaining[internship_id] -= 1
+            elif current[i] == SELECTED and status != SELECTED and internship_id in remaining:
+                remaining[internship_id] += 1
+            current[i] = status
+        by_status, deltas = {}, {}
+        for i, status in current.items():
+            internship_id, old_status = existing[i]
+            if status != old_status:
+                by_status.setdefault(status, []).append(i)
+                _stats_delta(deltas, internship_id, old_status, -1)
+                _stats_delta(deltas, internship_id, status)
+        _apply_stats(deltas, cur)
+        for status, ids in by_status.items():
+            for chunk in _chunks(ids, BATCH_CHUNK_SIZE):
+                marks = ','.join(['%s'] * len(chunk))
+                cur.execute(f"UPDATE applications SET status=%s WHERE id IN ({marks})", (status,) + tuple(chunk))
+        conn.commit()
+        cur.close()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    if existing:
+        bump_catalog_version('applications')
+        _publish_status({i: existing[i][1] for i, status in current.items() if status != existing[i][1]})
+
+    def outcome(i):
+        if i not in existing:
+            return 'not_found'
+        return 'full' if i in full and current[i] == existing[i][1] else 'updated'
+    return {i: outcome(i) for i in all_ids}
+
+
+def batch_delete(table, ids):
+    """Delete many rows from `table` (applications, students or internships) in one transaction.
+
+    Returns {id: 'deleted' | 'not_found'}. Foreign-key cascades behave exactly
+    as they do for the single-row delete functions.
+    """
+    if table not in BATCH_DELETE_TABLES:
+        raise ValueError('Batch delete is not supported for this table')
+    ids = _clean_ids(ids)
+    if not ids:
+        return {}
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        existing = _existing_ids(cur, table, ids)
+        targets = [i for i in ids if i in existing]
+        # keep internship_stats in step; internships' own stats rows go with the FK cascade
+        if table == 'applications':
+            deltas = {}
+            for internship_id, status in _locked_applications(cur, targets).values():
+                _stats_delta(deltas, internship_id, status)
+            _apply_stats(deltas, cur, sign=-1)
+        elif table == 'students':
+            _apply_stats(_stats_for_students(targets, cur), cur, sign=-1)
+        if table in CASCADE_COLUMNS:
+            _tombstone_applications(cur, CASCADE_COLUMNS[table], targets)
+        for chunk in _chunks(targets, BATCH_CHUNK_SIZE):
+            marks = ','.join(['%s'] * len(chunk))
+            cur.execute(f"DELETE FROM `{table}` WHERE id IN ({marks})", tuple(chunk))
+        _tombstone(cur, table, targets)
+        conn.commit()
+        cur.close()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    if existing:
+        # students and internships cascade to their applications
+        bump_catalog_version(table, 'applications')
+    return {i: ('deleted' if i in existing else 'not_found') for i in ids}
+
+
+# Dashboard summary
+# The dashboard only needs counts, a status breakdown and the latest few
+# applications, so it is built from aggregate queries and kept for a few
+# seconds instead of loading every table.
+_dashboard_cache = {}
+_dashboard_lock = threading.Lock()
+
+
+def _cached_summary(key, build):
+    now = time.time()
+    hit = _dashboard_cache.get(key)
+    if hit and hit[0] > now:
+        return hit[1]
+    value = build()
+    with _dashboard_lock:
+        if len(_dashboard_cache) > 1000:
+            # per-student/company entries accumulate; drop the expired ones
+            for k in [k for k, v in _dashboard_cache.items() if v[0] <= now]:
+                del _dashboard_cache[k]
+        _dashboard_cache[key] = (now + DASHBOARD_CACHE_TTL, value)
+    return value
+
+
+def invalidate_dashboard_cache():
+    with _dashboard_lock:
+        _dashboard_cache.clear()
+
+
+def _status_counts(where='', params=()):
+    rows = fetchall(f"SELECT a.status, COUNT(*) AS cnt FROM applications a {where} GROUP BY a.status ORDER BY cnt DESC", params)
+    return [{'status': r['status'], 'count': r['cnt']} for r in rows]
+
+
+def _recent_applications(where='', params=(), limit=10):
+    return fetchall(f"""
+        SELECT a.*, s.name AS student_name, i.title AS internship_title, c.name AS company_name
+        FROM applications a
+        LEFT JOIN students s ON a.student_id = s.id
+        LEFT JOIN internships i ON a.internship_id = i.id
+        LEFT JOIN companies c ON i.company_id = c.id
+        {where}
+        ORDER BY a.id DESC LIMIT %s
+    """, tuple(params) + (limit,))
+
+
+def get_dashboard_summary(role, company_id=None, student_id=None, recent=10):
+    """Return {'counts': {...}, 'status_counts': [...], 'recent_applications': [...]}
+    for the given role, served from a short-lived cache."""
+    if role == 'admin':
+        def build():
+            counts, status_counts, recent_rows = gather((fetchall, """
+                SELECT (SELECT COUNT(*) FROM students) AS students,
+                       (SELECT COUNT(*) FROM companies) AS companies,
+                       (SELECT COUNT(*) FROM internships) AS internships,
+                       (SELECT COUNT(*) FROM applications) AS applications
+            """), _status_counts, (_recent_applications, '', (), recent))
+            return {'counts': counts[0], 'status_counts': status_counts, 'recent_applications': recent_rows}
+        return _cached_summary(('admin', None, recent), build)
+    if role == 'company':
+        def build():
+            if not company_id:
+                return {'counts': {'internships': 0, 'applications': 0}, 'status_counts': [], 'recent_applications': []}
+            where = 'JOIN internships ci ON a.internship_id = ci.id WHERE ci.company_id = %s'
+            counts, status_counts, recent_rows = gather((fetchall, """
+                SELECT COUNT(*) AS internships, CAST(COALESCE(SUM(st.total), 0) AS SIGNED) AS applications
+                FROM internships i LEFT JOIN internship_stats st ON st.internship_id = i.id
+                WHERE i.company_id = %s
+            """, (company_id,)), (_status_counts, where, (company_id,)),
+                (_recent_applications, 'WHERE i.company_id = %s', (company_id,), recent))
+            return {'counts': counts[0], 'status_counts': status_counts, 'recent_applications': recent_rows}
+        return _cached_summary(('company', company_id, recent), build)
+
+    def build():
+        count_task = (fetchall, """
+            SELECT (SELECT COUNT(*) FROM internships) AS internships,
+                   (SELECT COUNT(*) FROM companies) AS companies,
+                   (SELECT COUNT(*) FROM applications WHERE student_id = %s) AS applications
+        """, (student_id,))
+        if not student_id:
+            return {'counts': _call(count_task)[0], 'status_counts': [], 'recent_applications': []}
+        counts, status_counts, recent_rows = gather(
+            count_task, (_status_counts, 'WHERE a.student_id = %s', (student_id,)),
+            (_recent_applications, 'WHERE a.student_id = %s', (student_id,), recent))
+        return {'counts': counts[0], 'status_counts': status_counts, 'recent_applications': recent_rows}
+    return _cached_summary(('student', student_id, recent), build)
+
+
+def get_company_totals(limit=10):
+    """Per-company internship and application totals, busiest companies first."""
+    def build():
+        return fetchall("""
+            SELECT c.id, c.name,
+                   COUNT(i.id) AS internships,
+                   CAST(COALESCE(SUM(st.total), 0) AS SIGNED) AS applications
+            FROM companies c
+            LEFT JOIN internships i ON i.company_id = c.id
+            LEFT JOIN internship_stats st ON st.internship_id = i.id
+            GROUP BY c.id, c.name
+            ORDER BY applications DESC, c.id
+            LIMIT %s
+        """, (limit,))
+    return _cached_summary(('company_totals', None, limit), build)
+
+
+# Email outbox
+# Emails are written to email_outbox (inside the caller's transaction when
+# there is one) and delivered later by mailer.Dispatcher.
+def enqueue_email(to_email, subject, body):
+    return execute(
+        "INSERT INTO email_outbox (to_email, subject, body) VALUES (%s,%s,%s)",
+        (to_email, subject, body),
+    )
+
+def claim_outbox_batch(token, limit, stale_after=600):
+    """Atomically claim up to `limit` due emails for one dispatcher run.
+
+    Rows left in 'sending' by a dispatcher that died are reclaimed after
+    `stale_after` seconds. Safe to run from several processes at once.
+    """
+    execute("""
+        UPDATE email_outbox SET status='sending', claimed_by=%s, claimed_at=NOW()
+        WHERE (status='pending' AND next_attempt_at <= NOW())
+           OR (status='sending' AND claimed_at < NOW() - INTERVAL %s SECOND)
+        ORDER BY id LIMIT %s
+    """, (token, stale_after, limit))
+    return fetchall("SELECT * FROM email_outbox WHERE claimed_by=%s AND status='sending' ORDER BY id", (token,))
+
+def mark_emails_sent(ids):
+    if not ids:
+        return
+    marks = ','.join(['%s'] * len(ids))
+    execute(f"UPDATE email_outbox SET status='sent', sent_at=NOW(), attempts=attempts+1, last_error=NULL WHERE id IN ({marks})",
+            tuple(ids))
+
+def mark_email_failed(email_id, error, retry_in=None):
+    """Record a failed attempt; retry after `retry_in` seconds, or give up when None."""
+    if retry_in is None:
+        execute("UPDATE email_outbox SET status='failed', attempts=attempts+1, last_error=%s WHERE id=%s",
+                (str(error)[:500], email_id))
+    else:
+        execute("""
+            UPDATE email_outbox SET status='pending', attempts=attempts+1, last_error=%s,
+                   next_attempt_at = NOW() + INTERVAL %s SECOND
+            WHERE id=%s
+        """, (str(error)[:500], int(retry_in), email_id))
+
+def outbox_depth():
+    rows = fetchall("SELECT status, COUNT(*) AS cnt FROM email_outbox WHERE status IN ('pending','sending') GROUP BY status")
+    return {r['status']: r['cnt'] for r in rows}
 
 
 # User authentication and management
@@ -194,19 +2250,83 @@ def get_user_by_username(username):
     return rows[0] if rows else None
 
 def get_student_by_username(username):
-    rows = fetchall("""
-        SELECT s.* FROM students s 
-        JOIN users u ON s.email = u.email 
-        WHERE u.username = %s AND u.role = 'student'
-    """, (username,))
-    return rows[0] if rows else None
+    ident = resolve_identity(username)
+    return get_student_by_id(ident and ident['student_id'])
 
 def get_company_by_username(username):
+    ident = resolve_identity(username)
+    return get_company_by_id(ident and ident['company_id'])
+
+# role -> (profile table, identity key)
+PROFILE_TABLES = {'student': ('students', 'student_id'), 'company': ('companies', 'company_id')}
+
+def resolve_identity(username):
+    """users.id, role and the linked student/company id for `username`.
+
+    Students and companies point at their user account through user_id. The
+    app caches the result in the session (see identity_is_current) and uses
+    the id-based lookups below.
+    """
     rows = fetchall("""
-        SELECT c.* FROM companies c 
-        JOIN users u ON c.email = u.email 
-        WHERE u.username = %s AND u.role = 'company'
+        SELECT u.id AS user_id, u.role, s.id AS student_id, c.id AS company_id
+        FROM users u
+        LEFT JOIN students s ON u.role = 'student' AND s.user_id = u.id
+        LEFT JOIN companies c ON u.role = 'company' AND c.user_id = u.id
+        WHERE u.username = %s
     """, (username,))
+    if not rows:
+        return None
+    ident = rows[0]
+    if ident['role'] in PROFILE_TABLES:
+        key = PROFILE_TABLES[ident['role']][1]
+        if not ident[key]:
+            ident[key] = link_user_profile(ident['user_id'], ident['role'])
+    return ident
+
+def link_user_profile(user_id, role):
+    """Link an unlinked student/company row to its account by email (the old
+    way they were matched) and return its id, or None.
+
+    Covers rows the migrate_user_ids.py backfill has not reached yet and
+    profiles an admin created for an existing account's email.
+    """
+    table = PROFILE_TABLES[role][0]
+    execute(f"""
+        UPDATE {table} SET user_id = %s
+        WHERE user_id IS NULL AND email = (SELECT email FROM users WHERE id = %s)
+        LIMIT 1
+    """, (user_id, user_id))
+    rows = fetchall(f"SELECT id FROM {table} WHERE user_id = %s", (user_id,))
+    return rows[0]['id'] if rows else None
+
+def identity_is_current(identity):
+    """Whether a resolve_identity() result cached at `identity['resolved_at']`
+    still holds for this user.
+
+    A linked id stays valid while that student/company row exists and still
+    points at the account: one primary-key lookup, whatever other profiles
+    change meanwhile. A missing id is retried (which may link a profile by
+    email) at most every identity_retry seconds.
+    """
+    role = identity.get('role')
+    if role not in PROFILE_TABLES:
+        return True
+    table, key = PROFILE_TABLES[role]
+    if not identity.get(key):
+        return time.time() - identity.get('resolved_at', 0) < AUTH_CONFIG['identity_retry']
+    rows = fetchall(f"SELECT user_id FROM {table} WHERE id = %s", (identity[key],))
+    return bool(rows) and rows[0]['user_id'] == identity.get('user_id')
+
+def get_student_by_id(student_id):
+    if not student_id:
+        return None
+    rows = fetchall("SELECT * FROM students WHERE id = %s", (student_id,))
+    return rows[0] if rows else None
+
+def get_company_by_id(company_id):
+    if not company_id:
+        return None
+    rows = fetchall("SELECT * FROM companies WHERE id = %s", (company_id,))
     return rows[0] if rows else None
 
 def get_company_internships(company_id):
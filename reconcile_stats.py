@@ -0,0 +1,46 @@
+"""
+Rebuild internship_stats from the applications table and report drift.
+
+Usage:
+    python reconcile_stats.py                   # recount everything, fix drifted rows
+    python reconcile_stats.py --check           # only report, write nothing
+    python reconcile_stats.py --batch-size 200 --pause 0.1
+
+The counters are normally kept exact by models.py, so drift means something
+wrote to applications directly (a manual UPDATE, a bulk load such as
+datagen.py) or the table was just created on an existing database. Each batch
+of internships is recounted in its own short transaction, so this can run
+while the app is serving traffic.
+"""
+import argparse
+import sys
+import time
+
+import models
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Recount internship_stats and report drift')
+    parser.add_argument('--batch-size', type=int, default=500, help='internship ids per transaction (default %(default)s)')
+    parser.add_argument('--pause', type=float, default=0.0, help='seconds to sleep between batches')
+    parser.add_argument('--check', action='store_true', help='report drift without fixing it')
+    args = parser.parse_args()
+
+    start = time.time()
+    try:
+        report = models.reconcile_internship_stats(args.batch_size, fix=not args.check, pause=args.pause)
+    except Exception as e:
+        print(f"[ERROR] {e}")
+        sys.exit(1)
+    for sample in report['samples']:
+        iid = sample.pop('internship_id')
+        changes = ', '.join(f"{col} {old}->{new}" for col, (old, new) in sorted(sample.items()))
+        print(f"  internship {iid}: {changes}")
+    print(f"[{'WARNING' if report['drifted'] else 'SUCCESS'}] checked {report['checked']} internships, "
+          f"{report['drifted']} drifted, {report['fixed']} fixed in {time.time() - start:.1f}s")
+    if args.check and report['drifted']:
+        sys.exit(2)
+
+
+if __name__ == '__main__':
+    main()
@@ -29,7 +29,7 @@ document.addEventListener('DOMContentLoaded', function(){
         const tbody = document.getElementById('studentsTable');
         const tr = document.createElement('tr');
         tr.setAttribute('data-id', js.id);
-        tr.innerHTML = `<td class="col-id">${js.id}</td><td class="col-name">${escapeHtml(data.name)}</td><td class="col-email">${escapeHtml(data.email||'')}</td><td class="col-phone">${escapeHtml(data.phone||'')}</td><td class="col-branch">${escapeHtml(data.branch||'')}</td><td><button class="btn btn-sm btn-icon btn-outline-secondary btn-edit" title="Edit"><i class="fa-solid fa-pen-to-square"></i></button> <button class="btn btn-sm btn-icon btn-outline-danger btn-delete" title="Delete"><i class="fa-solid fa-trash"></i></button></td>`;
+        tr.innerHTML = `<td><input type="checkbox" class="form-check-input row-select" aria-label="Select row"></td><td class="col-id">${js.id}</td><td class="col-name">${escapeHtml(data.name)}</td><td class="col-email">${escapeHtml(data.email||'')}</td><td class="col-phone">${escapeHtml(data.phone||'')}</td><td class="col-branch">${escapeHtml(data.branch||'')}</td><td><button class="btn btn-sm btn-icon btn-outline-secondary btn-edit" title="Edit"><i class="fa-solid fa-pen-to-square"></i></button> <button class="btn btn-sm btn-icon btn-outline-danger btn-delete" title="Delete"><i class="fa-solid fa-trash"></i></button></td>`;
         tbody.prepend(tr);
         // reset form
         addStudentForm.reset();
@@ -172,12 +172,10 @@ document.addEventListener('DOMContentLoaded', function(){
       if(res.ok){
         const js = await res.json();
         const tbody = document.getElementById('internshipsTable');
-        // get company name from select
-        const select = addInternForm.querySelector('select[name="company_id"]');
-        const companyName = select.options[select.selectedIndex].text;
+        const companyName = addInternForm.querySelector('.typeahead-input').value;
         const tr = document.createElement('tr');
         tr.setAttribute('data-id', js.id);
-        tr.innerHTML = `<td class="col-id">${js.id}</td><td class="col-title">${escapeHtml(data.title)}</td><td class="col-company" data-company-id="${data.company_id}">${escapeHtml(companyName)}</td><td class="col-dates">${escapeHtml(data.start_date||'')} - ${escapeHtml(data.end_date||'')}</td><td class="col-stipend">${escapeHtml(data.stipend||'')}</td><td class="col-seats">${escapeHtml(data.seats||'1')}</td><td><button class="btn btn-sm btn-icon btn-outline-secondary btn-edit" title="Edit"><i class="fa-solid fa-pen-to-square"></i></button> <button class="btn btn-sm btn-icon btn-outline-danger btn-delete" title="Delete"><i class="fa-solid fa-trash"></i></button></td>`;
+        tr.innerHTML = `<td><input type="checkbox" class="form-check-input row-select" aria-label="Select row"></td><td class="col-id">${js.id}</td><td class="col-title">${escapeHtml(data.title)}</td><td class="col-company" data-company-id="${data.company_id}">${escapeHtml(companyName)}</td><td class="col-dates">${escapeHtml(data.start_date||'')} - ${escapeHtml(data.end_date||'')}</td><td class="col-stipend">${escapeHtml(data.stipend||'')}</td><td class="col-seats">${escapeHtml(data.seats||'1')}</td><td><button class="btn btn-sm btn-icon btn-outline-secondary btn-edit" title="Edit"><i class="fa-solid fa-pen-to-square"></i></button> <button class="btn btn-sm btn-icon btn-outline-danger btn-delete" title="Delete"><i class="fa-solid fa-trash"></i></button></td>`;
         tbody.prepend(tr);
         addInternForm.reset();
         const modal = bootstrap.Modal.getInstance(document.getElementById('addInternModal'));
@@ -197,9 +195,10 @@ document.addEventListener('DOMContentLoaded', function(){
         const modal = new bootstrap.Modal(modalEl);
         modalEl.querySelector('input[name="id"]').value = id;
         modalEl.querySelector('input[name="title"]').value = tr.querySelector('.col-title').textContent.trim();
-        const companySelect = modalEl.querySelector('select[name="company_id"]');
-        const companyId = tr.querySelector('.col-company').getAttribute('data-company-id');
-        if(companyId){ companySelect.value = companyId; }
+        const companyCell = tr.querySelector('.col-company');
+        const companyId = companyCell.getAttribute('data-company-id');
+        modalEl.querySelector('input[name="company_id"]').value = companyId && companyId !== 'None' ? companyId : '';
+        modalEl.querySelector('.typeahead-input').value = companyCell.textContent.trim();
         const dates = tr.querySelector('.col-dates').textContent.split('-').map(s=>s.trim());
         modalEl.querySelector('input[name="start_date"]').value = dates[0]||'';
         modalEl.querySelector('input[name="end_date"]').value = dates[1]||'';
@@ -228,7 +227,7 @@ document.addEventListener('DOMContentLoaded', function(){
         const tr = document.querySelector(`#internshipsTable tr[data-id="${id}"]`);
         if(tr){
           tr.querySelector('.col-title').textContent = data.title;
-          const selectedText = editInternForm.querySelector('select[name="company_id"]').selectedOptions[0].textContent;
+          const selectedText = editInternForm.querySelector('.typeahead-input').value;
           tr.querySelector('.col-company').textContent = selectedText;
           tr.querySelector('.col-company').setAttribute('data-company-id', data.company_id);
           tr.querySelector('.col-dates').textContent = `${data.start_date||''} - ${data.end_date||''}`;
@@ -242,21 +241,67 @@ document.addEventListener('DOMContentLoaded', function(){
     });
   }
 
+  // Typeahead pickers: search a paginated list endpoint (?q= prefix match,
+  // a handful of rows) as the user types, instead of rendering every row
+  // into a <select>. The chosen id goes into the hidden input.
+  document.querySelectorAll('.typeahead[data-typeahead]').forEach(box=>{
+    const hidden = box.querySelector('input[type="hidden"]');
+    const input = box.querySelector('.typeahead-input');
+    const menu = box.querySelector('.typeahead-menu');
+    const label = box.dataset.label;
+    let timer = null;
+    function choose(id, text){
+      input.value = text;
+      menu.classList.add('d-none');
+      if(hidden.value === String(id)) return;
+      hidden.value = id;
+      box.dispatchEvent(new Event('change', {bubbles:true}));
+    }
+    async function search(){
+      const q = input.value.trim();
+      if(!q){ menu.classList.add('d-none'); return; }
+      const params = new URLSearchParams({q: q, limit: 10, fields: label});
+      const res = await fetch(box.dataset.typeahead + '?' + params.toString());
+      const js = await res.json().catch(()=>({status:'error'}));
+      if(js.status !== 'ok' || input.value.trim() !== q) return;
+      menu.innerHTML = js.rows.length ? '' : '<div class="list-group-item text-muted">No matches</div>';
+      js.rows.forEach(r=>{
+        const item = document.createElement('button');
+        item.type = 'button';
+        item.className = 'list-group-item list-group-item-action';
+        item.textContent = r[label] || ('#' + r.id);
+        item.addEventListener('mousedown', (e)=>{ e.preventDefault(); choose(r.id, item.textContent); });
+        menu.appendChild(item);
+      });
+      menu.classList.remove('d-none');
+    }
+    input.addEventListener('input', ()=>{
+      clearTimeout(timer);
+      if(!input.value.trim()) choose('', '');
+      timer = setTimeout(search, 250);
+    });
+    // only a chosen row changes the filter, not the text typed so far
+    input.addEventListener('change', (e)=> e.stopPropagation());
+    input.addEventListener('blur', ()=> menu.classList.add('d-none'));
+  });
+
   const addAppForm = document.getElementById('addAppForm');
   if(addAppForm){
     addAppForm.addEventListener('submit', async (e)=>{
       e.preventDefault();
       const fd = new FormData(addAppForm);
       const data = Object.fromEntries(fd.entries());
+      if(!data.student_id || !data.internship_id){ showToast('Choose a student and an internship','error'); return; }
       const res = await fetch('/api/applications', {method:'POST', headers:{'Content-Type':'application/json'}, body:JSON.stringify(data)});
       if(res.ok){
         const js = await res.json();
         const tbody = document.getElementById('applicationsTable');
-        const studentText = addAppForm.querySelector('select[name="student_id"]').selectedOptions[0].textContent;
-        const internText = addAppForm.querySelector('select[name="internship_id"]').selectedOptions[0].textContent;
+        const studentPicker = addAppForm.querySelector('.typeahead[data-typeahead="/api/students"] .typeahead-input');
+        const studentText = studentPicker ? studentPicker.value : 'You';
+        const internText = addAppForm.querySelector('.typeahead[data-typeahead="/api/internships"] .typeahead-input').value;
         const tr = document.createElement('tr');
         tr.setAttribute('data-id', js.id);
-        tr.innerHTML = `<td class="col-id">${js.id}</td><td class="col-student">${escapeHtml(studentText)}</td><td class="col-internship">${escapeHtml(internText)}</td><td class="col-status">Applied</td><td class="col-applied">just now</td><td><button class="btn btn-sm btn-icon btn-outline-secondary btn-edit" title="Update"><i class="fa-solid fa-pen-to-square"></i></button> <button class="btn btn-sm btn-icon btn-outline-danger btn-delete" title="Delete"><i class="fa-solid fa-trash"></i></button></td>`;
+        tr.innerHTML = `<td><input type="checkbox" class="form-check-input row-select" aria-label="Select row"></td><td class="col-id">${js.id}</td><td class="col-student">${escapeHtml(studentText)}</td><td class="col-internship">${escapeHtml(internText)}</td><td class="col-status">Applied</td><td class="col-applied">just now</td><td><button class="btn btn-sm btn-icon btn-outline-secondary btn-edit" title="Update"><i class="fa-solid fa-pen-to-square"></i></button> <button class="btn btn-sm btn-icon btn-outline-danger btn-delete" title="Delete"><i class="fa-solid fa-trash"></i></button></td>`;
         tbody.prepend(tr);
         addAppForm.reset();
         const modal = bootstrap.Modal.getInstance(document.getElementById('addAppModal'));
@@ -277,7 +322,7 @@ document.addEventListener('DOMContentLoaded', function(){
         // Populate and show details modal
         const student = tr.querySelector('.col-student div div:first-child').textContent.trim();
         const email = tr.querySelector('.col-student div div:last-child').textContent.trim();
-        const position = tr.querySelector('td:nth-child(2)').textContent.trim();
+        const position = tr.querySelector('.col-internship').textContent.trim();
         const company = tr.querySelector('.col-company').textContent.trim();
         const applied = tr.querySelector('.col-applied').textContent.trim();
         const status = tr.querySelector('.status-badge').textContent.trim();
@@ -343,7 +388,7 @@ document.addEventListener('DOMContentLoaded', function(){
         if(res.ok){
           tr.remove();
           showToast('Application deleted', 'success');
-          filterApplications(); // Update counter
+          updateApplicationsInfo(); // Update counter
         } else {
           const err = await res.json().catch(() => ({message: 'Delete failed'}));
           showToast(err.message || 'Failed to delete application', 'error');
@@ -352,9 +397,12 @@ document.addEventListener('DOMContentLoaded', function(){
     });
   }
 
-  // Client-side filtering for applications
+  // Applications are filtered, sorted and paged on the server
+  // (/api/applications/query); the filter form only sends its values.
+  const appFilters = document.getElementById('appFilters');
+  const appLoadMore = document.getElementById('appLoadMore');
   const appSearch = document.getElementById('appSearch');
-  const appFilter = document.getElementById('appFilter');
+
   function getStatusColor(status) {
     switch (status) {
       case 'Accepted':
@@ -370,26 +418,258 @@ document.addEventListener('DOMContentLoaded', function(){
     }
   }
 
-  function filterApplications(){
-    const q = (appSearch && appSearch.value || '').toLowerCase();
-    const status = (appFilter && appFilter.value) || 'all';
-    const rows = document.querySelectorAll('#applicationsTable tr');
-    let shown = 0;
-    rows.forEach(r=>{
-      const student = (r.querySelector('.col-student') && r.querySelector('.col-student').textContent||'').toLowerCase();
-      const internship = (r.querySelector('.col-internship') && r.querySelector('.col-internship').textContent||'').toLowerCase();
-      const company = (r.querySelector('.col-company') && r.querySelector('.col-company').textContent||'').toLowerCase();
-      const st = r.querySelector('.status-badge') ? r.querySelector('.status-badge').textContent.trim() : '';
-      const matchesSearch = !q || student.includes(q) || internship.includes(q) || company.includes(q);
-      const matchesStatus = status === 'all' || st === status;
-      if(matchesSearch && matchesStatus){ r.style.display = ''; shown++; } else { r.style.display = 'none'; }
-    });
-    // Update counter
+  function applicationRow(a){
+    const tr = document.createElement('tr');
+    tr.className = 'hover:bg-gray-50';
+    tr.setAttribute('data-id', a.id);
+    tr.innerHTML = `<td class="px-6 py-4"><input type="checkbox" class="form-check-input row-select" aria-label="Select row"></td><td class="px-6 py-4 col-student"><div><div class="font-medium">${escapeHtml(a.student_name||'')}</div><div class="text-sm text-gray-500">${escapeHtml(a.student_email||'')}</div></div></td><td class="px-6 py-4 col-internship">${escapeHtml(a.internship_title||'')}</td><td class="px-6 py-4 col-company">${escapeHtml(a.company_name||'')}</td><td class="px-6 py-4 col-applied">${escapeHtml(a.applied_at||'')}</td><td class="px-6 py-4 col-status"><span class="status-badge px-2.5 py-1 rounded-full text-sm font-medium ${getStatusColor(a.status)}">${escapeHtml(a.status||'')}</span></td><td class="px-6 py-4"><button class="btn btn-sm btn-view text-gray-400 hover:text-gray-600 p-1 rounded-full hover:bg-gray-100" title="View Details"><i class="fa-solid fa-eye"></i></button></td>`;
+    return tr;
+  }
+
+  function updateApplicationsInfo(){
     const info = document.getElementById('applicationsInfo');
-    if(info) info.textContent = `Showing ${shown} of ${rows.length} applications`;
+    const rows = document.querySelectorAll('#applicationsTable tr[data-id]');
+    if(info) info.textContent = `Showing ${rows.length} applications`;
+  }
+
+  async function loadApplications(append){
+    const params = new URLSearchParams();
+    new FormData(appFilters).forEach((v, k)=>{ if(v) params.set(k, v); });
+    // keep the address bar in sync so reloads and shared links keep the filters
+    if(!append) history.replaceState(null, '', '?' + params.toString());
+    if(append && appLoadMore.dataset.cursor) params.set('cursor', appLoadMore.dataset.cursor);
+    const res = await fetch('/api/applications/query?' + params.toString());
+    const js = await res.json();
+    if(js.status !== 'ok'){ showToast(js.message || 'Could not load applications', 'error'); return; }
+    const tbody = document.getElementById('applicationsTable');
+    if(!append) tbody.innerHTML = '';
+    js.rows.forEach(a=> tbody.appendChild(applicationRow(a)));
+    appLoadMore.dataset.cursor = js.next_cursor || '';
+    appLoadMore.classList.toggle('d-none', !js.has_more);
+    updateApplicationsInfo();
+  }
+
+  if(appFilters){
+    let searchTimer = null;
+    appFilters.addEventListener('submit', (e)=>{ e.preventDefault(); loadApplications(false); });
+    appFilters.addEventListener('change', ()=> loadApplications(false));
+    if(appSearch) appSearch.addEventListener('input', ()=>{
+      clearTimeout(searchTimer);
+      searchTimer = setTimeout(()=> loadApplications(false), 300);
+    });
+    if(appLoadMore) appLoadMore.addEventListener('click', ()=> loadApplications(true));
+  }
+
+  // Delta sync: poll /api/changes/applications with the cursor rendered into
+  // the page and patch the rows on screen instead of reloading the list.
+  // New applications are only counted, since they may not match the filters.
+  const appTbody = document.getElementById('applicationsTable');
+  if(appTbody && appTbody.dataset.changesCursor){
+    let changesCursor = appTbody.dataset.changesCursor;
+    let newApplications = 0;
+    let syncing = false;
+    async function syncApplications(){
+      if(syncing || document.hidden) return;
+      syncing = true;
+      try {
+        let more = true;
+        while(more){
+          const res = await fetch('/api/changes/applications?cursor=' + encodeURIComponent(changesCursor));
+          if(res.status === 410){
+            // too far behind to catch up: start over from a fresh list
+            const fresh = await (await fetch('/api/changes/applications?since=now')).json();
+            changesCursor = fresh.next_cursor;
+            newApplications = 0;
+            if(appFilters) await loadApplications(false);
+            return;
+          }
+          const js = await res.json();
+          if(js.status !== 'ok') return;
+          js.rows.forEach(a=>{
+            const tr = appTbody.querySelector(`tr[data-id="${a.id}"]`);
+            if(!tr){ newApplications++; return; }
+            const row = applicationRow(a);
+            const box = tr.querySelector('.row-select');
+            if(box && box.checked) row.querySelector('.row-select').checked = true;
+            tr.replaceWith(row);
+          });
+          js.deleted.forEach(id=>{
+            const tr = appTbody.querySelector(`tr[data-id="${id}"]`);
+            if(tr) tr.remove();
+          });
+          changesCursor = js.next_cursor;
+          more = js.has_more;
+        }
+        updateApplicationsInfo();
+        const info = document.getElementById('applicationsInfo');
+        if(info && newApplications) info.textContent += ` (${newApplications} new since loading; reload to see them)`;
+      } catch(err){
+        // offline or server restarting: try again on the next tick
+      } finally {
+        syncing = false;
+      }
+    }
+    setInterval(syncApplications, 15000);
+  }
+
+  // Multi-select bulk actions: one request per action instead of one per row
+  // (POST /api/<table>/batch_delete and /api/applications/batch_status).
+  function setupBulkActions(tbodyId, table){
+    const tbody = document.getElementById(tbodyId);
+    if(!tbody) return;
+    const selectAll = tbody.closest('table').querySelector('.select-all');
+    const toolbars = document.querySelectorAll(`[data-bulk-table="${table}"]`);
+    const selectedRows = ()=> Array.from(tbody.querySelectorAll('.row-select:checked')).map(cb=>cb.closest('tr'));
+    function refresh(){
+      const n = selectedRows().length;
+      toolbars.forEach(el=>{
+        el.classList.toggle('d-none', n === 0);
+        el.querySelectorAll('.bulk-count').forEach(c=> c.textContent = n);
+      });
+      if(selectAll && n === 0) selectAll.checked = false;
+    }
+    if(selectAll){
+      selectAll.addEventListener('change', ()=>{
+        tbody.querySelectorAll('tr').forEach(tr=>{
+          const cb = tr.querySelector('.row-select');
+          if(cb && tr.style.display !== 'none') cb.checked = selectAll.checked;
+        });
+        refresh();
+      });
+    }
+    tbody.addEventListener('change', (e)=>{ if(e.target.classList.contains('row-select')) refresh(); });
+
+    async function post(url, body){
+      const res = await fetch(url, {method:'POST', headers:{'Content-Type':'application/json'}, body:JSON.stringify(body)});
+      if(!res.ok){
+        const err = await res.json().catch(()=>({message:'Request failed'}));
+        showToast(err.message||'Request failed','error');
+        return null;
+      }
+      return res.json();
+    }
+
+    const deleteBtn = document.querySelector(`[data-bulk-delete="${table}"]`);
+    if(deleteBtn){
+      deleteBtn.addEventListener('click', async ()=>{
+        const rows = selectedRows();
+        if(!rows.length || !confirm(`Delete ${rows.length} selected row(s)?`)) return;
+        const js = await post(`/api/${table}/batch_delete`, {ids: rows.map(tr=>Number(tr.getAttribute('data-id')))});
+        if(!js) return;
+        let deleted = 0;
+        js.results.forEach(r=>{
+          const tr = tbody.querySelector(`tr[data-id="${r.id}"]`);
+          if(tr && r.outcome !== 'error'){ tr.remove(); if(r.outcome === 'deleted') deleted++; }
+        });
+        showToast(`Deleted ${deleted} row(s)`,'success');
+        if(table === 'applications') updateApplicationsInfo();
+        refresh();
+      });
+    }
+
+    const statusBtn = document.querySelector(`[data-bulk-status="${table}"]`);
+    if(statusBtn){
+      statusBtn.addEventListener('click', async ()=>{
+        const rows = selectedRows();
+        const status = document.getElementById('bulkStatus').value;
+        if(!rows.length) return;
+        const js = await post('/api/applications/batch_status', {ids: rows.map(tr=>Number(tr.getAttribute('data-id'))), status: status});
+        if(!js) return;
+        let updated = 0, full = 0;
+        js.results.forEach(r=>{
+          const tr = tbody.querySelector(`tr[data-id="${r.id}"]`);
+          if(r.outcome === 'full') full++;
+          if(!tr || r.outcome !== 'updated') return;
+          updated++;
+          const badge = tr.querySelector('.status-badge');
+          if(badge){
+            badge.textContent = status;
+            badge.className = `status-badge px-2.5 py-1 rounded-full text-sm font-medium ${getStatusColor(status)}`;
+          }
+          tr.querySelector('.row-select').checked = false;
+        });
+        showToast(`Updated ${updated} application(s)`,'success');
+        if(full) showToast(`${full} not selected: no seats left`,'error');
+        refresh();
+      });
+    }
+  }
+  // Internship search: ranked results from /api/internships/search replace the
+  // current page of rows; "More results" appends the next page.
+  const internSearchForm = document.getElementById('internSearchForm');
+  if(internSearchForm){
+    const more = document.getElementById('internSearchMore');
+    let nextOffset = null;
+    async function runSearch(append){
+      const params = new URLSearchParams();
+      new FormData(internSearchForm).forEach((v, k)=>{ if(v) params.set(k, v); });
+      if(append && nextOffset !== null) params.set('offset', nextOffset);
+      const res = await fetch('/api/internships/search?' + params.toString());
+      const js = await res.json();
+      if(js.status !== 'ok'){ showToast(js.message || 'Search failed', 'error'); return; }
+      const tbody = document.getElementById('internshipsTable');
+      if(!append) tbody.innerHTML = '';
+      js.rows.forEach(r=>{
+        const tr = document.createElement('tr');
+        tr.setAttribute('data-id', r.id);
+        tr.innerHTML = `<td><input type="checkbox" class="form-check-input row-select" aria-label="Select row"></td><td class="col-id">${r.id}</td><td class="col-title" title="${escapeHtml(r.description_snippet||'')}">${escapeHtml(r.title)}</td><td class="col-company" data-company-id="${r.company_id}">${escapeHtml(r.company_name||'')}</td><td class="col-dates">${escapeHtml(r.start_date||'')} - ${escapeHtml(r.end_date||'')}</td><td class="col-stipend">${escapeHtml(r.stipend||'')}</td><td class="col-seats">${escapeHtml(String(r.seats||''))}</td><td><button class="btn btn-sm btn-icon btn-outline-secondary btn-edit" title="Edit"><i class="fa-solid fa-pen-to-square"></i></button> <button class="btn btn-sm btn-icon btn-outline-danger btn-delete" title="Delete"><i class="fa-solid fa-trash"></i></button></td>`;
+        tbody.appendChild(tr);
+      });
+      if(!append && !js.rows.length) tbody.innerHTML = '<tr><td colspan="8" class="text-center text-muted">No internships match your search</td></tr>';
+      nextOffset = js.next_offset;
+      more.classList.toggle('d-none', !js.has_more);
+      document.getElementById('internSearchPager').classList.remove('d-none');
+      const listPager = document.getElementById('internListPager');
+      if(listPager) listPager.classList.add('d-none');
+    }
+    internSearchForm.addEventListener('submit', (e)=>{ e.preventDefault(); runSearch(false); });
+    if(more) more.addEventListener('click', ()=> runSearch(true));
+  }
+
+  setupBulkActions('studentsTable', 'students');
+  setupBulkActions('internshipsTable', 'internships');
+  setupBulkActions('applicationsTable', 'applications');
+
+  // Dashboard detail lists are fetched after the page renders
+  const companyTotals = document.getElementById('companyTotals');
+  if(companyTotals){
+    fetch(companyTotals.getAttribute('data-src')).then(res=> res.ok ? res.json() : Promise.reject()).then(js=>{
+      if(!js.companies.length){
+        companyTotals.innerHTML = '<li class="list-group-item text-muted">No companies yet</li>';
+        return;
+      }
+      companyTotals.innerHTML = js.companies.map(c=>`<li class="list-group-item d-flex justify-content-between align-items-center">${escapeHtml(c.name)}<span class="text-muted small">${c.internships} internships &middot; ${c.applications} applications</span></li>`).join('');
+    }).catch(()=>{ companyTotals.innerHTML = '<li class="list-group-item text-muted">Could not load company totals</li>'; });
+  }
+
+  // Live application status (Server-Sent Events from /api/events) for students
+  // and companies, instead of polling the dashboard. The browser reconnects on
+  // its own with Last-Event-ID; when the server refuses the stream (busy) we
+  // retry later and pass the last id ourselves.
+  if(document.body.dataset.liveEvents && window.EventSource){
+    const badgeColors = {'Selected':'bg-success', 'Rejected':'bg-danger', 'Under Review':'bg-warning'};
+    let lastEventId = '';
+    function openEvents(){
+      const source = new EventSource('/api/events' + (lastEventId ? '?last_event_id=' + encodeURIComponent(lastEventId) : ''));
+      source.addEventListener('application_status', (e)=>{
+        lastEventId = e.lastEventId;
+        const ev = JSON.parse(e.data);
+        const title = escapeHtml(ev.internship_title || 'an internship');
+        if(ev.previous_status === null) showToast(`New application for ${title}`, 'info');
+        else showToast(`Application for ${title}: ${escapeHtml(ev.status)}`, ev.status === 'Rejected' ? 'error' : 'success');
+        const badge = document.querySelector(`tr[data-application-id="${ev.application_id}"] .app-status`);
+        if(badge){
+          badge.textContent = ev.status;
+          badge.className = 'badge app-status ' + (badgeColors[ev.status] || 'bg-primary');
+        }
+      });
+      source.addEventListener('reset', (e)=>{ lastEventId = e.lastEventId; });
+      source.onerror = ()=>{
+        if(source.readyState === EventSource.CLOSED) setTimeout(openEvents, 30000);
+      };
+    }
+    openEvents();
   }
-  if(appSearch) appSearch.addEventListener('input', filterApplications);
-  if(appFilter) appFilter.addEventListener('change', filterApplications);
 });
 
 // utility to escape HTML when inserting user values
@@ -0,0 +1,215 @@
+"""
+Concurrency stress test for seat allocation.
+
+Usage:
+    DB_POOL_SIZE=50 python stress_seats.py --concurrency 200 --students 400 --internships 4 --seats 10
+
+Creates a throwaway company with a few internships (a handful of seats
+each) and many applicants to every one of them, then fires selections for
+all applications at once from --concurrency threads, mixing the three ways
+an applicant can be selected: models.select_application(),
+models.batch_update_application_status() and models.fill_seats() with a
+random ranked list. Afterwards it checks, for every internship:
+- no more applicants are Selected than it has seats;
+- every seat was filled (there were far more applicants than seats);
+- internship_stats.selected / seats_remaining match the applications table;
+- callers were told 'selected' exactly as many times as rows were selected.
+
+Exits with status 1 if any check fails. The fixture is deleted afterwards
+unless --keep is given. Needs a configured database (config.DB_CONFIG).
+"""
+import argparse
+import random
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from mysql.connector import Error
+
+import models
+
+RETRIES = 5
+
+
+def create_fixture(students, internships, seats):
+    tag = uuid.uuid4().hex[:8]
+    conn = models.get_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute("INSERT INTO companies (name, email) VALUES (%s, %s)",
+                    (f'Stress Test {tag}', f'stress-{tag}@company.example'))
+        company_id = cur.lastrowid
+        internship_ids = []
+        for n in range(internships):
+            cur.execute("INSERT INTO internships (title, company_id, seats) VALUES (%s, %s, %s)",
+                        (f'Stress Internship {tag}-{n}', company_id, seats))
+            internship_ids.append(cur.lastrowid)
+        cur.executemany("INSERT INTO students (name, email) VALUES (%s, %s)",
+                        [(f'Stress Student {n}', f'stress-{tag}-{n}@college.example') for n in range(students)])
+        cur.execute("SELECT id FROM students WHERE email LIKE %s", (f'stress-{tag}-%',))
+        student_ids = [r[0] for r in cur.fetchall()]
+        conn.commit()
+        cur.close()
+    finally:
+        conn.close()
+    for iid in internship_ids:
+        for sid in student_ids:
+            models.add_application(sid, iid)
+    rows = models.fetchall("SELECT id, internship_id FROM applications WHERE internship_id IN (%s)"
+                           % ','.join(['%s'] * len(internship_ids)), tuple(internship_ids))
+    return {'company_id': company_id, 'internship_ids': internship_ids, 'student_ids': student_ids,
+            'applications': [(r['id'], r['internship_id']) for r in rows]}
+
+
+def drop_fixture(fx):
+    conn = models.get_connection()
+    try:
+        cur = conn.cursor()
+        marks = ','.join(['%s'] * len(fx['student_ids']))
+        cur.execute(f"DELETE FROM students WHERE id IN ({marks})", tuple(fx['student_ids']))
+        marks = ','.join(['%s'] * len(fx['internship_ids']))
+        cur.execute(f"DELETE FROM internships WHERE id IN ({marks})", tuple(fx['internship_ids']))
+        cur.execute("DELETE FROM companies WHERE id = %s", (fx['company_id'],))
+        conn.commit()
+        cur.close()
+    finally:
+        conn.close()
+    models.bump_catalog_version(*models.VERSIONED_TABLES)
+
+
+def _retry(fn, *args):
+    """Deadlocks and lock wait timeouts are expected under this much contention; retry them."""
+    for attempt in range(RETRIES):
+        try:
+            return fn(*args)
+        except (Error, models.PoolTimeout) as e:
+            if attempt == RETRIES - 1 or getattr(e, 'errno', None) not in (None, 1205, 1213):
+                raise
+            time.sleep(random.random() * 0.05 * (attempt + 1))
+
+
+def run(fx, concurrency, seed):
+    rng = random.Random(seed)
+    apps = list(fx['applications'])
+    rng.shuffle(apps)
+    # three kinds of work: single selects, small batch status updates and
+    # ranked fills; each application belongs to exactly one task, so the
+    # outcomes reported to callers can be checked against the table
+    tasks, batch, ranked = [], [], {}
+    for aid, iid in apps:
+        kind = rng.random()
+        if kind < 0.7:
+            tasks.append(('select', aid))
+        elif kind < 0.9:
+            batch.append(aid)
+            if len(batch) == 5:
+                tasks.append(('batch', batch))
+                batch = []
+        else:
+            ranked.setdefault(iid, []).append(aid)
+            if len(ranked[iid]) == 8:
+                tasks.append(('fill', (iid, ranked.pop(iid))))
+    if batch:
+        tasks.append(('batch', batch))
+    tasks += [('fill', (iid, ids)) for iid, ids in ranked.items()]
+    rng.shuffle(tasks)
+    tally = {'selected': 0, 'full': 0, 'errors': 0}
+    lock = threading.Lock()
+    start_gate = threading.Event()
+
+    def work(task):
+        kind, arg = task
+        start_gate.wait()
+        selected = full = 0
+        try:
+            if kind == 'select':
+                outcome = _retry(models.select_application, arg)
+                selected, full = outcome == 'selected', outcome == 'full'
+            elif kind == 'batch':
+                outcomes = _retry(models.batch_update_application_status, [(aid, 'Selected') for aid in arg])
+                selected = sum(1 for o in outcomes.values() if o == 'updated')
+                full = sum(1 for o in outcomes.values() if o == 'full')
+            else:
+                result = _retry(models.fill_seats, *arg)
+                selected = len(result['selected'])
+                full = sum(1 for o in result['results'].values() if o == 'full')
+        except Exception as e:
+            print(f"[ERROR] {kind}: {e}")
+            with lock:
+                tally['errors'] += 1
+            return
+        with lock:
+            tally['selected'] += selected
+            tally['full'] += full
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [pool.submit(work, t) for t in tasks]
+        # release every worker at once so the selections really overlap
+        began = time.time()
+        start_gate.set()
+        for f in futures:
+            f.result()
+    tally['seconds'] = time.time() - began
+    tally['operations'] = len(tasks)
+    return tally
+
+
+def verify(fx, tally):
+    marks = ','.join(['%s'] * len(fx['internship_ids']))
+    rows = models.fetchall(f"""
+        SELECT i.id, i.seats,
+               (SELECT COUNT(*) FROM applications a WHERE a.internship_id = i.id AND a.status = 'Selected') AS selected_rows,
+               st.selected AS counter_selected, st.seats_remaining
+        FROM internships i LEFT JOIN internship_stats st ON st.internship_id = i.id
+        WHERE i.id IN ({marks})
+    """, tuple(fx['internship_ids']))
+    failures = []
+    total = 0
+    for r in rows:
+        total += r['selected_rows']
+        print(f"  internship {r['id']}: seats {r['seats']}, selected {r['selected_rows']}, "
+              f"counter {r['counter_selected']}, remaining {r['seats_remaining']}")
+        if r['selected_rows'] > r['seats']:
+            failures.append(f"internship {r['id']} overbooked: {r['selected_rows']} > {r['seats']}")
+        if r['selected_rows'] < min(r['seats'], len(fx['student_ids'])):
+            failures.append(f"internship {r['id']} left seats empty: {r['selected_rows']} < {r['seats']}")
+        if r['counter_selected'] != r['selected_rows'] or r['seats_remaining'] != r['seats'] - r['selected_rows']:
+            failures.append(f"internship {r['id']} counters drifted")
+    if tally['selected'] != total:
+        failures.append(f"callers were told {tally['selected']} selections but {total} rows are Selected")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Prove concurrent selections never overbook an internship')
+    parser.add_argument('--concurrency', type=int, default=200)
+    parser.add_argument('--students', type=int, default=300, help='applicants per internship')
+    parser.add_argument('--internships', type=int, default=4)
+    parser.add_argument('--seats', type=int, default=10, help='seats per internship')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--keep', action='store_true', help='leave the fixture rows in place')
+    args = parser.parse_args()
+
+    fx = create_fixture(args.students, args.internships, args.seats)
+    print(f"Fixture: {len(fx['internship_ids'])} internships x {args.seats} seats, {len(fx['applications'])} applications")
+    try:
+        tally = run(fx, args.concurrency, args.seed)
+        print(f"{tally['operations']} operations from {args.concurrency} threads in {tally['seconds']:.2f}s: "
+              f"{tally['selected']} selected, {tally['full']} refused (full), {tally['errors']} errors")
+        failures = verify(fx, tally)
+        if tally['errors']:
+            failures.append(f"{tally['errors']} operations failed")
+    finally:
+        if not args.keep:
+            drop_fixture(fx)
+    if failures:
+        for f in failures:
+            print(f"[FAIL] {f}")
+        sys.exit(1)
+    print('[SUCCESS] No internship was overbooked and the counters match')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,188 @@
+"""
+Group commit for application submissions.
+
+When a popular posting opens, thousands of students submit within minutes,
+and one transaction per POST means one commit (and one redo log flush) per
+application. submit() instead puts the application on an in-process queue
+and waits; a background flusher takes everything queued, up to max_batch
+rows or max_wait_ms after the oldest one arrived, writes it with
+models.add_applications() (one multi-row INSERT, one commit) and hands every
+caller its own result. While one batch is being written the next one
+collects, so batches grow with the load.
+
+Each worker process has its own queue. max_wait_ms = 0 writes every
+submission on the caller's thread, as before.
+"""
+import os
+import threading
+import time
+
+import metrics
+import models
+from config import SUBMIT_CONFIG
+
+WAIT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+class SubmitTimeout(Exception):
+    """Raised when a queued submission was not written within the timeout."""
+    pass
+
+
+class _Pending(object):
+    __slots__ = ('pair', 'queued_at', 'done', 'result', 'error')
+
+    def __init__(self, pair):
+        self.pair = pair
+        self.queued_at = time.time()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class GroupCommitter(object):
+    def __init__(self, flush, max_batch=200, max_wait_ms=5, timeout=10.0):
+        self.flush = flush
+        self.max_batch = max(1, int(max_batch))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self.timeout = float(timeout)
+        self._queue = []
+        self._cond = threading.Condition()
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self.batch_sizes = metrics.Histogram(metrics.COUNT_BUCKETS)
+        self.flush_latency = metrics.Histogram(metrics.QUERY_BUCKETS)
+        self.wait_latency = metrics.Histogram(WAIT_BUCKETS)
+        self.counts = {'submitted': 0, 'flushes': 0, 'failed_flushes': 0, 'timeouts': 0}
+        self.outcomes = {}
+
+    def _start(self):
+        # started lazily, and again in a forked worker process
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    # a forked child inherits the queue but not the flusher thread
+                    self._queue = []
+                    self._cond = threading.Condition()
+                    self._thread = threading.Thread(target=self._run, name='submit-flusher', daemon=True)
+                    self._pid = os.getpid()
+                    self._thread.start()
+
+    def _count(self, table, key, amount=1):
+        with self._lock:
+            table[key] = table.get(key, 0) + amount
+
+    def submit(self, pair):
+        """Queue one item and block until its batch is written; returns its result."""
+        self._count(self.counts, 'submitted')
+        item = _Pending(pair)
+        if self.max_wait <= 0:
+            self._write([item])
+            return self._finish(item)
+        self._start()
+        with self._cond:
+            self._queue.append(item)
+            if len(self._queue) == 1 or len(self._queue) >= self.max_batch:
+                self._cond.notify()
+        if not item.done.wait(self.timeout):
+            with self._cond:
+                queued = item in self._queue
+                if queued:
+                    self._queue.remove(item)
+            if queued:
+                # never written, so a retry starts from scratch
+                self._count(self.counts, 'timeouts')
+                raise SubmitTimeout('Submission is still queued; please retry')
+            # already being written: a retry would only find it as a duplicate
+            item.done.wait()
+        return self._finish(item)
+
+    def _finish(self, item):
+        self.wait_latency.observe(time.time() - item.queued_at)
+        if item.error is not None:
+            raise item.error
+        return item.result
+
+    def _next_batch(self):
+        with self._cond:
+            while not self._queue:
+                self._cond.wait()
+            # give the oldest submission up to max_wait for company
+            deadline = self._queue[0].queued_at + self.max_wait
+            while len(self._queue) < self.max_batch:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch = self._queue[:self.max_batch]
+            del self._queue[:self.max_batch]
+            return batch
+
+    def _run(self):
+        while True:
+            self._write(self._next_batch())
+
+    def _write(self, batch):
+        start = time.time()
+        try:
+            results = self.flush([item.pair for item in batch])
+        except Exception as e:
+            self._count(self.counts, 'failed_flushes')
+            if len(batch) > 1:
+                # one bad pair must not fail everybody else's submission
+                print(f"[WARNING] Flushing {len(batch)} submissions failed ({e}); writing them one by one")
+                for item in batch:
+                    self._write([item])
+                return
+            print(f"[ERROR] Writing a submission failed: {e}")
+            batch[0].error = e
+            batch[0].done.set()
+            return
+        self.flush_latency.observe(time.time() - start)
+        self.batch_sizes.observe(len(batch))
+        self._count(self.counts, 'flushes')
+        for item, result in zip(batch, results):
+            self._count(self.outcomes, result[0])
+            item.result = result
+            item.done.set()
+
+    def stats(self):
+        batches = self.batch_sizes.snapshot()
+        flushes = self.flush_latency.snapshot()
+        with self._lock:
+            out = dict(self.counts)
+            out['outcomes'] = dict(self.outcomes)
+        out.update({
+            'queued': len(self._queue),
+            'max_batch': self.max_batch,
+            'max_wait_ms': self.max_wait * 1000,
+            'mean_batch_size': round(batches['sum'] / batches['count'], 2) if batches['count'] else None,
+            'max_batch_size': batches['max'],
+            'flush_seconds_sum': round(flushes['sum'], 6),
+            'flush_seconds_max': round(flushes['max'], 6),
+        })
+        return out
+
+
+committer = GroupCommitter(models.add_applications, SUBMIT_CONFIG['max_batch'],
+                           SUBMIT_CONFIG['max_wait_ms'], SUBMIT_CONFIG['timeout'])
+
+
+def submit_application(student_id, internship_id):
+    """Apply a student to an internship through the group commit.
+
+    Returns (outcome, application id): ('created', id), ('duplicate', id) when
+    the student already applied, or ('invalid', None). Raises ValueError for
+    ids that are not integers and SubmitTimeout when the write did not start
+    in time.
+    """
+    try:
+        pair = (int(student_id), int(internship_id))
+    except (TypeError, ValueError):
+        raise ValueError('student_id and internship_id must be integers')
+    return committer.submit(pair)
+
+
+def stats():
+    return committer.stats()